@@ -1,28 +1,38 @@
-import sys
-import json
-from typing import Any
-from datatorch.api import ApiClient
-from datatorch.core import BASE_URL, BASE_URL_API
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["ApiClient", "get_inputs", "BASE_URL", "BASE_URL_API"]
+from datatorch.runtime import get_inputs, get_input, set_output
 
+if TYPE_CHECKING:
+    from datatorch.api import ApiClient
+    from datatorch.core import BASE_URL, BASE_URL_API
 
-_inputs = None
+__all__ = [
+    "ApiClient",
+    "get_inputs",
+    "get_input",
+    "set_output",
+    "BASE_URL",
+    "BASE_URL_API",
+]
 
 
-def get_inputs() -> dict:
-    global _inputs
-    try:
-        if _inputs is None:
-            _inputs = json.loads(sys.argv[-1])
-        return _inputs
-    except:
-        return {}
+# Loaded on first access, so action steps only importing the runtime helpers
+# do not pay for the API client's dependencies
+_LAZY = {
+    "ApiClient": "datatorch.api",
+    "BASE_URL": "datatorch.core",
+    "BASE_URL_API": "datatorch.core",
+}
 
 
-def get_input(key: str) -> Any:
-    return get_inputs().get(key)
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
 
 
-def set_output(var: str, value: Any):
-    print(f"::{var}::{json.dumps(value)}")
+def __dir__():
+    return sorted([*globals(), *_LAZY])
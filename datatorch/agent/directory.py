@@ -76,6 +76,10 @@ class AgentDirectory(object):
         mkdir_exists(path)
         return path
 
+    def mirror_path(self, project_id: str):
+        """Returns the database of a project's `ProjectMirror`"""
+        return os.path.join(self.db_dir, f"{project_id}.sqlite")
+
     @property
     def temp_dir(self):
         return os.path.join(self.dir, "temp")
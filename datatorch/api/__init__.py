@@ -1,24 +1,33 @@
-from .api import ApiClient
-
-from .client import Client
-from .utils import Bulk
-from .where import Where
-
-from .entity.annotation import Annotation
-from .entity.dataset import Dataset
-from .entity.project import Project
-from .entity.label import Label
-from .entity.file import File
-from .entity.user import User
-from .entity.storage_link import StorageLink
-from .entity.sources.source import Source
-from .entity.sources.image.segmentations import Segmentations
-from .entity.sources.image.bounding_box import BoundingBox
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import ApiClient
+    from .aio import AsyncApiClient
+    from .client import Client
+    from .context import default_client, using_client
+    from .mirror import ProjectMirror
+    from .retry import CircuitBreaker, RetryPolicy
+    from .session import PoolConfig, register_backend
+    from .tracing import JsonlTracer, TraceAggregator, Tracer, add_tracer, trace
+    from .bulk import Bulk, BulkError
+    from .where import Where
+    from .entity.annotation import Annotation
+    from .entity.dataset import Dataset
+    from .entity.project import Project
+    from .entity.label import Label
+    from .entity.file import File
+    from .entity.user import User
+    from .entity.storage_link import StorageLink
+    from .entity.sources.source import Source
+    from .entity.sources.image.segmentations import Segmentations
+    from .entity.sources.image.bounding_box import BoundingBox
 
 __all__ = [
     # Clients
     "Client",
     "ApiClient",
+    "AsyncApiClient",
     # Entities
     "Annotation",
     "Dataset",
@@ -32,5 +41,65 @@ __all__ = [
     "User",
     # Utilities
     "Bulk",
+    "BulkError",
+    "CircuitBreaker",
+    "PoolConfig",
+    "ProjectMirror",
+    "RetryPolicy",
     "Where",
+    "register_backend",
+    # Tracing
+    "Tracer",
+    "TraceAggregator",
+    "JsonlTracer",
+    "add_tracer",
+    "trace",
+    "default_client",
+    "using_client",
 ]
+
+
+# Names are imported from their modules on first access, so importing the
+# package does not load gql, requests or the geometry libraries up front
+_LAZY = {
+    "ApiClient": ".api",
+    "AsyncApiClient": ".aio",
+    "Client": ".client",
+    "default_client": ".context",
+    "using_client": ".context",
+    "ProjectMirror": ".mirror",
+    "CircuitBreaker": ".retry",
+    "RetryPolicy": ".retry",
+    "PoolConfig": ".session",
+    "register_backend": ".session",
+    "Tracer": ".tracing",
+    "TraceAggregator": ".tracing",
+    "JsonlTracer": ".tracing",
+    "add_tracer": ".tracing",
+    "trace": ".tracing",
+    "Bulk": ".bulk",
+    "BulkError": ".bulk",
+    "Where": ".where",
+    "Annotation": ".entity.annotation",
+    "Dataset": ".entity.dataset",
+    "Project": ".entity.project",
+    "Label": ".entity.label",
+    "File": ".entity.file",
+    "User": ".entity.user",
+    "StorageLink": ".entity.storage_link",
+    "Source": ".entity.sources.source",
+    "Segmentations": ".entity.sources.image.segmentations",
+    "BoundingBox": ".entity.sources.image.bounding_box",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY])
@@ -0,0 +1,489 @@
+import os
+import time
+import asyncio
+import functools
+import logging
+
+from typing import Awaitable, Callable, List, Optional, Type, TypeVar, Union
+from urllib.parse import urlencode
+
+import aiohttp
+from gql import Client as GqlClient
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.exceptions import TransportServerError
+from graphql import GraphQLError, get_operation_ast
+from graphql.language.ast import DocumentNode, OperationType
+
+from . import tracing
+from .api import ApiClient
+from .client import _part_size, _trace_variables, operation_name, parse_query
+from .download import (
+    MIN_CHUNK_SIZE,
+    PART_SUFFIX,
+    DownloadError,
+    filename_from_response,
+    matches_remote,
+    remote_size,
+)
+from .retry import REJECTED_STATUSES, RetryPolicy, retry_after
+from .transfer import TransferReport, TransferResult
+from .upload import guess_mimetype, SNIFF_SIZE
+
+from .api import _FILE, _PROJECT_BY_ID, _PROJECT_BY_NAME, _SETTINGS, _VIEWER
+from .entity.annotation import (
+    Annotation,
+    _CREATE_ANNOTATIONS,
+    _assign_ids,
+    _clear_ids,
+)
+from .entity.dataset import Dataset
+from .entity.file import File, _CREATE_FILE
+from .entity.project import Project, _DATASET_FILES, _STORAGE_LINK_DEFAULT
+from .entity.settings import Settings as ApiSettings
+from .entity.sources.source import Source, _CREATE_SOURCE
+from .entity.storage_link import StorageLink
+from .entity.user import User
+from .where import Where
+
+__all__ = "AsyncApiClient"
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Failures `AsyncApiClient` retries according to its policy
+RETRIED_ERRORS = (
+    TransportServerError,
+    aiohttp.ClientResponseError,
+    aiohttp.ClientConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+def _status(error: Exception) -> Optional[int]:
+    """HTTP status of a failed request, None if no response was received"""
+    if isinstance(error, TransportServerError):
+        return error.code
+    return getattr(error, "status", None)
+
+
+def _response_error(error: Exception) -> Optional[aiohttp.ClientResponseError]:
+    """aiohttp error with the headers of the failed response, if any"""
+    for e in (error, error.__cause__):
+        if isinstance(e, aiohttp.ClientResponseError) and e.headers is not None:
+            return e
+    return None
+
+
+class AsyncApiClient(object):
+    """Asyncio version of `ApiClient` for running many requests concurrently.
+
+    GraphQL queries, uploads and downloads share one aiohttp session whose
+    connection pool allows `limit` requests in flight at the same time.
+    Entities returned by the client are bound to a regular `ApiClient` so
+    their blocking methods keep working. Requests are retried and traced
+    like those of `ApiClient`, sharing its `RetryPolicy`.
+
+    The client must be used as an async context manager::
+
+        async with AsyncApiClient() as api:
+            project = await api.project("owner/project")
+            files = await api.files(project)
+            await asyncio.gather(*(api.create_annotation(a) for a in annos))
+    """
+
+    def __init__(
+        self,
+        api_key: str = None,
+        api_url: str = None,
+        agent: bool = False,
+        limit: int = 100,
+        schema: bool = None,
+        retry: RetryPolicy = None,
+    ):
+        # Resolves the URL and token the same way the blocking client does
+        self.sync = ApiClient(
+            api_key=api_key, api_url=api_url, agent=agent, schema=schema, retry=retry
+        )
+        self.retry = self.sync.session.retry
+        self.limit = limit
+        self.transport: AIOHTTPTransport = None
+        self.client: GqlClient = None
+        self._session = None
+
+    @property
+    def api_url(self) -> str:
+        return self.sync.api_url
+
+    @property
+    def headers(self) -> dict:
+        token = self.sync._api_token
+        return {self.sync.token_header: token} if token else {}
+
+    @property
+    def http(self) -> aiohttp.ClientSession:
+        """aiohttp session shared by GraphQL and file requests"""
+        return self.transport.session
+
+    async def __aenter__(self):
+        self.transport = AIOHTTPTransport(
+            url=self.sync.graphql_url,
+            headers=self.headers,
+            ssl=True,
+            client_session_args={
+                "connector": aiohttp.TCPConnector(limit=self.limit),
+            },
+        )
+        self.client = GqlClient(transport=self.transport)
+        self._session = await self.client.connect_async()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.client.close_async()
+        self.sync.close()
+
+    async def execute(
+        self, query: Union[DocumentNode, str], params: dict = {}, **kwargs
+    ) -> dict:
+        """Asynchronous version of `Client.execute`"""
+        removed_none = dict((k, v) for k, v in params.items() if v is not None)
+        query_doc = parse_query(query) if isinstance(query, str) else query
+        if self.sync._schema_cache is not None:
+            loop = asyncio.get_running_loop()
+            if self.sync.client.schema is None:
+                await loop.run_in_executor(None, self.sync.load_schema)
+            validate = functools.partial(self.sync.client.validate, query_doc)
+            try:
+                validate()
+            except GraphQLError:
+                # Refetches a stale schema like `Client.execute`, off the loop
+                await loop.run_in_executor(None, self.sync._with_fresh_schema, validate)
+        # Queries can be retried, mutations only if the policy allows it
+        operation = get_operation_ast(query_doc, kwargs.get("operation_name"))
+        query = operation is not None and operation.operation == OperationType.QUERY
+        name = operation_name(query_doc) if tracing.active() else ""
+        with tracing.span(name, "graphql") as span:
+            _trace_variables(span, removed_none)
+            return await self._call(
+                lambda: self._session.execute(
+                    query_doc, variable_values=removed_none, **kwargs
+                ),
+                query,
+                f"POST {self.sync.graphql_url}",
+            )
+
+    async def _call(
+        self, send: Callable[[], Awaitable[T]], idempotent: bool, description: str
+    ) -> T:
+        """Awaits `send` until it succeeds or may no longer be retried.
+
+        Asynchronous version of `RetryPolicy.call`, waiting on the policy's
+        circuit breaker without blocking the event loop.
+        """
+        policy = self.retry
+        breaker = policy.breaker
+        for attempt in range(policy.attempts + 1):
+            while breaker and breaker.is_open:
+                await asyncio.sleep(breaker.remaining)
+            try:
+                result = await send()
+            except RETRIED_ERRORS as e:
+                error = e
+            else:
+                if breaker:
+                    breaker.record_success()
+                return result
+
+            status = _status(error)
+            response = _response_error(error)
+            if breaker:
+                if status is None or status in REJECTED_STATUSES:
+                    breaker.record_failure(retry_after(response))
+                elif status < 500:
+                    breaker.record_success()
+
+            if status is not None:
+                retry = policy.should_retry_status(idempotent, status)
+            elif isinstance(error, aiohttp.ClientConnectorError):
+                # Failed to connect, the server never received the request
+                retry = True
+            else:
+                retry = idempotent or policy.retry_mutations
+            if attempt == policy.attempts or not retry:
+                raise error
+
+            wait = policy.delay(attempt, response)
+            span = tracing.current_span()
+            if span is not None:
+                span.retries += 1
+            reason = f"HTTP {status}" if status is not None else repr(error)
+            logger.warning(f"{description} failed ({reason}), retrying in {wait:.1f}s")
+            await asyncio.sleep(wait)
+        raise AssertionError("Unreachable")
+
+    async def query_to_class(
+        self, Entity: Type[T], query: str, path: str = "", params: dict = {}
+    ) -> Union[T, List[T]]:
+        results = await self.execute(query, params=params)
+        return self.sync.to_class(Entity, results, path=path)
+
+    async def settings(self) -> ApiSettings:
+        return await self.query_to_class(ApiSettings, _SETTINGS, path="settings")
+
+    async def viewer(self) -> User:
+        return await self.query_to_class(User, _VIEWER, path="viewer")
+
+    async def project(self, idOrSlug: str) -> Project:
+        if "/" in idOrSlug:
+            login, slug = idOrSlug.split("/")[:2]
+            params = {"login": login, "slug": slug}
+            query = _PROJECT_BY_NAME
+        else:
+            params = {"id": idOrSlug}
+            query = _PROJECT_BY_ID
+        return await self.query_to_class(Project, query, path="project", params=params)
+
+    async def file(self, id: str) -> File:
+        return await self.query_to_class(
+            File, _FILE, path="file", params={"fileId": id}
+        )
+
+    async def files(
+        self, project: Project, where: Where = None, limit=500, page=1
+    ) -> List[File]:
+        """Asynchronous version of `Project.files`"""
+        where = where or Where()
+        return await self.query_to_class(
+            File,
+            _DATASET_FILES,
+            path="project.files.nodes",
+            params={
+                "projectId": project.id,
+                "perPage": limit,
+                "page": page,
+                "where": where.input,
+            },
+        )
+
+    async def create_file(self, file: File) -> File:
+        """Asynchronous version of `File.create`"""
+        assert file.id is None
+        file._created(await self.execute(_CREATE_FILE, file._create_params()))
+        return file
+
+    async def create_annotation(self, annotation: Annotation) -> Annotation:
+        """Asynchronous version of `Annotation.create`"""
+        assert annotation.id is None
+        new_ids = _assign_ids([annotation])
+        try:
+            await self.execute(_CREATE_ANNOTATIONS, annotation._create_params())
+        except Exception:
+            _clear_ids(new_ids)
+            raise
+        annotation._created()
+        return annotation
+
+    async def create_source(self, source: Source) -> Source:
+        """Asynchronous version of `Source.create`"""
+        source._created(await self.execute(_CREATE_SOURCE, source._create_params()))
+        return source
+
+    async def upload_to_filesource(
+        self,
+        project: Project,
+        path: str,
+        storageId: str = None,
+        storageFolderName: str = None,
+        dataset: Dataset = None,
+    ) -> None:
+        """Uploads the file at `path`, see `ApiClient.upload_to_filesource`"""
+        if storageId is None:
+            storageId = (await self._default_storage(project)).id
+        params = {
+            "path": storageFolderName or "",
+            "import": "false" if dataset is None else "true",
+            "datasetId": "" if dataset is None else dataset.id,
+        }
+        endpoint = f"{self.api_url}/file/v1/upload/{storageId}?{urlencode(params)}"
+        with tracing.span("upload", "upload"):
+            # The file is reopened for every attempt
+            await self._call(
+                lambda: self._upload(endpoint, path), False, f"POST {endpoint}"
+            )
+
+    async def _upload(self, endpoint: str, path: str) -> None:
+        with open(path, "rb") as file:
+            mimetype = guess_mimetype(file.read(SNIFF_SIZE), path)
+            file.seek(0)
+            # aiohttp streams file objects in chunks instead of reading them
+            data = aiohttp.FormData()
+            data.add_field(
+                "file",
+                file,
+                filename=os.path.basename(path),
+                content_type=mimetype,
+            )
+            async with self.http.post(endpoint, data=data, headers=self.headers) as r:
+                r.raise_for_status()
+
+    async def _default_storage(self, project: Project) -> StorageLink:
+        return await self.query_to_class(
+            StorageLink,
+            _STORAGE_LINK_DEFAULT,
+            path="project.storageLinkDefault",
+            params={"projectId": project.id},
+        )
+
+    async def upload_many(
+        self,
+        project: Project,
+        paths: List[str],
+        storageId: str = None,
+        storageFolderName: str = None,
+        dataset: Dataset = None,
+        concurrency: int = 32,
+        callback: Callable[[TransferResult], None] = None,
+    ) -> TransferReport:
+        """Asynchronous version of `ApiClient.upload_many`"""
+        if storageId is None:
+            storageId = (await self._default_storage(project)).id
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def upload(path: str) -> TransferResult:
+            start = time.monotonic()
+            async with semaphore:
+                try:
+                    await self.upload_to_filesource(
+                        project, path, storageId, storageFolderName, dataset
+                    )
+                    result = TransferResult(
+                        path,
+                        True,
+                        os.path.getsize(path),
+                        time.monotonic() - start,
+                        folder=storageFolderName,
+                    )
+                except Exception as e:
+                    logger.warning("Failed to upload {}: {}".format(path, e))
+                    result = TransferResult(
+                        path, False, 0, time.monotonic() - start, error=e
+                    )
+            if callback:
+                callback(result)
+            return result
+
+        return await self._gather(upload(path) for path in paths)
+
+    async def download_file(
+        self, id: str, name: str = "", directory: str = "./", skip: bool = True
+    ):
+        """Asynchronous version of `Client.download_file`.
+
+        Returns:
+            (path, size) tuple, the size is None if skipped.
+        """
+        with tracing.span("download", "download"):
+            # Attempts after a failure resume from the partial file
+            return await self._call(
+                lambda: self._download_file(id, name, directory, skip),
+                True,
+                f"GET {self.api_url}/file/v1/{id}",
+            )
+
+    async def _download_file(
+        self, id: str, name: str, directory: str, skip: bool
+    ) -> tuple:
+        query_string = urlencode({"download": "true", "stream": "true"})
+        url = f"{self.api_url}/file/v1/{id}/{name}?{query_string}"
+        headers = self.headers
+        path = os.path.abspath(os.path.join(directory, name)) if name else None
+
+        if path and skip and os.path.isfile(path):
+            async with self.http.head(url, headers=headers) as head:
+                if head.ok and matches_remote(path, head.headers):
+                    return path, None
+
+        offset = _part_size(path) if path else 0
+        if offset:
+            headers = {**headers, "Range": f"bytes={offset}-"}
+
+        async with self.http.get(url, headers=headers) as result:
+            if result.status == 416 and offset:
+                # The partial file is not a prefix of the remote one
+                os.remove(path + PART_SUFFIX)
+                return await self._download_file(id, name, directory, skip)
+            result.raise_for_status()
+
+            if path is None:
+                name = filename_from_response(result) or id
+                path = os.path.abspath(os.path.join(directory, name))
+                if skip and os.path.isfile(path):
+                    if matches_remote(path, result.headers):
+                        return path, None
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            part_path = path + PART_SUFFIX
+            mode = "ab" if result.status == 206 else "wb"
+            span = tracing.current_span()
+            # Disk writes run in the default executor, not on the event loop
+            loop = asyncio.get_running_loop()
+            f = await loop.run_in_executor(None, open, part_path, mode)
+            try:
+                async for chunk in result.content.iter_chunked(MIN_CHUNK_SIZE):
+                    await loop.run_in_executor(None, f.write, chunk)
+                    if span is not None:
+                        span.add_response_bytes(len(chunk))
+            finally:
+                await loop.run_in_executor(None, f.close)
+
+            size = remote_size(result.headers)
+            if size is not None and os.path.getsize(part_path) != size:
+                raise DownloadError(
+                    f"Download of {id} ended early, run again to resume: {part_path}"
+                )
+            os.replace(part_path, path)
+            return path, os.path.getsize(path)
+
+    async def download_many(
+        self,
+        ids: List[str],
+        directory: str = "./",
+        names: List[str] = None,
+        concurrency: int = 32,
+        skip: bool = True,
+        callback: Callable[[TransferResult], None] = None,
+    ) -> TransferReport:
+        """Asynchronous version of `Client.download_many`"""
+        names = names or [""] * len(ids)
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def download(id: str, name: str) -> TransferResult:
+            start = time.monotonic()
+            async with semaphore:
+                try:
+                    path, size = await self.download_file(id, name, directory, skip)
+                    result = TransferResult(
+                        path,
+                        True,
+                        os.path.getsize(path),
+                        time.monotonic() - start,
+                        skipped=size is None,
+                    )
+                except Exception as e:
+                    logger.warning("Failed to download {}: {}".format(name or id, e))
+                    result = TransferResult(
+                        name or id, False, 0, time.monotonic() - start, error=e
+                    )
+            if callback:
+                callback(result)
+            return result
+
+        return await self._gather(download(id, name) for id, name in zip(ids, names))
+
+    @staticmethod
+    async def _gather(transfers) -> TransferReport:
+        report = TransferReport()
+        for result in await asyncio.gather(*transfers):
+            report.add(result)
+        return report.finish()
@@ -1,17 +1,23 @@
-import logging, os, requests, glob
+import logging, os, glob, time
 
-from typing import IO, overload, cast
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, Callable, List, overload, cast
 
-try:
-    import magic
-except ImportError:
-    magic = None
-    import mimetypes
+import requests
 
 from datatorch.api.entity.dataset import Dataset
 from datatorch.api.entity.storage_link import StorageLink
 from datatorch.utils import normalize_api_url
+from . import tracing
 from .client import Client
+from .transfer import TransferReport, TransferResult
+from .upload import (
+    DEFAULT_PART_SIZE,
+    ChunkedUploader,
+    FolderManifest,
+    glob_root,
+    multipart_encoder,
+)
 
 from .entity.file import File
 from .entity.user import User
@@ -71,12 +77,17 @@ class ApiClient(Client):
     def settings(self) -> ApiSettings:
         """API instance settings"""
         return cast(
-            ApiSettings, self.query_to_class(ApiSettings, _SETTINGS, path="settings")
+            ApiSettings,
+            self.query_to_class(
+                ApiSettings, _SETTINGS, path="settings", cache=("settings",)
+            ),
         )
 
     def viewer(self) -> User:
         """Current logged in user"""
-        return cast(User, self.query_to_class(User, _VIEWER, path="viewer"))
+        return cast(
+            User, self.query_to_class(User, _VIEWER, path="viewer", cache=("viewer",))
+        )
 
     @overload
     def project(self, id: str) -> Project:  # type: ignore
@@ -119,6 +130,33 @@ class ApiClient(Client):
             File, self.query_to_class(File, _FILE, path="file", params={"fileId": id})
         )
 
+    def _post_file(self, endpoint: str, file: IO) -> requests.Response:
+        """Streams `file` as a multipart upload, reading it in chunks.
+
+        Uploads are not idempotent, so they are only retried when the server
+        rejected them unprocessed (see `RetryPolicy`), and only for files
+        that can be read again from the start.
+        """
+        start = file.tell() if file.seekable() else None
+
+        def send() -> requests.Response:
+            if start is not None:
+                file.seek(start)
+            body = multipart_encoder(file)
+            return self.session.post(
+                endpoint,
+                data=body,
+                headers={
+                    self.token_header: self._api_token,
+                    "Content-Type": body.content_type,
+                },
+            )
+
+        if start is None:
+            return send()
+        name = getattr(file, "name", "file")
+        return self.session.retry.call(send, False, f"Upload of {name}")
+
     def upload_to_default_filesource(
         self,
         project: Project,
@@ -134,23 +172,8 @@ class ApiClient(Client):
         importFiles = "false" if dataset is None else "true"
         endpoint = f"{self.api_url}/file/v1/upload/{storageId}?path={storageFolderName}&import={importFiles}&datasetId={datasetId}"
 
-        if magic:
-            # save the current position
-            tell = file.tell()
-            # read 1024 bytes and get the mimetype
-            mimetype = magic.from_buffer(file.read(1024), mime=True)
-            # go back to the saved position
-            file.seek(tell)
-        else:
-            mimetype = mimetypes.guess_type(file.name)[0]
-
-        r = requests.post(
-            endpoint,
-            files={"file": (os.path.basename(file.name), file, mimetype)},
-            headers={self.token_header: self._api_token},
-            stream=True,
-        )
-        print(r.text + " " + endpoint)
+        r = self._post_file(endpoint, file)
+        r.raise_for_status()
 
     def upload_to_filesource(
         self,
@@ -159,11 +182,18 @@ class ApiClient(Client):
         storageId: str = None,
         storageFolderName=None,
         dataset: Dataset = None,
+        chunked: bool = False,
+        partSize: int = DEFAULT_PART_SIZE,
         **kwargs,
     ):
         """
         Uploads a file to the provided `storage_id` if available;
         otherwise, retrieves the default storage ID (DataTorch Storage) from the project.
+
+        With `chunked` the file is sent in parts of `partSize` bytes through a
+        resumable upload session (see `ChunkedUploader`). Uploading the same
+        file again after an interruption continues from the last part the
+        server acknowledged.
         """
         # Retrieve default storage_id if not explicitly provided
         if storageId is None:
@@ -173,27 +203,112 @@ class ApiClient(Client):
         datasetId = "" if dataset is None else dataset.id
         importFiles = "false" if dataset is None else "true"
 
-        # Construct the endpoint
-        endpoint = f"{self.api_url}/file/v1/upload/{storageId}?path={storageFolderName}&import={importFiles}&datasetId={datasetId}"
-
-        # Determine MIME type
-        if magic:
-            tell = file.tell()
-            mimetype = magic.from_buffer(file.read(1024), mime=True)
-            file.seek(tell)
-        else:
-            mimetype = mimetypes.guess_type(file.name)[0]
-
-        # Make the POST request
-        r = requests.post(
-            endpoint,
-            files={"file": (os.path.basename(file.name), file, mimetype)},
-            headers={self.token_header: self._api_token},
-            stream=True,
-        )
+        with tracing.span("upload", "upload"):
+            if chunked:
+                uploader = ChunkedUploader(
+                    self.session,
+                    f"{self.api_url}/file/v1/upload/{storageId}",
+                    headers={self.token_header: self._api_token},
+                    part_size=partSize,
+                )
+                params = {
+                    "path": storageFolderName,
+                    "import": importFiles,
+                    "datasetId": datasetId,
+                }
+                uploader.upload(file, params=params)
+                return
+
+            # Construct the endpoint
+            endpoint = f"{self.api_url}/file/v1/upload/{storageId}?path={storageFolderName}&import={importFiles}&datasetId={datasetId}"
+
+            # Make the POST request
+            r = self._post_file(endpoint, file)
+
+            # Raise an error for failed requests
+            r.raise_for_status()
+
+    def upload_many(
+        self,
+        project: Project,
+        paths: List[str],
+        storageId: str = None,
+        storageFolderName: str = None,
+        dataset: Dataset = None,
+        folderSplit: int = 1000,
+        concurrency: int = 8,
+        callback: Callable[[TransferResult], None] = None,
+        chunked: bool = False,
+        manifest: FolderManifest = None,
+    ) -> TransferReport:
+        """Uploads many files concurrently using a bounded pool of threads.
+
+        When a `storageFolderName` is given and there are more than
+        `folderSplit` files, a new folder suffixed with its index is created
+        for every `folderSplit` files. Failed uploads are recorded in the
+        returned report instead of stopping the remaining uploads.
+
+        Args:
+            concurrency (int): number of files uploaded at the same time.
+                Values above the client's `PoolConfig.pool_maxsize` open extra
+                connections that are not kept alive.
+            callback (callable): called with the `TransferResult` of each file
+                as it completes.
+            chunked (bool): upload every file through a resumable session.
+            manifest (FolderManifest): files recorded in the manifest are
+                skipped and completed uploads are added to it.
+        """
+        # Resolve the storage once instead of once per file
+        if storageId is None:
+            storageId = project.storage_link_default().id
 
-        # Raise an error for failed requests
-        r.raise_for_status()
+        useFolderIndexes = storageFolderName is not None and len(paths) > folderSplit
+
+        def folder_name(index: int):
+            if not useFolderIndexes:
+                return storageFolderName
+            return f"{storageFolderName}_{index // folderSplit}"
+
+        def upload(path: str, folder: str) -> TransferResult:
+            start = time.monotonic()
+            try:
+                key = manifest.key(path) if manifest else None
+                if manifest and key in manifest:
+                    return TransferResult(path, True, folder=folder, skipped=True)
+                with open(path, "rb") as file:
+                    self.upload_to_filesource(
+                        project=project,
+                        file=file,
+                        storageId=storageId,
+                        storageFolderName=folder,
+                        dataset=dataset,
+                        chunked=chunked,
+                    )
+                if manifest:
+                    manifest.add(key)
+                size = os.path.getsize(path)
+                return TransferResult(
+                    path, True, size, time.monotonic() - start, folder=folder
+                )
+            except Exception as e:
+                logger.warning("Failed to upload {}: {}".format(path, e))
+                return TransferResult(
+                    path, False, 0, time.monotonic() - start, error=e, folder=folder
+                )
+
+        report = TransferReport()
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [
+                executor.submit(upload, path, folder_name(index))
+                for index, path in enumerate(paths)
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                report.add(result)
+                if callback:
+                    callback(result)
+
+        return report.finish()
 
     def glob_upload_folder(
         self,
@@ -204,42 +319,57 @@ class ApiClient(Client):
         folderSplit=1000,
         dataset: Dataset = None,
         recursive=False,
+        concurrency: int = 8,
+        chunked: bool = False,
+        resume: bool = False,
         **kwargs,
-    ):
-        """Uploads a folder of files to DataTorch Storage, creating a new folder in storage for every 1000 files"""
-        folderIndex = 0
-        useFolderIndexes = False
-        file_list = glob.glob(uploadingFromGlob, recursive=recursive)
-        if file_list.__len__() > 1000:
-            useFolderIndexes = True
-
-        uploadFolderName = (
-            storageFolderName
-            if not useFolderIndexes
-            else storageFolderName + "_" + str(folderIndex)
+    ) -> TransferReport:
+        """Uploads a folder of files to DataTorch Storage, creating a new folder in storage for every 1000 files
+
+        With `resume`, files uploaded to the same destination are recorded in
+        a local manifest, and skipped by later runs that also `resume`.
+        """
+        # Sorted so files land in the same sharded folders on every run
+        file_list = sorted(
+            path
+            for path in glob.glob(uploadingFromGlob, recursive=recursive)
+            if os.path.isfile(path)
         )
-        uploadCount = 0
-
-        for file in file_list:
-            if uploadCount != 0 and uploadCount % folderSplit == 0:
-                folderIndex += 1
-                uploadFolderName = storageFolderName + "_" + str(folderIndex)
-            file = open(file, "rb")
-            self.upload_to_filesource(
-                project=project,
-                file=file,
-                storageId=storageId,
-                storageFolderName=uploadFolderName,
-                dataset=dataset,
+        if storageId is None:
+            storageId = project.storage_link_default().id
+
+        manifest = None
+        if resume:
+            manifest = FolderManifest.for_upload(
+                glob_root(uploadingFromGlob),
+                self.api_url,
+                os.path.abspath(uploadingFromGlob),
+                storageId,
+                storageFolderName,
+                None if dataset is None else dataset.id,
             )
-            uploadCount += 1
+
+        report = self.upload_many(
+            project,
+            file_list,
+            storageId=storageId,
+            storageFolderName=storageFolderName,
+            dataset=dataset,
+            folderSplit=folderSplit,
+            concurrency=concurrency,
+            chunked=chunked,
+            manifest=manifest,
+        )
+        folders = set(result.folder for result in report.results if result.success)
 
         print(
-            str(uploadCount)
+            str(len(report.succeeded) + len(report.skipped))
             + " files uploaded, into "
-            + str(folderIndex + 1)
+            + str(len(folders))
             + " created folders"
         )
+        print(report.summary())
+        return report
 
     # def files(self, where: Where = None, limit: int = 400) -> List[File]:
     #     return []
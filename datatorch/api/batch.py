@@ -0,0 +1,268 @@
+import json
+import logging
+import threading
+
+from concurrent.futures import Future
+from typing import Dict, List, Set, Tuple, Union
+
+from gql.transport.exceptions import TransportQueryError
+from graphql import Visitor, print_ast, visit
+from graphql.language.ast import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    NameNode,
+    OperationDefinitionNode,
+    OperationType,
+    SelectionSetNode,
+    VariableNode,
+)
+
+from .client import parse_query
+
+__all__ = "Batch"
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_OPERATIONS = 50
+DEFAULT_MAX_BYTES = 256 * 1024
+
+
+class _RenameVariables(Visitor):
+    """Suffixes variables, and the names of the fragments in `fragments`"""
+
+    def __init__(self, suffix: str, fragments: Set[str] = frozenset()):
+        super().__init__()
+        self.suffix = suffix
+        self.fragments = fragments
+
+    def rename(self, name: NameNode) -> NameNode:
+        return NameNode(value=f"{name.value}{self.suffix}")
+
+    def enter_variable(self, node: VariableNode, *args):
+        return VariableNode(name=self.rename(node.name))
+
+    def enter_fragment_spread(self, node: FragmentSpreadNode, *args):
+        if node.name.value in self.fragments:
+            return FragmentSpreadNode(
+                name=self.rename(node.name), directives=node.directives
+            )
+
+    def enter_fragment_definition(self, node: FragmentDefinitionNode, *args):
+        if node.name.value in self.fragments:
+            return FragmentDefinitionNode(
+                name=self.rename(node.name),
+                type_condition=node.type_condition,
+                variable_definitions=node.variable_definitions,
+                directives=node.directives,
+                selection_set=node.selection_set,
+            )
+
+
+class _References(Visitor):
+    def __init__(self):
+        super().__init__()
+        self.variables = False
+        self.spreads: Set[str] = set()
+
+    def enter_variable(self, *args):
+        self.variables = True
+
+    def enter_fragment_spread(self, node: FragmentSpreadNode, *args):
+        self.spreads.add(node.name.value)
+
+
+def _variable_fragments(fragments: Dict[str, FragmentDefinitionNode]) -> Set[str]:
+    """Names of the fragments using variables, directly or through spreads"""
+    references = {name: _References() for name in fragments}
+    for name, fragment in fragments.items():
+        visit(fragment, references[name])
+    found = {name for name, refs in references.items() if refs.variables}
+    while True:
+        spreading = {
+            name
+            for name, refs in references.items()
+            if name not in found and refs.spreads & found
+        }
+        if not spreading:
+            return found
+        found |= spreading
+
+
+class _Operation(object):
+    """A queued operation rewritten to be merged with others"""
+
+    def __init__(self, index: int, document: DocumentNode, params: dict):
+        operations = [
+            d for d in document.definitions if isinstance(d, OperationDefinitionNode)
+        ]
+        if len(operations) != 1:
+            raise ValueError("Batched documents must contain a single operation.")
+        (operation,) = operations
+
+        self.future = Future()
+        self.type: OperationType = operation.operation
+        fragments = {
+            d.name.value: d
+            for d in document.definitions
+            if isinstance(d, FragmentDefinitionNode)
+        }
+
+        # Fragments using variables get the operation's suffix too, other
+        # fragments are shared by the operations of the batch
+        suffix = f"_{index}"
+        rename = _RenameVariables(suffix, _variable_fragments(fragments))
+        operation = visit(operation, rename)
+        self.fragments: Dict[str, FragmentDefinitionNode] = {}
+        for name, fragment in fragments.items():
+            if name in rename.fragments:
+                fragment = visit(fragment, rename)
+            self.fragments[fragment.name.value] = fragment
+        self.variable_definitions = operation.variable_definitions or ()
+        self.params = {f"{k}{suffix}": v for k, v in params.items() if v is not None}
+
+        # Root field response keys mapped to the aliases used in the batch
+        self.aliases: Dict[str, str] = {}
+        self.fields: List[FieldNode] = []
+        for field in operation.selection_set.selections:
+            if not isinstance(field, FieldNode):
+                raise ValueError("Batched operations can only select root fields.")
+            key = (field.alias or field.name).value
+            alias = f"b{index}_{key}"
+            self.aliases[key] = alias
+            self.fields.append(
+                FieldNode(
+                    alias=NameNode(value=alias),
+                    name=field.name,
+                    arguments=field.arguments,
+                    directives=field.directives,
+                    selection_set=field.selection_set,
+                )
+            )
+
+        self.size = len(print_ast(operation)) + len(json.dumps(self.params))
+
+    def resolve(self, data: dict, errors: List[dict]) -> None:
+        aliases = set(self.aliases.values())
+        own_errors = [e for e in errors if not e.get("path") or e["path"][0] in aliases]
+        if own_errors:
+            self.future.set_exception(
+                TransportQueryError(
+                    str(own_errors[0]), errors=own_errors, data=data or None
+                )
+            )
+            return
+        data = data or {}
+        self.future.set_result({k: data.get(a) for k, a in self.aliases.items()})
+
+
+class Batch(object):
+    """Merges queued GraphQL operations into a single request.
+
+    Every root field of a queued operation is aliased and its variables are
+    renamed, so many operations of the same type (queries or mutations) can
+    be sent as one document. The response is split back into a result for
+    each operation. The batch is sent when it reaches `max_operations`
+    operations or about `max_bytes` of query text and variables, on `flush`
+    and when the `with` block exits.
+
+    `execute` returns a `concurrent.futures.Future` that resolves to the data
+    the operation would have returned on its own, or raises its errors::
+
+        with client.batch() as batch:
+            results = [batch.execute(query, params=p) for p in params]
+        data = [r.result() for r in results]
+
+    Root level fragment spreads are not supported. Fragments using variables
+    are renamed for each operation, and other fragments with the same name
+    must be the same in every queued operation.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_operations: int = DEFAULT_MAX_OPERATIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.client = client
+        self.max_operations = max_operations
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._queue: List[_Operation] = []
+        self._index = 0
+        self._size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.flush()
+
+    def execute(self, query: Union[DocumentNode, str], params: dict = {}) -> Future:
+        """Queues an operation, returning the future of its result"""
+        document = parse_query(query) if isinstance(query, str) else query
+        with self._lock:
+            operation = _Operation(self._index, document, params)
+            self._index += 1
+            if self._queue and not self._compatible(operation):
+                self.flush()
+            self._queue.append(operation)
+            self._size += operation.size
+            if len(self._queue) >= self.max_operations or self._size >= self.max_bytes:
+                self.flush()
+        return operation.future
+
+    def _compatible(self, operation: _Operation) -> bool:
+        if operation.type != self._queue[0].type:
+            return False
+        for name, fragment in operation.fragments.items():
+            for queued in self._queue:
+                other = queued.fragments.get(name)
+                if other is not None and other is not fragment:
+                    if print_ast(other) != print_ast(fragment):
+                        return False
+        return True
+
+    def flush(self) -> List[Future]:
+        """Sends the queued operations, returning their futures"""
+        with self._lock:
+            queue, self._queue, self._size = self._queue, [], 0
+            if not queue:
+                return []
+            document, params = self._merge(queue)
+            try:
+                data, errors = self.client.execute(document, params=params), []
+            except TransportQueryError as e:
+                data, errors = e.data, e.errors or [{"message": str(e)}]
+            except Exception as e:
+                for operation in queue:
+                    operation.future.set_exception(e)
+                return [operation.future for operation in queue]
+
+            for operation in queue:
+                operation.resolve(data, errors)
+            logger.debug(f"Sent {len(queue)} batched operations.")
+            return [operation.future for operation in queue]
+
+    @staticmethod
+    def _merge(queue: List[_Operation]) -> Tuple[DocumentNode, dict]:
+        fragments: Dict[str, FragmentDefinitionNode] = {}
+        variables, selections, params = [], [], {}
+        for operation in queue:
+            fragments.update(operation.fragments)
+            variables.extend(operation.variable_definitions)
+            selections.extend(operation.fields)
+            params.update(operation.params)
+
+        merged = OperationDefinitionNode(
+            operation=queue[0].type,
+            name=NameNode(value="Batch"),
+            variable_definitions=tuple(variables),
+            directives=(),
+            selection_set=SelectionSetNode(selections=tuple(selections)),
+        )
+        return DocumentNode(definitions=(merged, *fragments.values())), params
@@ -0,0 +1,256 @@
+import uuid
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Callable, List, Optional, Tuple
+
+from datatorch.utils import camel_to_snake
+
+from .client import Client
+from .context import submit
+from .entity.annotation import Annotation, create_annotations
+from .entity.base import BaseEntity
+from .entity.dataset import Dataset, _CREATE_DATASET
+from .entity.file import File
+from .entity.sources.source import Source, _CREATE_SOURCE, _UPDATE_SOURCE
+
+__all__ = "Bulk", "BulkError"
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_WORKERS = 4
+
+# Entities of each failed chunk with its exception
+Failures = List[Tuple[List[BaseEntity], Exception]]
+
+_IMPORT_FILES = """
+  mutation ImportFiles(
+    $linkId: ID!
+    $datasetId: ID
+    $files: [ImportFile!]!
+  ) {
+    files: importFiles(
+      linkId: $linkId
+      files: $files
+      datasetId: $datasetId
+    ) {
+      id
+      name
+      path
+      mimetype
+      linkId
+    }
+  }
+"""
+
+
+class BulkError(Exception):
+    """Raised by `Bulk.flush` when some chunks could not be sent.
+
+    `errors` holds the entities of each failed chunk and its exception. Those
+    entities are left unsaved, so the same `Bulk` can be flushed again.
+    """
+
+    def __init__(self, errors: Failures):
+        count = sum(len(entities) for entities, _ in errors)
+        super().__init__(f"Failed to save {count} entities: {errors[0][1]}")
+        self.errors = errors
+
+
+class Bulk(object):
+    """Unit of work saving many entities with a few bulk mutations.
+
+    Added entities are saved on `flush`, or when the `with` block exits.
+    Datasets are created first, then files with `importFiles`, annotations
+    together with their sources with `createAnnotations`, and finally
+    sources of existing annotations, each as chunks of `chunk_size`
+    entities sent `workers` at a time. Annotations and sources get client
+    generated IDs, and IDs of files and datasets are written back from the
+    responses, so saved entities can be used as if created one by one.
+
+    Annotations of an added file are added too, and are created once the file
+    has an ID. Sources that already have an ID are updated instead. The API
+    has no mutations to update annotations, files or datasets, so only new
+    ones can be added, and none to delete entities, so `delete` raises.
+
+        with Bulk(api) as bulk:
+            for prediction in predictions:
+                bulk.add(Annotation(...))
+    """
+
+    __slot__ = ("client", "chunk_size", "workers", "entities")
+
+    entities: List[BaseEntity]
+
+    def __init__(
+        self,
+        client: Client = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: int = DEFAULT_WORKERS,
+    ):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.entities = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.flush()
+
+    def __len__(self):
+        return len(self.entities)
+
+    def add(self, entity: BaseEntity):
+        if isinstance(entity, (Annotation, File, Dataset)) and entity.id is not None:
+            raise ValueError(f"{type(entity).__name__} {entity.id} already exists.")
+        if not isinstance(entity, (Annotation, File, Dataset, Source)):
+            raise TypeError(f"{type(entity).__name__} can not be saved in bulk.")
+        self.entities.append(entity)
+        if isinstance(entity, File):
+            self.entities.extend(entity.annotations)
+        return self
+
+    def save(self):
+        """Saves the added entities, see `flush`"""
+        self.flush()
+
+    def create(self):
+        """Saves the added entities, see `flush`"""
+        self.flush()
+
+    def delete(self):
+        """Not supported, the API has no mutations to delete entities.
+
+        Raises:
+            NotImplementedError: always.
+        """
+        raise NotImplementedError("Entities can not be deleted in bulk.")
+
+    def flush(self) -> None:
+        """Sends the added entities, raising `BulkError` if some failed"""
+        entities, self.entities = self.entities, []
+        errors = []
+
+        datasets = [e for e in entities if isinstance(e, Dataset)]
+        errors += self._submit(datasets, self._create_datasets)
+
+        files = [e for e in entities if isinstance(e, File)]
+        errors += self._submit(files, self._import_files, key=_file_group)
+        for file in files:
+            for anno in file.annotations:
+                anno.file_id = file.id
+
+        annotations = [e for e in entities if isinstance(e, Annotation)]
+        errors += self._submit(
+            [a for a in annotations if a.file_id is not None], self._create_annotations
+        )
+        orphans = [a for a in annotations if a.file_id is None]
+        if orphans:
+            errors.append((orphans, ValueError("Annotation must have a file ID")))
+
+        sources = [e for e in entities if isinstance(e, Source)]
+        errors += self._submit(sources, self._save_sources)
+
+        if errors:
+            # Failed entities are kept so flushing again retries them
+            self.entities = [e for chunk, _ in errors for e in chunk]
+            raise BulkError(errors)
+
+    def _client(self, entity: BaseEntity) -> Client:
+        return self.client or entity.client
+
+    def _submit(
+        self,
+        entities: List[BaseEntity],
+        send: Callable[[List[BaseEntity]], Optional[Failures]],
+        key: Callable[[BaseEntity], tuple] = None,
+    ) -> Failures:
+        """Sends chunks of `entities` concurrently, returning what failed.
+
+        `send` raises if its whole chunk failed, or returns the entities
+        that failed with their exceptions.
+        """
+        if not entities:
+            return []
+        if key is None:
+            groups = [entities]
+        else:
+            groups = [list(g) for _, g in groupby(sorted(entities, key=key), key)]
+        chunks = [
+            group[i : i + self.chunk_size]
+            for group in groups
+            for i in range(0, len(group), self.chunk_size)
+        ]
+
+        def run(chunk):
+            try:
+                return send(chunk) or []
+            except Exception as e:
+                logger.debug(f"Failed to save {len(chunk)} entities: {e}")
+                return [(chunk, e)]
+
+        with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+            futures = [submit(executor, run, chunk) for chunk in chunks]
+            return [error for future in futures for error in future.result()]
+
+    def _create_datasets(self, datasets: List[Dataset]) -> Failures:
+        with self._client(datasets[0]).batch(max_operations=len(datasets)) as batch:
+            results = [
+                batch.execute(_CREATE_DATASET, params=d._create_params())
+                for d in datasets
+            ]
+        failed = []
+        for dataset, result in zip(datasets, results):
+            if result.exception() is not None:
+                failed.append(([dataset], result.exception()))
+                continue
+            dataset.client = self._client(dataset)
+            dataset._created(result.result())
+        return failed
+
+    def _import_files(self, files: List[File]) -> None:
+        params = {
+            "linkId": files[0].link_id,
+            "datasetId": files[0].dataset_id,
+            "files": [f._create_params()["importFile"] for f in files],
+        }
+        results = self._client(files[0]).execute(_IMPORT_FILES, params=params)
+        for file, r_file in zip(files, results.get("files")):
+            file.__dict__.update(camel_to_snake(r_file))
+
+    def _create_annotations(self, annotations: List[Annotation]) -> None:
+        create_annotations(annotations, self._client(annotations[0]))
+
+    def _save_sources(self, sources: List[Source]) -> Failures:
+        creates = [s.id is None for s in sources]
+        for source, create in zip(sources, creates):
+            if create:
+                source.id = str(uuid.uuid4())
+        with self._client(sources[0]).batch(max_operations=len(sources)) as batch:
+            results = [
+                (
+                    batch.execute(_CREATE_SOURCE, params=s._create_params())
+                    if create
+                    else batch.execute(_UPDATE_SOURCE, params=s._input())
+                )
+                for s, create in zip(sources, creates)
+            ]
+        failed = []
+        for source, create, result in zip(sources, creates, results):
+            if result.exception() is not None:
+                failed.append(([source], result.exception()))
+                if create:
+                    source.id = None
+        return failed
+
+
+def _file_group(file: File) -> tuple:
+    # Files of one `importFiles` mutation share their storage link and dataset
+    return file.link_id or "", file.dataset_id or ""
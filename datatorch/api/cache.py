@@ -0,0 +1,77 @@
+import time
+import threading
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+__all__ = "TTLCache"
+
+
+# Project metadata such as labels and storage links rarely changes
+DEFAULT_TTL = 300
+
+
+class TTLCache(object):
+    """Thread safe cache whose entries expire `ttl` seconds after being stored.
+
+    Keys are tuples starting with the kind of value, for example
+    `("labels", project_id)`, so `invalidate("labels")` drops the labels of
+    every project and `invalidate("labels", project_id)` of a single one.
+    Concurrent misses of the same key load the value only once. A `ttl` of
+    0 disables caching.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._loading = {}
+
+    def get(self, key: Tuple[Hashable, ...], load: Callable[[], Any]) -> Any:
+        """Returns the cached value of `key`, calling `load` on a miss"""
+        if not self.ttl:
+            return load()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = threading.Lock()
+
+        with loading:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    return entry[1]
+            try:
+                value = load()
+                self.set(key, value)
+                return value
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+    def set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        if not self.ttl:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *prefix: Hashable) -> None:
+        """Drops every entry whose key starts with `prefix`, all if empty"""
+        with self._lock:
+            for key in [k for k in self._entries if k[: len(prefix)] == prefix]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,18 +1,41 @@
-from typing import List, Union, cast, IO
-import requests, glob, os  # , cgi
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Union, cast, IO
+import requests, glob, json, os, time, logging, threading, weakref
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlencode
 
 from gql import Client as GqlClient, gql
 from gql.transport.transport import Transport
-from gql.transport.websockets import WebsocketsTransport
 from gql.transport.requests import RequestsHTTPTransport
-from graphql.language.ast import DocumentNode
+from graphql.error import GraphQLError
+from graphql.language.ast import DocumentNode, OperationDefinitionNode
 
 from datatorch.utils import normalize_api_url
-from datatorch.core import user_settings
+from datatorch.core import user_settings, env
+from . import tracing
+from .cache import DEFAULT_TTL, TTLCache
+from .retry import RetryPolicy
+from .schema import SchemaCache
+from .session import (
+    COMPRESS_MIN_SIZE,
+    PoolConfig,
+    PoolStats,
+    PooledSession,
+    SessionHTTPTransport,
+)
+from .transfer import TransferReport, TransferResult
+from .download import (
+    PART_SUFFIX,
+    DownloadError,
+    filename_from_response,
+    matches_remote,
+    remote_size,
+    write_stream,
+)
 from typing import Any, TypeVar, Type
 
-from email.parser import HeaderParser
+if TYPE_CHECKING:
+    from gql.transport.websockets import WebsocketsTransport
 
 T = TypeVar("T")
 
@@ -20,14 +43,72 @@ T = TypeVar("T")
 __all__ = "Client"
 
 
+logger = logging.getLogger(__name__)
+
+
 AGENT_TOKEN_HEADER = "datatorch-agent-token"
 API_KEY_HEADER = "datatorch-api-key"
 
 
+# Number of distinct query strings and files kept parsed
+QUERY_CACHE_SIZE = 512
+
+
 def _get_token_header(agent: bool = False):
     return AGENT_TOKEN_HEADER if agent else API_KEY_HEADER
 
 
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def parse_query(query: str) -> DocumentNode:
+    """Parses a GraphQL query, reusing the document for repeated strings"""
+    return gql(query)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _read_query(path: str, modified: int) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def read_query_file(path: str) -> str:
+    """Contents of a GraphQL file, read again only when the file changes"""
+    return _read_query(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+def operation_name(document: DocumentNode) -> str:
+    """Name of a document's operation, or of its first field if unnamed"""
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            if definition.name is not None:
+                return definition.name.value
+            for field in definition.selection_set.selections:
+                return getattr(field, "name").value
+    return "graphql"
+
+
+def _trace_variables(span: Optional[tracing.Span], variables: dict) -> None:
+    if span is not None:
+        span.variables_bytes = len(json.dumps(variables, default=str))
+
+
+class _GqlClient(GqlClient):
+    """GraphQL client that validates each parsed document once per schema"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._validated = weakref.WeakSet()
+
+    def set_schema(self, schema):
+        self.schema = schema
+        self._validated = weakref.WeakSet()
+
+    def validate(self, document: DocumentNode):
+        if document in self._validated:
+            return
+        super().validate(document)
+        self._validated.add(document)
+
+
 class Client(object):
     """Wrapper for the DataTorch API including GraphQL and uploading"""
 
@@ -36,20 +117,38 @@ class Client(object):
         cls, url: str, api_token: str = None, agent: bool = False
     ):
         return cast(
-            WebsocketsTransport,
+            "WebsocketsTransport",
             cls.create_transport(url, api_token=api_token, agent=agent, sockets=True),
         )
 
     @staticmethod
     def create_transport(
-        url: str, api_token: str = None, agent: bool = False, sockets: bool = False
+        url: str,
+        api_token: str = None,
+        agent: bool = False,
+        sockets: bool = False,
+        session: requests.Session = None,
+        persisted_queries: bool = False,
+        compress: int = None,
     ):
         graphql_url = f"{normalize_api_url(url)}/graphql"
         header_key = _get_token_header(agent)
         headers = {header_key: api_token} if api_token else {}
         if sockets:
+            # Only the agent uses websockets, avoid loading them otherwise
+            from gql.transport.websockets import WebsocketsTransport
+
             graphql_url = graphql_url.replace("http", "ws", 1)
             return WebsocketsTransport(headers=headers, url=graphql_url)
+        if session is not None:
+            return SessionHTTPTransport(
+                session,
+                persisted_queries=persisted_queries,
+                compress=compress,
+                headers=headers,
+                use_json=True,
+                url=graphql_url,
+            )
         return RequestsHTTPTransport(headers=headers, use_json=True, url=graphql_url)
 
     def __init__(
@@ -58,6 +157,13 @@ class Client(object):
         api_url: str = None,
         sockets: bool = False,
         agent: bool = False,
+        pool: PoolConfig = None,
+        schema: bool = None,
+        persisted_queries: bool = False,
+        retry: RetryPolicy = None,
+        cache_ttl: float = DEFAULT_TTL,
+        compress: bool = None,
+        compress_min_size: int = COMPRESS_MIN_SIZE,
     ):
         self._use_sockets = sockets
         self._is_agent = agent
@@ -73,11 +179,35 @@ class Client(object):
 
         self._graphql_url = f"{self.api_url}/graphql"
 
+        # Connection pool shared by the GraphQL transport and file endpoints
+        self.session = PooledSession(pool, retry)
+        # Slow changing metadata such as labels and storage links
+        self.cache = TTLCache(cache_ttl)
+        # Large GraphQL bodies, such as polygons of many annotations, are
+        # gzipped when enabled here or with the DATATORCH_COMPRESS environment
+        # variable. The server must accept `Content-Encoding: gzip` requests.
+        if compress is None:
+            compress = bool(os.getenv(env.COMPRESS))
+        self._compress = compress_min_size if compress else None
         self.transport = self.create_transport(
-            self._api_url, sockets=sockets, agent=agent
+            self._api_url,
+            sockets=sockets,
+            agent=agent,
+            session=self.session,
+            persisted_queries=persisted_queries,
+            compress=self._compress,
         )
-        self.client = GqlClient(
-            transport=self.transport, fetch_schema_from_transport=True
+        # The schema is only used to validate queries locally. It is loaded
+        # from the disk cache on the first execution, or skipped entirely
+        # with `schema=False` or the DATATORCH_NO_SCHEMA environment variable.
+        if schema is None:
+            schema = not os.getenv(env.NO_SCHEMA)
+        self._schema_cache = SchemaCache(self._api_url) if schema else None
+        self._schema_lock = threading.Lock()
+        self._stream_transport: Optional[SessionHTTPTransport] = None
+        self.client = _GqlClient(
+            transport=self.transport,
+            fetch_schema_from_transport=sockets and schema,
         )
         self.set_api_token(api_key or user_settings.api_key)
 
@@ -88,8 +218,26 @@ class Client(object):
     def set_api_token(self, api_key: str):
         headers = self.transport.headers
         self._api_token = api_key
+        self.cache.clear()
         if isinstance(headers, dict):
             headers[self.token_header] = api_key
+        if self._stream_transport is not None:
+            self._stream_transport.headers[self.token_header] = api_key
+
+    @property
+    def pool_stats(self) -> PoolStats:
+        """Connection reuse counters of the client's connection pool"""
+        return self.session.stats
+
+    def close(self):
+        """Closes all pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     @property
     def api_url(self) -> str:
@@ -103,31 +251,121 @@ class Client(object):
         self, paths: List[str], *args, params: dict = {}, **kwargs
     ) -> dict:
         """Combine and excute query of multiple GraphQL files"""
-        query = ""
-        for path in paths:
-            with open(path) as f:
-                query += f.read()
+        query = "".join(read_query_file(path) for path in paths)
         return self.execute(query, *args, params=params, **kwargs)
 
     def execute_file(self, path: str, *args, params: dict = {}, **kwargs) -> dict:
         """Excute query from GraphQL file"""
-        with open(path) as f:
-            return self.execute(f.read(), *args, params=params, **kwargs)
+        return self.execute(read_query_file(path), *args, params=params, **kwargs)
 
     def execute(
         self, query: Union[DocumentNode, str], *args, params: dict = {}, **kwargs
     ) -> dict:
         """Wrapper around execute"""
         removed_none = dict((k, v) for k, v in params.items() if v is not None)
-        query_doc = gql(query) if isinstance(query, str) else query
-        return self.client.execute(
-            query_doc, *args, variable_values=removed_none, **kwargs
+        query_doc = parse_query(query) if isinstance(query, str) else query
+        self.load_schema()
+        name = operation_name(query_doc) if tracing.active() else ""
+        with tracing.span(name, "graphql") as span:
+            _trace_variables(span, removed_none)
+            return self._with_fresh_schema(
+                lambda: self.client.execute(
+                    query_doc, *args, variable_values=removed_none, **kwargs
+                )
+            )
+
+    def _with_fresh_schema(self, call: Callable[[], T]) -> T:
+        """Calls `call`, again with a refetched schema if it fails validation"""
+        try:
+            return call()
+        except GraphQLError:
+            # A cached schema can be older than the API, refetch it once
+            # before reporting the query as invalid.
+            if self._schema_cache is None or self._schema_cache.validated:
+                raise
+            self.load_schema(refresh=True)
+            return call()
+
+    def stream_query(
+        self, query: Union[DocumentNode, str], path: str, params: dict = {}
+    ) -> Iterator[Any]:
+        """Executes a query, yielding the items of the list at `path` as they arrive.
+
+        The response is decoded incrementally, so memory use depends on the
+        size of the largest item instead of the whole response. The query is
+        validated and sent like `execute` does, and GraphQL errors are raised
+        as `TransportQueryError` after the items.
+        """
+        query_doc = parse_query(query) if isinstance(query, str) else query
+        self.load_schema()
+        if self.client.schema is not None:
+            self._with_fresh_schema(lambda: self.client.validate(query_doc))
+        variables = dict((k, v) for k, v in params.items() if v is not None)
+        name = operation_name(query_doc) if tracing.active() else ""
+        # Only current while reading, not while the caller handles the items
+        with tracing.span(name, "graphql", current=False) as span:
+            _trace_variables(span, variables)
+            items = self._http_transport().execute_stream(
+                query_doc, path.split("."), variables
+            )
+            yield from tracing.iterate(span, items)
+
+    def _http_transport(self) -> SessionHTTPTransport:
+        """Transport of streamed queries, also for websocket clients"""
+        if isinstance(self.transport, SessionHTTPTransport):
+            return self.transport
+        if self._stream_transport is None:
+            self._stream_transport = self.create_transport(
+                self._api_url,
+                api_token=self._api_token,
+                agent=self._is_agent,
+                session=self.session,
+                compress=self._compress,
+            )
+        return self._stream_transport
+
+    def load_schema(self, refresh: bool = False):
+        """Loads the schema used for validation from the disk cache"""
+        if self._schema_cache is None or self._use_sockets:
+            return
+        if self.client.schema is not None and not refresh:
+            return
+        with self._schema_lock:
+            if self.client.schema is not None and not refresh:
+                return
+            self.transport.connect()
+            self.client.set_schema(self._schema_cache.load(self.transport, refresh))
+
+    def batch(self, max_operations: int = None, max_bytes: int = None):
+        """Merges operations into single requests, see `Batch`.
+
+        Limits default to those of `Batch` when None.
+        """
+        from .batch import DEFAULT_MAX_BYTES, DEFAULT_MAX_OPERATIONS, Batch
+
+        return Batch(
+            self,
+            max_operations=max_operations or DEFAULT_MAX_OPERATIONS,
+            max_bytes=max_bytes or DEFAULT_MAX_BYTES,
         )
 
     def query_to_class(
-        self, Entity: Type[T], query: str, path: str = "", params: dict = {}
+        self,
+        Entity: Type[T],
+        query: str,
+        path: str = "",
+        params: dict = {},
+        cache: tuple = None,
     ) -> Union[T, List[T]]:
-        results = self.execute(query, params=params)
+        """Executes a query and creates entities from the results at `path`.
+
+        With a `cache` key the results are stored in the client's `cache` and
+        reused until they expire or are invalidated.
+        """
+        if cache is None:
+            results = self.execute(query, params=params)
+        else:
+            results = self.cache.get(cache, lambda: self.execute(query, params=params))
         return self.to_class(Entity, results, path=path)
 
     def to_class(self, Entity, results: Union[dict, list, None], path: str = ""):
@@ -148,54 +386,136 @@ class Client(object):
         name: str = "",
         directory: str = "./",
         skip: bool = True,
-        # For now, skip does nothing
     ):
-        # If it exists and skip is true, do not download
-        # name = os.path.join(directory, name)
-        # name = os.path.abspath(name)
-        # This name overwrites the value into name
-        # Causes a problem on line 175 if name is expected to be empty
-        # On first run of download file name is supposed to ''
-        # Loaded as default value from action-datatorch.yaml
-        # But on subsequent runs if file exists, name is not empty
-        # Temporary fix here
-        dl_file = os.path.join(directory, name)
-        dl_file = os.path.abspath(dl_file)
-
-        if os.path.isfile(dl_file) & skip == True:
-            return dl_file, None
+        """Downloads a file by ID into `directory`.
+
+        The body is written to a `.part` file first. If a previous download
+        was interrupted the `.part` file is resumed with an HTTP Range request.
+        With `skip`, an existing file is kept only when its size, and MD5 if
+        the server provides one, match the server's copy.
 
+        Returns:
+            (path, response) tuple, the response is None if skipped.
+        """
+        with tracing.span("download", "download"):
+            return self._download_file(id, name, directory, skip)
+
+    def _download_file(self, id: str, name: str, directory: str, skip: bool):
         query_string = urlencode({"download": "true", "stream": "true"})
         url = normalize_api_url(self.api_url)
         download_url = f"{url}/file/v1/{id}/{name}?{query_string}"
-
-        result = requests.get(
-            download_url, headers={self.token_header: self._api_token}, stream=True
-        )
-
-        content = result.headers["content-disposition"]
-        # _, value = cgi.parse_header(content)
-        parser = HeaderParser()
-        headers = parser.parsestr(f"Content-Disposition: {content}")
-        filename_param = headers.get_param("filename")
-        # Ensure filename is a string
-        if isinstance(filename_param, tuple):
-            filename = (
-                filename_param[0] or ""
-            )  # Use the first element of the tuple if present
-        elif isinstance(filename_param, str):
-            filename = filename_param
-        else:
-            filename = ""  # Default to an empty string if None or unexpected type
-
-        name = name or filename
-        name = os.path.join(directory, name)
-        name = os.path.abspath(name)
-
-        os.makedirs(os.path.dirname(name), exist_ok=True)
-
-        with open(name, "wb") as f:
-            for chunk in result.iter_content(1024):
-                f.write(chunk)
-
-        return name, result
+        headers = {self.token_header: self._api_token}
+
+        # The name is either provided or set by the server on download
+        path = os.path.abspath(os.path.join(directory, name)) if name else None
+
+        if path and skip and os.path.isfile(path):
+            head = self.session.head(download_url, headers=headers)
+            if head.ok and matches_remote(path, head.headers):
+                return path, None
+
+        offset = _part_size(path) if path else 0
+        result = self._get_range(download_url, headers, offset)
+
+        if path is None:
+            name = filename_from_response(result) or id
+            path = os.path.abspath(os.path.join(directory, name))
+            if skip and os.path.isfile(path) and matches_remote(path, result.headers):
+                result.close()
+                return path, None
+            offset = _part_size(path)
+            if offset and result.headers.get("accept-ranges") == "bytes":
+                result.close()
+                result = self._get_range(download_url, headers, offset)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part_path = path + PART_SUFFIX
+        # Servers that ignore the range send the whole file again
+        mode = "ab" if result.status_code == 206 else "wb"
+        with open(part_path, mode) as f:
+            written = write_stream(result, f)
+        span = tracing.current_span()
+        if span is not None:
+            span.add_response_bytes(written)
+
+        size = remote_size(result.headers)
+        if size is not None and os.path.getsize(part_path) != size:
+            raise DownloadError(
+                f"Download of {id} ended early, run again to resume: {part_path}"
+            )
+        os.replace(part_path, path)
+
+        return path, result
+
+    def _get_range(self, url: str, headers: dict, offset: int) -> requests.Response:
+        if offset:
+            headers = {**headers, "Range": f"bytes={offset}-"}
+        result = self.session.get(url, headers=headers, stream=True)
+        if result.status_code == 416:
+            # The partial file is not a prefix of the remote one, start over
+            result.close()
+            headers = {k: v for k, v in headers.items() if k != "Range"}
+            result = self.session.get(url, headers=headers, stream=True)
+        result.raise_for_status()
+        return result
+
+    def download_many(
+        self,
+        ids: List[str],
+        directory: str = "./",
+        names: List[str] = None,
+        concurrency: int = 8,
+        skip: bool = True,
+        callback: Callable[[TransferResult], None] = None,
+    ) -> TransferReport:
+        """Downloads many files concurrently using a bounded pool of threads.
+
+        Args:
+            ids (list): IDs of the files to download.
+            names (list): optional paths relative to `directory` for each ID,
+                defaults to the file names given by the server.
+            concurrency (int): number of files downloaded at the same time.
+            skip (bool): see `download_file`.
+            callback (callable): called with the `TransferResult` of each file
+                as it completes.
+        """
+        names = names or [""] * len(ids)
+
+        def download(id: str, name: str) -> TransferResult:
+            start = time.monotonic()
+            try:
+                path, result = self.download_file(
+                    id, name=name, directory=directory, skip=skip
+                )
+                return TransferResult(
+                    path,
+                    True,
+                    os.path.getsize(path),
+                    time.monotonic() - start,
+                    skipped=result is None,
+                )
+            except Exception as e:
+                logger.warning("Failed to download {}: {}".format(name or id, e))
+                return TransferResult(
+                    name or id, False, 0, time.monotonic() - start, error=e
+                )
+
+        report = TransferReport()
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [
+                executor.submit(download, id, name) for id, name in zip(ids, names)
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                report.add(result)
+                if callback:
+                    callback(result)
+
+        return report.finish()
+
+
+def _part_size(path: str) -> int:
+    try:
+        return os.path.getsize(path + PART_SUFFIX)
+    except OSError:
+        return 0
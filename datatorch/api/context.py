@@ -0,0 +1,62 @@
+import threading
+
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from .api import ApiClient
+
+__all__ = "default_client", "using_client"
+
+
+_current: ContextVar[Optional["ApiClient"]] = ContextVar("client", default=None)
+_default: Optional["ApiClient"] = None
+_lock = threading.Lock()
+
+
+def default_client() -> "ApiClient":
+    """Client used by entities and helpers that are not given one.
+
+    Inside a `using_client` block this is the client of the block, otherwise
+    a process wide `ApiClient` created from the user settings on first use.
+    """
+    client = _current.get()
+    if client is not None:
+        return client
+
+    global _default
+    if _default is None:
+        with _lock:
+            if _default is None:
+                from .api import ApiClient
+
+                _default = ApiClient()
+    return _default
+
+
+@contextmanager
+def using_client(client: "ApiClient") -> Iterator["ApiClient"]:
+    """Makes `client` the default client within the block.
+
+    The override is local to the current thread or asyncio task.
+
+        with using_client(ApiClient(api_key=key)):
+            bbox.create_bbox_from_points(top_left, bottom_right, ...)
+    """
+    token = _current.set(client)
+    try:
+        yield client
+    finally:
+        _current.reset(token)
+
+
+def submit(executor: Executor, fn: Callable, *args) -> Future:
+    """Submits `fn` to `executor` in a copy of the caller's context.
+
+    Threads of an executor do not inherit context variables, so without it
+    entities used by `fn` would ignore the `using_client` block it was
+    submitted from.
+    """
+    return executor.submit(copy_context().run, fn, *args)
@@ -0,0 +1,94 @@
+import os
+import time
+import base64
+import hashlib
+
+from typing import IO, Mapping, Optional
+from email.parser import HeaderParser
+
+import requests
+
+__all__ = "DownloadError", "filename_from_response", "matches_remote", "write_stream"
+
+
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+# A chunk read faster than this grows the next chunk
+FAST_READ_SECONDS = 0.05
+
+PART_SUFFIX = ".part"
+
+
+class DownloadError(Exception):
+    pass
+
+
+def filename_from_response(result: requests.Response) -> str:
+    """Filename from the response's content disposition, empty if missing"""
+    content = result.headers.get("content-disposition")
+    if not content:
+        return ""
+    parser = HeaderParser()
+    headers = parser.parsestr(f"Content-Disposition: {content}")
+    filename_param = headers.get_param("filename", header="content-disposition")
+    # Ensure filename is a string
+    if isinstance(filename_param, tuple):
+        return filename_param[0] or ""  # Use the first element of the tuple if present
+    if isinstance(filename_param, str):
+        return filename_param
+    return ""  # Default to an empty string if None or unexpected type
+
+
+def _md5(path: str) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(MAX_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode("ascii")
+
+
+def remote_size(headers: Mapping[str, str]) -> Optional[int]:
+    """Full size of the remote file from a 200 or 206 response's headers"""
+    content_range = headers.get("content-range")
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = headers.get("content-length")
+    return int(length) if length and length.isdigit() else None
+
+
+def matches_remote(path: str, headers: Mapping[str, str]) -> bool:
+    """True if the local file has the size and checksum the server reports.
+
+    Compares the size with `Content-Length` and, when the server sends one,
+    the MD5 with `Content-MD5`. Without either header there is nothing to
+    compare against and an existing file is considered up to date.
+    """
+    size = remote_size(headers)
+    if size is not None and os.path.getsize(path) != size:
+        return False
+    checksum = headers.get("content-md5")
+    if checksum and _md5(path) != checksum:
+        return False
+    return True
+
+
+def write_stream(result: requests.Response, file: IO) -> int:
+    """Writes a streamed response body to `file`, returning the bytes written.
+
+    The read size starts small and doubles whenever a full chunk arrives
+    quickly, so fast connections move to large reads while slow ones keep
+    a small amount of data in memory.
+    """
+    chunk_size = MIN_CHUNK_SIZE
+    written = 0
+    while True:
+        start = time.monotonic()
+        chunk = result.raw.read(chunk_size, decode_content=True)
+        if not chunk:
+            return written
+        file.write(chunk)
+        written += len(chunk)
+        fast = time.monotonic() - start < FAST_READ_SECONDS
+        if len(chunk) >= chunk_size and fast:
+            chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
@@ -1,6 +1,7 @@
+import uuid
+
 from typing import List
 
-from datatorch.utils import camel_to_snake
 from ..utils import map_entities
 from .base import BaseEntity
 from .label import Label
@@ -9,25 +10,9 @@ from .sources.source import Source
 __all__ = "Annotation"
 
 
-_CREATE_ANNOTATION = """
-  mutation AddAnnotation(
-    $id: ID
-    $fileId: ID!
-    $name: String
-    $labelId: ID!
-    $color: String
-  ) {
-    annotation: createAnnotation(
-      id: $id
-      fileId: $fileId
-      name: $name
-      labelId: $labelId
-      color: $color
-    ) {
-      id
-      fileId
-      color
-    }
+_CREATE_ANNOTATIONS = """
+  mutation CreateAnnotations($annotations: [CreateAnnotationInput!]!) {
+    createAnnotations(annotations: $annotations)
   }
 """
 
@@ -48,7 +33,7 @@ class Annotation(BaseEntity):
 
     def _update(self, obj: dict):
         self.sources = map_entities(
-            obj.get("sources_json", []), Source, client=self.client
+            obj.get("sources_json", []), Source, client=self._given_client()
         )
         obj.pop("sources_json", None)
         super()._update(obj)
@@ -58,28 +43,68 @@ class Annotation(BaseEntity):
 
         if self.id:
             source.annotation_id = self.id
-            source.save(client=self.client)
+            source.create(client=self.client)
 
     def label(self, label: Label) -> None:
         self.label_id = label.id
 
     def create(self, client=None):
+        """Creates the annotation together with its sources"""
         super().create(client=client)
+        create_annotations([self], self.client)
 
-        assert self.label_id is not None, "Annotation must have a file ID"
-        assert self.file_id is not None, "Annotation must have label ID"
+    def _create_params(self) -> dict:
+        return {"annotations": [self._input()]}
 
-        params = {
+    def _input(self) -> dict:
+        """`CreateAnnotationInput` creating the annotation and its sources"""
+        assert self.label_id is not None, "Annotation must have a label ID"
+        assert self.file_id is not None, "Annotation must have a file ID"
+        anno = {
             "id": self.id,
             "fileId": self.file_id,
-            "name": self.name,
             "labelId": self.label_id,
-            "color": self.color,
+            "sources": [source._input() for source in self.sources],
         }
-        results = self.client.execute(_CREATE_ANNOTATION, params=params)
-        r_anno = results.get("annotation")
-        self.__dict__.update(camel_to_snake(r_anno))
+        if self.name is not None:
+            anno["name"] = self.name
+        if self.color is not None:
+            anno["color"] = self.color
+        return anno
 
+    def _created(self, results: dict = None) -> None:
         for source in self.sources:
             source.annotation_id = self.id
-            source.create(client=self.client)
+
+
+def create_annotations(annotations: List[Annotation], client) -> None:
+    """Creates annotations with their sources in a single mutation.
+
+    `createAnnotations` does not return the created IDs, so annotations and
+    sources without one are given a UUID before being sent.
+    """
+    new_ids = _assign_ids(annotations)
+    try:
+        params = {"annotations": [anno._input() for anno in annotations]}
+        client.execute(_CREATE_ANNOTATIONS, params=params)
+    except Exception:
+        _clear_ids(new_ids)
+        raise
+    for anno in annotations:
+        anno._created()
+
+
+def _assign_ids(annotations: List[Annotation]) -> List[BaseEntity]:
+    """Gives annotations and sources without an ID a new UUID"""
+    assigned = []
+    for anno in annotations:
+        for entity in [anno, *anno.sources]:
+            if entity.id is None:
+                entity.id = str(uuid.uuid4())
+                assigned.append(entity)
+    return assigned
+
+
+def _clear_ids(entities: List[BaseEntity]) -> None:
+    for entity in entities:
+        entity.id = None
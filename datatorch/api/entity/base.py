@@ -1,8 +1,11 @@
 import json
 import functools
 
+from typing import Optional
+
 from requests.exceptions import MissingSchema
 from ..client import Client
+from ..context import default_client
 
 from datatorch.utils.objects import get_annotations, is_class_of
 from datatorch.utils.string_style import camel_to_snake, snake_to_camel
@@ -46,30 +49,49 @@ class BaseEntity(object):
         return fragment
 
     def __init__(self, obj: dict = {}, client: Client = None, **kwargs) -> None:
-        # Init all values to None
-        keys = get_annotations(self.__class__).keys()
-        for key in keys:
-            if key not in self.__dict__:
-                self[key] = None
+        # Init all values to None. Assigning the same attributes in the same
+        # order lets instances of a class share their attribute names
+        for key in _fields(type(self)):
+            setattr(self, key, None)
 
+        # Otherwise the default client is used, see `__getattr__`
+        if client is not None:
+            self.client = client
+        # Assign values
+        values = camel_to_snake(obj)
+        if kwargs:
+            values.update(kwargs)
+        self._update(values)
+
+    def __getattr__(self, name: str):
+        if name != "client":
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
         try:
-            self.client: Client = client or Client()
+            self.client = default_client()
         except MissingSchema:
             self.client = None
-        # Assign values
-        self._update({**camel_to_snake(obj), **kwargs})
+        return self.client
+
+    def _given_client(self) -> Optional[Client]:
+        """The client of the entity, without creating one"""
+        try:
+            return object.__getattribute__(self, "client")
+        except AttributeError:
+            return None
 
     def __setitem__(self, k, v):
-        self.__dict__.update({k: v})
+        setattr(self, k, v)
 
     def _update(self, obj: dict) -> None:
-        # self.__dict__.update(obj)
         for k, v in obj.items():
             setattr(self, k, v)
 
     def dict(self) -> dict:
-        dic = self.__dict__.copy()
-        dic.pop("client")
+        # Underscored attributes are local settings, not fields of the entity
+        dic = {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        dic.pop("client", None)
         return dic
 
     def to_json(self, indent: int = 2) -> str:
@@ -87,3 +109,9 @@ class BaseEntity(object):
         if client:
             self.client = client
         assert self.client is not None
+
+
+@functools.lru_cache(maxsize=None)
+def _fields(cls: type) -> tuple:
+    """Annotated fields of an entity class, initialized to None"""
+    return tuple(k for k in get_annotations(cls) if k != "client")
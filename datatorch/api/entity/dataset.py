@@ -35,14 +35,17 @@ class Dataset(BaseEntity):
     def create(self, client=None):
         super().create(client=client)
 
+        results = self.client.execute(_CREATE_DATASET, params=self._create_params())
+        self._created(results)
+
+    def _create_params(self) -> dict:
         assert self.project_id is not None
-        results = self.client.execute(
-            _CREATE_DATASET,
-            params={
-                "projectId": self.project_id,
-                "name": self.name,
-                "description": self.description,
-            },
-        )
+        return {
+            "projectId": self.project_id,
+            "name": self.name,
+            "description": self.description,
+        }
 
+    def _created(self, results: dict) -> None:
         self.id = results.get("dataset").get("id")
+        self.client.cache.invalidate("datasets", self.project_id)
@@ -1,12 +1,12 @@
-from typing import List
+from typing import List, Sequence
 
 import json
 
-from datatorch.utils import camel_to_snake
+from datatorch.utils import camel_to_snake, snake_to_camel
 
 from ..utils import map_entities
 from .base import BaseEntity
-from .annotation import Annotation
+from .annotation import Annotation, create_annotations
 
 __all__ = "File"
 
@@ -33,51 +33,74 @@ _CREATE_FILE = """
 
 
 class File(BaseEntity):
+    # Fields of every file, and of files that belong to a dataset
+    FIELDS = (
+        "id",
+        "link_id",
+        "name",
+        "path",
+        "mimetype",
+        "encoding",
+        "kilobytes",
+        "url",
+    )
+    DATA_FILE_FIELDS = (
+        "status",
+        "dataset_id",
+        "annotations_count",
+        "annotations",
+    )
+    # Data file fields only selected when asked for, such as by `ProjectMirror`
+    EXTRA_DATA_FILE_FIELDS = ("updated_at",)
+    # Projection for looking files up without their annotations
+    REF_FIELDS = ("id", "link_id", "name", "path", "status")
+
     @classmethod
-    def add_fragment(cls, query, name=None, data_file=False):
-        return query + cls.fragment(name, data_file)
+    def add_fragment(cls, query, name=None, data_file=False, fields=None):
+        return query + cls.fragment(name, data_file, fields)
 
     @classmethod
-    def fragment(cls, name=None, data_file=False):
-        # Custom fragment to pull annotations with file.
-        name = name or f"{cls.__name__}Fields"
+    def fragment(cls, name=None, data_file=False, fields: Sequence[str] = None):
+        """Fragment selecting `fields` of a file, all fields if None.
 
-        all_file_props = """
-          id
-          linkId
-          name
-          path
-          mimetype
-          encoding
-          kilobytes
-          url
+        Annotations and their sources are usually most of a file's response,
+        they are only selected when `annotations` is one of the fields.
         """
+        name = name or f"{cls.__name__}Fields"
+        fields = cls.FIELDS + cls.DATA_FILE_FIELDS if fields is None else fields
+        data_file_fields = cls.DATA_FILE_FIELDS + cls.EXTRA_DATA_FILE_FIELDS
+        unknown = set(fields) - set(cls.FIELDS + data_file_fields)
+        if unknown:
+            raise ValueError(f"Unknown file fields: {', '.join(sorted(unknown))}")
 
-        data_file_props = """
-          status
-          datasetId
-          annotationsCount
-          annotations {
-            ...AnnotationFields
-          }
-        """
+        def select(field: str) -> str:
+            if field == "annotations":
+                return "annotations {\n    ...AnnotationFields\n  }"
+            return snake_to_camel(field)
+
+        file_props = [select(f) for f in fields if f in cls.FIELDS]
+        data_file_props = [select(f) for f in fields if f in data_file_fields]
 
         if data_file:
-            return Annotation.add_fragment(f"""
-                \nfragment {name} on DatasetFile {{
-                  {all_file_props}
-                  {data_file_props}
-                }}
-                """)
-
-        return Annotation.add_fragment(f"""
-            \nfragment {name} on {cls.__name__} {{
-                {all_file_props}
-                ... on DatasetFile {{
-                    {data_file_props}
-                }}
-            }}\n
-            """)
+            selections = file_props + data_file_props
+            on = "DatasetFile"
+        else:
+            selections = file_props
+            if data_file_props:
+                selections.append(
+                    "... on DatasetFile {\n    "
+                    + "\n    ".join(data_file_props)
+                    + "\n  }"
+                )
+            on = cls.__name__
+
+        fragment = f"\nfragment {name} on {on} {{\n  "
+        fragment += "\n  ".join(selections)
+        fragment += "\n}\n"
+
+        if "annotations" in fields:
+            return Annotation.add_fragment(fragment)
+        return fragment
 
     id: str
     name: str
@@ -89,46 +112,52 @@ class File(BaseEntity):
     url: str
     status: str
     dataset_id: str
-    annotation_count: int
+    annotations_count: int
+    updated_at: str
     annotations: List[Annotation]
 
     def create(self, client=None) -> None:
         """Imports file"""
         super().create(client=client)
 
+        results = self.client.execute(_CREATE_FILE, params=self._create_params())
+        self._created(results)
+
+    def _create_params(self) -> dict:
         assert self.link_id is not None
         assert self.path is not None
-
-        results = self.client.execute(
-            _CREATE_FILE,
-            params={
-                "linkId": self.link_id,
-                "datasetId": self.dataset_id,
-                "importFile": {
-                    "path": self.path,
-                    "name": self.name,
-                    "size": self.kilobytes * 1024,
-                },
+        return {
+            "linkId": self.link_id,
+            "datasetId": self.dataset_id,
+            "importFile": {
+                "path": self.path,
+                "name": self.name,
+                "size": self.kilobytes * 1024,
             },
-        )
+        }
 
+    def _created(self, results: dict) -> None:
         r_file = results.get("file")
         self.__dict__.update(camel_to_snake(r_file))
 
-    def add(self, anno: Annotation) -> None:
-        """Add annotation to file.
+    def add(self, *annos: Annotation) -> None:
+        """Add annotations to file.
+
+        If the file exists, the annotations and their sources are created
+        with a single mutation.
 
         Args:
-            anno (:obj:`Annotation`): annotation to be added
+            annos (:obj:`Annotation`): annotations to be added
         """
-        self.annotations.append(anno)
+        self.annotations.extend(annos)
         if self.id is not None:
-            anno.file_id = self.id
-            anno.create(client=self.client)
+            for anno in annos:
+                anno.file_id = self.id
+            create_annotations(list(annos), self.client)
 
     def _update(self, obj):
         self.annotations = map_entities(
-            obj.get("annotations", []), Annotation, client=self.client
+            obj.get("annotations", []), Annotation, client=self._given_client()
         )
         obj.pop("annotations", None)
         super()._update(obj)
@@ -142,6 +171,6 @@ class File(BaseEntity):
 
     def to_json(self, indent: int = 2) -> str:
         dic = self.__dict__.copy()
-        dic.pop("client")
+        dic.pop("client", None)
         dic["annotations"] = [anno.to_json() for anno in dic["annotations"]]
         return json.dumps(dic, indent=indent)
@@ -1,6 +1,10 @@
 import json
-from typing import List, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+from ..context import submit
+from ..pagination import iter_pages
 from ..where import Where
 from .dataset import Dataset
 from .label import Label
@@ -56,8 +60,7 @@ _STORAGE_LINK_DEFAULT = StorageLink.add_fragment("""
     }
     """)
 
-_DATASET_FILES = File.add_fragment(
-    """
+_DATASET_FILES_QUERY = """
     query GetProjectFiles(
       $projectId: ID!
       $where: DatasetFileWhereInput
@@ -72,12 +75,47 @@ _DATASET_FILES = File.add_fragment(
         }
       }
     }
-    """,
-    data_file=True,
-)
+    """
+
+_DATASET_FILES = File.add_fragment(_DATASET_FILES_QUERY, data_file=True)
+
+
+@lru_cache(maxsize=32)
+def _dataset_files_query(fields: Optional[Tuple[str, ...]]) -> str:
+    if fields is None:
+        return _DATASET_FILES
+    return File.add_fragment(_DATASET_FILES_QUERY, data_file=True, fields=fields)
+
+
+def _fields_key(fields: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    return None if fields is None else tuple(fields)
+
 
 AddableEntity = Union[Dataset, Label]
 
+# Names looked up by a single `Where(name__in=...)` query
+RESOLVE_CHUNK_SIZE = 100
+
+
+class ResolvedFiles(dict):
+    """Files found by `Project.resolve_files`, by name or path.
+
+    Only names matching exactly one file are keys of the mapping. Names
+    without a file are listed in `missing`, and names shared by several
+    files are in `ambiguous` with all of them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.missing: List[str] = []
+        self.ambiguous: Dict[str, List[File]] = {}
+
+    def matches(self, name: str) -> List[File]:
+        """Every file matching `name`, none if it is missing"""
+        if name in self:
+            return [self[name]]
+        return self.ambiguous.get(name, [])
+
 
 class Project(BaseEntity):
     """Projects contain datasets, files and annotations."""
@@ -108,6 +146,7 @@ class Project(BaseEntity):
                 _DATASETS,
                 path="project.datasets.nodes",
                 params={"projectId": self.id},
+                cache=("datasets", self.id),
             ),
         )
 
@@ -124,29 +163,147 @@ class Project(BaseEntity):
             )
         return dataset[0]
 
-    def files(self, where: Where = None, limit=500, page=1) -> List[File]:
+    def files(
+        self, where: Where = None, limit=500, page=1, fields: Sequence[str] = None
+    ) -> List[File]:
+        return list(self.stream_files(where, limit, page, fields))
+
+    def stream_files(
+        self, where: Where = None, limit=500, page=1, fields: Sequence[str] = None
+    ) -> Iterator[File]:
+        """Yields the files of a page as the response arrives.
+
+        Files are created while the response is decoded, so a page of heavily
+        annotated files is never held as a whole in memory. `fields` limits
+        the selected fields, see `File.fragment`; files looked up by name can
+        use `File.REF_FIELDS` to skip their annotations.
+        """
         if where is None:
             where = Where()
-        return cast(
-            List[File],
-            self.client.query_to_class(
-                File,
-                _DATASET_FILES,
+        nodes = self.client.stream_query(
+            _dataset_files_query(_fields_key(fields)),
+            path="project.files.nodes",
+            params={
+                "projectId": self.id,
+                "perPage": limit,
+                "page": page,
+                "where": where.input,
+            },
+        )
+        for node in nodes:
+            yield File(node, self.client)
+
+    def iter_files(
+        self,
+        where: Where = None,
+        page_size: int = 500,
+        total: int = None,
+        concurrency: int = 4,
+        fields: Sequence[str] = None,
+    ) -> Iterator[File]:
+        """Iterates over every file matching `where`, across all pages.
+
+        The next page is fetched in the background while the current one is
+        being consumed, and the page size adapts to the API's response time.
+        Only about two pages are kept in memory at once.
+
+        Args:
+            where (Where): file filter.
+            page_size (int): size of the first page.
+            total (int): number of matching files, if known. Pages are then
+                fetched `concurrency` at a time with a fixed `page_size`.
+            fields (list): fields to select, all if None.
+        """
+        nodes = self._iter_file_nodes(where, page_size, total, concurrency, fields)
+        for node in nodes:
+            yield File(node, self.client)
+
+    def _iter_file_nodes(
+        self,
+        where: Where = None,
+        page_size: int = 500,
+        total: int = None,
+        concurrency: int = 4,
+        fields: Sequence[str] = None,
+    ) -> Iterator[dict]:
+        where_input = (where or Where()).input
+        query = _dataset_files_query(_fields_key(fields))
+
+        def fetch(page: int, size: int) -> List[dict]:
+            nodes = self.client.stream_query(
+                query,
                 path="project.files.nodes",
                 params={
                     "projectId": self.id,
-                    "perPage": limit,
+                    "perPage": size,
                     "page": page,
-                    "where": where.input,
+                    "where": where_input,
                 },
-            ),
-        )
+            )
+            return list(nodes)
+
+        for nodes in iter_pages(fetch, page_size, total, concurrency):
+            yield from nodes
+
+    def resolve_files(
+        self,
+        names: Iterable[str],
+        by: str = "name",
+        fields: Sequence[str] = File.REF_FIELDS,
+        chunk_size: int = RESOLVE_CHUNK_SIZE,
+        concurrency: int = 4,
+    ) -> ResolvedFiles:
+        """Finds the files of many names or paths with a few queries.
+
+        Names are looked up `chunk_size` at a time with `Where(name__in=...)`,
+        `concurrency` queries at once, instead of with a query per name.
+
+            resolved = project.resolve_files(["a.jpg", "b.jpg"])
+            resolved["a.jpg"], resolved.missing, resolved.ambiguous
+
+        Args:
+            names (list): file names, or paths with `by="path"`.
+            by (str): `name` or `path`, the field matched exactly.
+            fields (list): fields of the returned files, all if None.
+        """
+        if by not in ("name", "path"):
+            raise ValueError(f"Files can only be resolved by name or path, not '{by}'")
+        if fields is not None and by not in fields:
+            fields = (*fields, by)
+        names = list(dict.fromkeys(names))
+        chunks = [names[i : i + chunk_size] for i in range(0, len(names), chunk_size)]
+
+        def fetch(chunk: List[str]) -> List[File]:
+            where = Where(**{f"{by}__in": chunk})
+            nodes = self._iter_file_nodes(where, len(chunk) + 1, fields=fields)
+            return [File(node, self.client) for node in nodes]
+
+        matches: Dict[str, List[File]] = {name: [] for name in names}
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [submit(executor, fetch, chunk) for chunk in chunks]
+            for future in futures:
+                for file in future.result():
+                    matches.setdefault(getattr(file, by), []).append(file)
+
+        resolved = ResolvedFiles()
+        for name, files in matches.items():
+            if len(files) == 1:
+                resolved[name] = files[0]
+            elif files:
+                resolved.ambiguous[name] = files
+            else:
+                resolved.missing.append(name)
+        return resolved
 
     def labels(self) -> List[Label]:
         return cast(
             List[Label],
             self.client.query_to_class(
-                Label, _LABELS, path="project.labels", params={"projectId": self.id}
+                Label,
+                _LABELS,
+                path="project.labels",
+                params={"projectId": self.id},
+                cache=("labels", self.id),
             ),
         )
 
@@ -158,6 +315,7 @@ class Project(BaseEntity):
                 _STORAGE_LINKS,
                 path="project.storageLinks",
                 params={"projectId": self.id},
+                cache=("storage_links", self.id),
             ),
         )
 
@@ -169,6 +327,7 @@ class Project(BaseEntity):
                 _STORAGE_LINK_DEFAULT,
                 path="project.storageLinkDefault",
                 params={"projectId": self.id},
+                cache=("storage_link_default", self.id),
             ),
         )
 
@@ -200,7 +359,7 @@ class Project(BaseEntity):
                 selectedSchema = schema
         return selectedSchema
 
-    def download(self, schemaNameOrObject, directory: str = "./"):
+    def download(self, schemaNameOrObject, directory: str = "./", concurrency: int = 8):
         if type(schemaNameOrObject) == str:
             schemaNameOrObject = self.exportSchema(schemaNameOrObject)
 
@@ -215,12 +374,24 @@ class Project(BaseEntity):
         with open(exportPath) as coco_file:
             coco = json.load(coco_file)
 
-        print("Downloading " + str(len(coco["images"])) + " files...")
-        for image in tqdm(coco["images"]):
-            # Collect the filename, and the datatorch ID to download via datatorch, and not directly the source Blob, S3 etc.
-            file_id = image["datatorch_id"]
-            file_name = image["file_name"]
-            self.client.download_file(file_id, name=file_name, directory=directory)
+        # Collect the filename, and the datatorch ID to download via datatorch, and not directly the source Blob, S3 etc.
+        file_ids = [image["datatorch_id"] for image in coco["images"]]
+        file_names = [image["file_name"] for image in coco["images"]]
+        del coco
+
+        print("Downloading " + str(len(file_ids)) + " files...")
+        with tqdm(total=len(file_ids)) as progress:
+            report = self.client.download_many(
+                file_ids,
+                directory=directory,
+                names=file_names,
+                concurrency=concurrency,
+                callback=lambda _: progress.update(),
+            )
+        for failed in report.failed:
+            print(f"Failed to download {failed.path}: {failed.error}")
+        print(report.summary())
+        return report
 
     def add(self, entity: AddableEntity):
         """Add entity to project"""
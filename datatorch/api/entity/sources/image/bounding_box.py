@@ -2,7 +2,6 @@ from ..source import Source
 
 from typing import Optional
 from .typings import Point2D
-from datatorch.api import ApiClient
 from ....entity.annotation import Annotation
 
 __all__ = "BoundingBox"
@@ -43,13 +42,11 @@ class BoundingBox(Source):
 
     def create_new_bbox(self, label_id: str, file_id: str):
         print("Creating new annotation")
-        new_annotation = Annotation()
-        new_annotation.label_id = label_id
-        new_annotation.file_id = file_id
-        new_annotation.create(ApiClient())
-
-        self.annotation_id = new_annotation.id
-        self.create(ApiClient())
+        new_annotation = Annotation(
+            {"labelId": label_id, "fileId": file_id}, client=self.client
+        )
+        new_annotation.sources = [self]
+        new_annotation.create()
         print("BoundingBox created with annotation", new_annotation.id, flush=True)
 
     def combine_bbox(self, annotation):
@@ -73,7 +70,7 @@ class BoundingBox(Source):
 
         self.from_points(top_left, bottom_right)
 
-        self.save(ApiClient())
+        self.save()
         print(
             f"Updated bounding box for annotation {annotation.id}",
             flush=True,
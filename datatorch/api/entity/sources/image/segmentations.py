@@ -9,19 +9,41 @@ from .typings import Segment
 from ..source import Source
 from ....scripts.utils.simplify import simplify_points
 from ....entity.annotation import Annotation
-from datatorch.api import ApiClient
+from .....utils.converters import POINTS, encode_path_data
 
 __all__ = "Segmentations"
 
 
 class Segmentations(Source):
+    """Polygons of an annotation.
+
+    Args:
+        path_data: polygons as [[[x1,y1], [x2,y2], ...]].
+        precision: decimals the coordinates are rounded to when sent, all of
+            them if None.
+        encoding: `POINTS`, or `FLAT` to send polygons as flat coordinate
+            arrays if the server supports it (see `encode_path_data`).
+    """
+
     id: str
     type: str = "PaperSegmentations"
     path_data: List[Segment]
 
-    def __init__(self, path_data: Optional[List[Segment]] = None):
+    def __init__(
+        self,
+        path_data: Optional[List[Segment]] = None,
+        precision: Optional[int] = None,
+        encoding: str = POINTS,
+    ):
         super().__init__()
         self.path_data = path_data or []
+        self._precision = precision
+        self._encoding = encoding
+
+    def data(self):
+        data = super().data()
+        data.update(encode_path_data(self.path_data, self._precision, self._encoding))
+        return data
 
     def from_mask(self, mask: np.array, simplify: int = 0):
         # convert mask to polygons
@@ -63,7 +85,7 @@ class Segmentations(Source):
             for polygon in multi:
                 self.path_data.append(list(polygon.exterior.coords[:-1]))
 
-        self.save(ApiClient())
+        self.save()
         print(
             f"Updated segmentation for annotation {annotation.id}",
             flush=True,
@@ -71,14 +93,12 @@ class Segmentations(Source):
 
     def create_new_segmentation(self, label_id: str, file_id: str):
         print("Creating new annotation")
-        new_annotation = Annotation()
-        new_annotation.label_id = label_id
-        new_annotation.file_id = file_id
-        new_annotation.create(ApiClient())
+        new_annotation = Annotation(
+            {"labelId": label_id, "fileId": file_id}, client=self.client
+        )
+        new_annotation.sources = [self]
+        new_annotation.create()
         annotation_id = new_annotation.id
-
-        self.annotation_id = annotation_id
-        self.create(ApiClient())
         print("Segmentation created with annotation", annotation_id, flush=True)
 
     def create_segmentation_from_mask(
@@ -50,36 +50,34 @@ class Source(BaseEntity):
 
     def data(self):
         obj = self.dict()
-        del obj["id"]
-        del obj["type"]
-        del obj["annotation_id"]
+        for key in ("id", "type", "annotation_id"):
+            obj.pop(key, None)
         return dict([(snake_to_camel(k), v) for k, v in obj.items()])
 
     def create(self, client=None):
         super().create(client=client)
 
+        results = self.client.execute(_CREATE_SOURCE, params=self._create_params())
+        self._created(results)
+
+    def _create_params(self) -> dict:
+        assert self.type is not None, "Source must have a type"
+        return {
+            "id": self.id,
+            "annotationId": self.annotation_id,
+            "type": self.type,
+            "data": self.data(),
+        }
+
+    def _input(self) -> dict:
         assert self.type is not None, "Source must have a type"
-        results = self.client.execute(
-            _CREATE_SOURCE,
-            params={
-                "id": self.id,
-                "annotationId": self.annotation_id,
-                "type": self.type,
-                "data": self.data(),
-            },
-        )
+        return {"id": self.id, "type": self.type, "data": self.data()}
+
+    def _created(self, results: dict) -> None:
         r_source = results.get("source")
         self.id = r_source.get("id")
 
     def save(self, client=None):
         super().save(client=client)
 
-        assert self.type is not None, "Source must have a type"
-        self.client.execute(
-            _UPDATE_SOURCE,
-            params={
-                "id": self.id,
-                "type": self.type,
-                "data": self.data(),
-            },
-        )
+        self.client.execute(_UPDATE_SOURCE, params=self._input())
@@ -0,0 +1,170 @@
+import threading
+
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from .session import PoolConfig, PoolStats
+
+try:
+    import httpx
+except ImportError:
+    raise ImportError(
+        "The httpx backend requires httpx with HTTP/2 support. Install it with:\n"
+        "\tpip install 'httpx[http2]>=0.26'"
+    )
+
+__all__ = "HttpxAdapter"
+
+
+class _RawResponse(object):
+    """Body of an httpx response read like the urllib3 response requests uses.
+
+    httpx removes the `Content-Encoding` of bodies itself, so the content is
+    always decoded regardless of `decode_content`.
+    """
+
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+        self._chunks = response.iter_bytes()
+        self._buffer = bytearray()
+
+    def read(self, amt: Optional[int] = None, decode_content: bool = True) -> bytes:
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if amt is None:
+            amt = len(self._buffer)
+        data = bytes(self._buffer[:amt])
+        del self._buffer[:amt]
+        return data
+
+    def stream(self, amt: int = 2**16, decode_content: bool = True) -> Iterator[bytes]:
+        while True:
+            data = self.read(amt)
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+def _timeout(timeout) -> "httpx.Timeout":
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class HttpxAdapter(BaseAdapter):
+    """Sends the requests of a `PooledSession` with httpx over HTTP/2.
+
+    Requests to a host are multiplexed over a few HTTP/2 connections instead
+    of needing a connection each, so many small concurrent requests share
+    one TLS handshake. Servers without HTTP/2 are spoken to with HTTP/1.1.
+    Selected with `PoolConfig(backend="httpx")`.
+
+    The session's `verify`, `cert` and `proxies` are applied like requests
+    does. httpx only sets them per client, so each combination in use gets
+    a client, and so a connection pool, of its own.
+    """
+
+    def __init__(self, config: PoolConfig, stats: PoolStats):
+        super().__init__()
+        self.stats = stats
+        self.limits = httpx.Limits(
+            max_connections=config.pool_connections * config.pool_maxsize,
+            max_keepalive_connections=config.pool_maxsize if config.keep_alive else 0,
+        )
+        self._lock = threading.Lock()
+        self._clients: Dict[tuple, httpx.Client] = {}
+
+    def client(self, verify=True, cert=None, proxy: str = None) -> "httpx.Client":
+        """httpx client sending requests with the given TLS and proxy settings"""
+        key = (verify, cert, proxy)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = httpx.Client(
+                        http2=True,
+                        limits=self.limits,
+                        verify=verify,
+                        cert=cert,
+                        proxy=proxy,
+                    )
+        return client
+
+    def _trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.started":
+            self.stats.record_miss()
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        self.stats.record_request()
+        body = request.body
+        if body is not None and not isinstance(body, (bytes, str)):
+            # Streamed bodies, such as multipart uploads, are read in chunks
+            reader = body.read
+            body = iter(lambda: reader(64 * 1024), b"")
+        client = self.client(verify, cert, select_proxy(request.url, proxies or {}))
+        try:
+            sent = client.send(
+                client.build_request(
+                    request.method,
+                    request.url,
+                    headers=dict(request.headers),
+                    content=body,
+                    timeout=_timeout(timeout),
+                    extensions={"trace": self._trace},
+                ),
+                stream=True,
+            )
+        except httpx.ConnectTimeout as e:
+            raise requests.ConnectTimeout(e, request=request)
+        except httpx.ConnectError as e:
+            # Marked as never sent, so the retry policy may repeat any request
+            reason = NewConnectionError(None, str(e))
+            error = MaxRetryError(None, request.url, reason)
+            raise requests.ConnectionError(error, request=request)
+        except httpx.TimeoutException as e:
+            raise requests.ReadTimeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = sent.status_code
+        response.headers = CaseInsensitiveDict(sent.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = sent.reason_phrase
+        response.raw = _RawResponse(sent)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if not stream:
+            response.content  # Reads the body, releasing the connection
+        return response
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
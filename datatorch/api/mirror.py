@@ -0,0 +1,266 @@
+import os
+import json
+import sqlite3
+import threading
+
+from typing import Any, Iterable, List, Tuple
+
+from datatorch.core import folder
+from datatorch.utils import camel_to_snake
+
+from .where import Where
+from .entity.file import File
+from .entity.label import Label
+from .entity.project import Project
+
+__all__ = "ProjectMirror"
+
+
+# Fields of the mirrored files, `updated_at` is the watermark of `sync`
+FILE_FIELDS = File.FIELDS + File.DATA_FILE_FIELDS + File.EXTRA_DATA_FILE_FIELDS
+# Columns of the mirrored tables, in file fragment order
+FILE_COLUMNS = tuple(f for f in FILE_FIELDS if f != "annotations")
+ANNOTATION_COLUMNS = ("id", "file_id", "name", "color", "label_id", "sources_json")
+LABEL_COLUMNS = ("id", "name", "color", "custom_id", "metadata", "parent_id")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files ({", ".join(FILE_COLUMNS)}, PRIMARY KEY (id));
+CREATE INDEX IF NOT EXISTS files_name ON files (name);
+CREATE INDEX IF NOT EXISTS files_path ON files (path);
+CREATE INDEX IF NOT EXISTS files_status ON files (status);
+CREATE INDEX IF NOT EXISTS files_dataset_id ON files (dataset_id);
+CREATE INDEX IF NOT EXISTS files_updated_at ON files (updated_at);
+CREATE TABLE IF NOT EXISTS annotations (
+  {", ".join(ANNOTATION_COLUMNS)}, PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS annotations_file_id ON annotations (file_id);
+CREATE TABLE IF NOT EXISTS labels ({", ".join(LABEL_COLUMNS)}, PRIMARY KEY (id));
+"""
+
+# SQL of each `Where` operator, `like` patterns are passed through as is
+_OPERATORS = {
+    "equals": "{} = ?",
+    "notEquals": "{} IS NOT ?",
+    "gt": "{} > ?",
+    "gte": "{} >= ?",
+    "lt": "{} < ?",
+    "lte": "{} <= ?",
+    "like": "{} LIKE ? ESCAPE '\\'",
+    "startsWith": "{} LIKE ? ESCAPE '\\'",
+    "endsWith": "{} LIKE ? ESCAPE '\\'",
+}
+
+# SQLite limits the number of variables of a statement
+_MAX_VARIABLES = 900
+
+
+def mirrors_dir() -> str:
+    return os.path.join(folder.get_app_dir(), "mirrors")
+
+
+def mirror_path(project: Project) -> str:
+    """Default database file of a project's mirror"""
+    if project.client._is_agent:
+        # Imported here, the agent package imports the API
+        from datatorch.agent.directory import agent_directory
+
+        return agent_directory.mirror_path(project.id)
+    return os.path.join(mirrors_dir(), f"{project.id}.sqlite")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def where_sql(where: Where = None) -> Tuple[str, list]:
+    """Translates a file `Where` filter into an SQL condition and its values"""
+    conditions, values = [], []
+    for field, operations in (where.input if where else {}).items():
+        column = camel_to_snake(field)
+        if column not in FILE_COLUMNS or not isinstance(operations, dict):
+            raise ValueError(f"Can not filter mirrored files by '{field}'")
+        for operation, value in operations.items():
+            if operation == "in":
+                value = list(value)
+                marks = ", ".join("?" * len(value))
+                conditions.append(f"{column} IN ({marks})" if value else "0")
+                values.extend(value)
+                continue
+            if operation not in _OPERATORS:
+                raise ValueError(f"Operator '{operation}' is not supported locally")
+            if operation == "startsWith":
+                value = _escape_like(value) + "%"
+            elif operation == "endsWith":
+                value = "%" + _escape_like(value)
+            conditions.append(_OPERATORS[operation].format(column))
+            values.append(value)
+    return " AND ".join(conditions) or "1", values
+
+
+class ProjectMirror(object):
+    """Copy of a project's files, annotations and labels in SQLite.
+
+    `sync` only fetches files updated since the previous sync, after which
+    `files` evaluates `Where` filters locally against indexed columns, so
+    looking up thousands of files no longer needs a request per file.
+    Files deleted from the project are only removed by a `full` sync.
+
+        >>> mirror = ProjectMirror(project)
+        >>> mirror.sync()
+        >>> mirror.files(Where(name="000001.jpg"))
+
+    Args:
+        project (Project): mirrored project.
+        path (str): database file, by default one per project in the
+            `mirrors` folder of the app directory, or in the agent's database
+            directory for agent clients.
+    """
+
+    def __init__(self, project: Project, path: str = None):
+        self.project = project
+        if path is None:
+            path = mirror_path(project)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        # Keeps `LIKE` prefix matches case sensitive, as on the API, and indexed
+        self.db.execute("PRAGMA case_sensitive_like = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(_SCHEMA)
+
+    @property
+    def synced_at(self) -> str:
+        """Latest `updatedAt` of the mirrored files"""
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE key = 'synced_at'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def sync(self, full: bool = False, page_size: int = 500) -> int:
+        """Fetches files changed since the last sync, returns how many.
+
+        Args:
+            full (bool): refetch every file, dropping files that no longer
+                exist in the project.
+            page_size (int): size of the first page of files.
+        """
+        since = None if full else self.synced_at
+        # Files updated within the same timestamp as the last synced one may
+        # not have been fetched yet. They are fetched again and overwritten.
+        where = Where(updated_at__gte=since) if since else None
+        labels = self._labels()
+        nodes = self.project._iter_file_nodes(
+            where, page_size=page_size, fields=FILE_FIELDS
+        )
+
+        count = 0
+        with self._lock, self.db:
+            if full:
+                self.db.execute("DELETE FROM files")
+                self.db.execute("DELETE FROM annotations")
+            self.db.execute("DELETE FROM labels")
+            self._insert("labels", LABEL_COLUMNS, labels)
+            latest = since
+            for node in nodes:
+                file, annotations = self._rows(node)
+                self.db.execute("DELETE FROM annotations WHERE file_id = ?", file[:1])
+                self._insert("files", FILE_COLUMNS, [file])
+                self._insert("annotations", ANNOTATION_COLUMNS, annotations)
+                updated_at = file[FILE_COLUMNS.index("updated_at")]
+                if updated_at and (latest is None or updated_at > latest):
+                    latest = updated_at
+                count += 1
+            if latest is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('synced_at', ?)", (latest,)
+                )
+        return count
+
+    def _labels(self) -> List[tuple]:
+        self.project.client.cache.invalidate("labels", self.project.id)
+        rows = []
+        for label in self.project.labels():
+            row = {c: getattr(label, c, None) for c in LABEL_COLUMNS}
+            row["metadata"] = json.dumps(row["metadata"])
+            rows.append(tuple(row.values()))
+        return rows
+
+    def _rows(self, node: dict) -> Tuple[tuple, List[tuple]]:
+        node = camel_to_snake(node)
+        file = tuple(node.get(c) for c in FILE_COLUMNS)
+        annotations = []
+        for anno in node.get("annotations") or []:
+            anno = {"file_id": node["id"], **camel_to_snake(anno)}
+            anno["sources_json"] = json.dumps(anno.get("sources_json") or [])
+            annotations.append(tuple(anno.get(c) for c in ANNOTATION_COLUMNS))
+        return file, annotations
+
+    def _insert(self, table: str, columns: Tuple[str, ...], rows: Iterable[tuple]):
+        marks = ", ".join("?" * len(columns))
+        self.db.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({marks})", rows)
+
+    def count(self, where: Where = None) -> int:
+        condition, values = where_sql(where)
+        with self._lock:
+            query = f"SELECT COUNT(*) FROM files WHERE {condition}"
+            return self.db.execute(query, values).fetchone()[0]
+
+    def files(
+        self,
+        where: Where = None,
+        limit: int = None,
+        offset: int = 0,
+        annotations: bool = True,
+    ) -> List[File]:
+        """Mirrored files matching `where`, ordered by path.
+
+        Args:
+            where (Where): file filter, only fields of the file itself can be
+                filtered on.
+            limit (int): maximum number of files, all if None.
+            offset (int): number of matching files to skip.
+            annotations (bool): load the annotations of the files.
+        """
+        condition, values = where_sql(where)
+        query = f"SELECT * FROM files WHERE {condition} ORDER BY path, id"
+        query += " LIMIT ? OFFSET ?"
+        values += [-1 if limit is None else limit, offset]
+        with self._lock:
+            nodes = [dict(row) for row in self.db.execute(query, values)]
+            if annotations:
+                self._add_annotations(nodes)
+        client = self.project.client
+        return [File(node, client) for node in nodes]
+
+    def _add_annotations(self, nodes: List[dict]) -> None:
+        by_id = {node["id"]: node for node in nodes}
+        for node in nodes:
+            node["annotations"] = []
+        ids = list(by_id)
+        for start in range(0, len(ids), _MAX_VARIABLES):
+            chunk = ids[start : start + _MAX_VARIABLES]
+            marks = ", ".join("?" * len(chunk))
+            query = f"SELECT * FROM annotations WHERE file_id IN ({marks}) ORDER BY id"
+            for row in self.db.execute(query, chunk):
+                anno: Any = dict(row)
+                anno["sources_json"] = json.loads(anno["sources_json"])
+                by_id[anno["file_id"]]["annotations"].append(anno)
+
+    def labels(self) -> List[Label]:
+        with self._lock:
+            rows = [dict(row) for row in self.db.execute("SELECT * FROM labels")]
+        for row in rows:
+            row["metadata"] = json.loads(row["metadata"])
+        return [Label(row, self.project.client) for row in rows]
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
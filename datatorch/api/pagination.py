@@ -0,0 +1,125 @@
+import json
+import math
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, List
+
+from .context import submit
+
+__all__ = "iter_pages"
+
+
+MIN_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 2000
+# Page sizes adapt towards pages taking about this long to fetch
+TARGET_PAGE_SECONDS = 1.0
+# Upper bound of the estimated response size of a single page
+MAX_PAGE_BYTES = 16 * 1024 * 1024
+
+FetchPage = Callable[[int, int], List[dict]]
+
+
+class _Timed(object):
+    def __init__(self, fetch: FetchPage, page: int, size: int):
+        self.page = page
+        self.size = size
+        start = time.monotonic()
+        self.nodes = fetch(page, size)
+        self.elapsed = time.monotonic() - start
+
+
+def _next_size(
+    current: _Timed, offset: int, item_bytes: float, maximum: int = MAX_PAGE_SIZE
+) -> int:
+    """Page size for the page starting at `offset` after `current` was fetched.
+
+    Pages are numbered, so a new size must divide the offset to keep pages
+    aligned. Sizes change by factors of two and a change that does not line
+    up with the offset waits for a later page.
+    """
+    size = current.size
+    if current.elapsed > TARGET_PAGE_SECONDS * 2 or size * item_bytes > MAX_PAGE_BYTES:
+        candidate = size // 2
+    elif current.elapsed < TARGET_PAGE_SECONDS / 2:
+        if size * 2 * item_bytes > MAX_PAGE_BYTES:
+            return size
+        candidate = size * 2
+    else:
+        return size
+    if MIN_PAGE_SIZE <= candidate <= maximum and offset % candidate == 0:
+        return candidate
+    return size
+
+
+def iter_pages(
+    fetch: FetchPage,
+    page_size: int = 500,
+    total: int = None,
+    concurrency: int = 4,
+) -> Iterator[List[dict]]:
+    """Yields every page of a page numbered query, prefetching the next one.
+
+    `fetch(page, size)` returns the nodes of a 1-based page. While the caller
+    handles a page the next one is fetched in the background, so at most two
+    pages are held in memory. The page size adapts to how long pages take
+    and how large their nodes are. Servers may return fewer nodes than a
+    grown page size asks for, so a short page after growing is fetched
+    again at the last size returned in full, which then stays the maximum.
+
+    When `total` is known, pages have a fixed size and up to `concurrency`
+    of them are fetched at the same time, still yielded in order.
+    """
+    if total is not None:
+        yield from _iter_concurrent(fetch, page_size, total, concurrency)
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future: Future = submit(executor, _Timed, fetch, 1, page_size)
+        offset = 0
+        item_bytes = 0.0
+        # Largest page size the server returned in full, and the size pages
+        # may grow to
+        full = 0
+        maximum = MAX_PAGE_SIZE
+        while future is not None:
+            current: _Timed = future.result()
+            nodes = current.nodes
+            future = None
+            if full and len(nodes) < current.size and current.size > full:
+                # Possibly capped by the server rather than the last page.
+                # Sizes are aligned, so the page starts on a page of `full`.
+                maximum = full
+                future = submit(executor, _Timed, fetch, offset // full + 1, full)
+                del current, nodes
+                continue
+            offset += len(nodes)
+            if len(nodes) == current.size:
+                full = max(full, current.size)
+                if not item_bytes and nodes:
+                    # Estimated once, serializing every page would cost more
+                    # than the fetch it is meant to tune
+                    item_bytes = len(json.dumps(nodes)) / len(nodes)
+                size = _next_size(current, offset, item_bytes, maximum)
+                future = submit(executor, _Timed, fetch, offset // size + 1, size)
+            if nodes:
+                yield nodes
+            del current, nodes
+
+
+def _iter_concurrent(
+    fetch: FetchPage, page_size: int, total: int, concurrency: int
+) -> Iterator[List[dict]]:
+    pages = range(1, math.ceil(total / page_size) + 1)
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        queued: List[Future] = []
+        for page in pages:
+            queued.append(submit(executor, fetch, page, page_size))
+            if len(queued) >= concurrency:
+                nodes = queued.pop(0).result()
+                if nodes:
+                    yield nodes
+        for future in queued:
+            nodes = future.result()
+            if nodes:
+                yield nodes
@@ -0,0 +1,200 @@
+import time
+import random
+import logging
+import threading
+
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from . import tracing
+
+__all__ = "RetryPolicy", "CircuitBreaker"
+
+
+logger = logging.getLogger(__name__)
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# The server rejected the request without processing it, always safe to retry
+REJECTED_STATUSES = frozenset({429, 503})
+# The request may have been processed, only retried when idempotent
+TRANSIENT_STATUSES = frozenset({500, 502, 504})
+
+
+def retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Seconds to wait from a response's `Retry-After` header, if any"""
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_sent(error: Exception) -> bool:
+    """True if a request failed before reaching the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class CircuitBreaker(object):
+    """Pauses every request of a client while the server is overloaded.
+
+    After `threshold` consecutive overload responses (429 and 503) or
+    connection failures the breaker opens and all requests sharing it wait
+    `cooldown` seconds, or the server's `Retry-After`, before continuing.
+    A successful response closes it again.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.remaining > 0
+
+    @property
+    def remaining(self) -> float:
+        """Seconds until the breaker closes, 0 if it is closed"""
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def wait(self) -> None:
+        """Blocks while the breaker is open"""
+        while self.is_open:
+            time.sleep(self.remaining)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self, delay: float = None) -> None:
+        with self._lock:
+            self._failures += 1
+            if delay is not None or self._failures >= self.threshold:
+                pause = delay if delay is not None else self.cooldown
+                if not self.is_open:
+                    logger.warning(f"Server overloaded, pausing requests {pause:.0f}s")
+                self._open_until = max(self._open_until, time.monotonic() + pause)
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a failed request.
+
+    Requests are retried with full jitter exponential backoff: the n-th retry
+    waits a random time up to `backoff * 2**n` seconds, capped at
+    `max_backoff`. A `Retry-After` header from the server takes precedence.
+
+    Responses with 429 or 503 and connection failures before the request
+    was sent are always retried, since the server did not process the
+    request. Other transient errors (500, 502, 504 and connection resets)
+    are only retried for idempotent requests: GraphQL queries and GET, HEAD,
+    PUT and DELETE requests, or any request with `retry_mutations`.
+
+    Args:
+        attempts (int): maximum number of retries, 0 disables retrying.
+        breaker (CircuitBreaker): breaker shared by every request of the
+            client, None to disable it.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        retry_mutations: bool = False,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_mutations = retry_mutations
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    def delay(self, attempt: int, response: requests.Response = None) -> float:
+        server_delay = retry_after(response)
+        if server_delay is not None:
+            return min(server_delay, self.max_backoff * 5)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def should_retry(
+        self,
+        idempotent: bool,
+        response: requests.Response = None,
+        error: Exception = None,
+    ) -> bool:
+        idempotent = idempotent or self.retry_mutations
+        if error is not None:
+            if isinstance(error, requests.ConnectionError):
+                return idempotent or _not_sent(error)
+            return idempotent and isinstance(error, requests.Timeout)
+        return self.should_retry_status(idempotent, response.status_code)
+
+    def should_retry_status(self, idempotent: bool, status: int) -> bool:
+        """True if a response with `status` may be retried"""
+        if status in REJECTED_STATUSES:
+            return True
+        idempotent = idempotent or self.retry_mutations
+        return idempotent and status in TRANSIENT_STATUSES
+
+    def call(
+        self,
+        send: Callable[[], requests.Response],
+        idempotent: bool,
+        description: str = "request",
+    ) -> requests.Response:
+        """Calls `send` until it succeeds or may no longer be retried.
+
+        `send` must be callable again for every attempt, so streamed bodies
+        have to be recreated by it.
+        """
+        breaker = self.breaker
+        for attempt in range(self.attempts + 1):
+            if breaker:
+                breaker.wait()
+            response, error = None, None
+            try:
+                response = send()
+            except requests.RequestException as e:
+                error = e
+
+            if error is None and response.status_code < 500:
+                if response.status_code != 429:
+                    if breaker:
+                        breaker.record_success()
+                    return response
+
+            overloaded = error is not None or response.status_code in REJECTED_STATUSES
+            if breaker and overloaded:
+                breaker.record_failure(retry_after(response))
+
+            if attempt == self.attempts or not self.should_retry(
+                idempotent, response, error
+            ):
+                if error is not None:
+                    raise error
+                return response
+
+            wait = self.delay(attempt, response)
+            span = tracing.current_span()
+            if span is not None:
+                span.retries += 1
+            reason = error or f"HTTP {response.status_code}"
+            logger.warning(f"{description} failed ({reason}), retrying in {wait:.1f}s")
+            if response is not None:
+                response.close()
+            time.sleep(wait)
+        raise AssertionError("Unreachable")
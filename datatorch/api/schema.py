@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+from typing import Optional
+
+from graphql import build_client_schema, get_introspection_query, parse
+from graphql.type import GraphQLSchema
+
+from datatorch.core import folder
+
+__all__ = "SchemaCache"
+
+
+logger = logging.getLogger(__name__)
+
+
+# Cached schemas newer than this are used without contacting the server
+SCHEMA_TTL = 24 * 60 * 60
+
+_API_VERSION = parse("query GetApiVersion { settings { apiVersion } }")
+
+
+def schemas_dir() -> str:
+    return os.path.join(folder.get_app_dir(), "schemas")
+
+
+class SchemaCache(object):
+    """Introspected GraphQL schema of an API persisted to disk.
+
+    The introspection result is stored per API URL together with the API
+    version it was fetched for. Within `ttl` seconds the stored schema is
+    used as is. After that the cheap `settings.apiVersion` query revalidates
+    it and a new introspection only runs if the version changed.
+
+    Built schemas are also kept in memory so clients created later in the
+    same process skip reading and building the schema again.
+    """
+
+    _built = {}
+
+    def __init__(self, api_url: str, directory: str = None, ttl: int = SCHEMA_TTL):
+        self.api_url = api_url
+        self.ttl = ttl
+        self.directory = directory or schemas_dir()
+        key = hashlib.sha1(api_url.encode("utf-8")).hexdigest()
+        self.path = os.path.join(self.directory, f"{key}.json")
+        # True once the schema was checked against the server by this instance
+        self.validated = False
+
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("apiUrl") != self.api_url:
+            return None
+        return cached
+
+    def _write(self, api_version: Optional[str], introspection: dict) -> dict:
+        os.makedirs(self.directory, exist_ok=True)
+        cached = {
+            "apiUrl": self.api_url,
+            "apiVersion": api_version,
+            "fetchedAt": time.time(),
+            "introspection": introspection,
+        }
+        # Write then rename so concurrent processes never read a partial file
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            json.dump(cached, f)
+        os.replace(temp, self.path)
+        return cached
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def load(self, transport, refresh: bool = False) -> GraphQLSchema:
+        """Returns the schema, fetching it with the sync `transport` if needed"""
+        cached = None if refresh else self._read()
+
+        if cached and time.time() - cached.get("fetchedAt", 0) < self.ttl:
+            return self._build(cached)
+
+        api_version = self._api_version(transport)
+        if cached and api_version and cached.get("apiVersion") == api_version:
+            logger.debug(f"Schema for {self.api_url} still valid ({api_version}).")
+            self.validated = True
+            return self._build(self._write(api_version, cached["introspection"]))
+
+        logger.debug(f"Fetching schema for {self.api_url}.")
+        result = transport.execute(parse(get_introspection_query()))
+        if result.errors:
+            raise ValueError(f"Error while fetching schema: {result.errors[0]}")
+        self.validated = True
+        return self._build(self._write(api_version, result.data))
+
+    def _build(self, cached: dict) -> GraphQLSchema:
+        # One entry per file and version, replaced when the file is rewritten
+        key = (self.path, cached["apiVersion"])
+        fetched_at, schema = self._built.get(key, (None, None))
+        if schema is None or fetched_at != cached["fetchedAt"]:
+            schema = build_client_schema(cached["introspection"])
+            self._built[key] = (cached["fetchedAt"], schema)
+        return schema
+
+    @staticmethod
+    def _api_version(transport) -> Optional[str]:
+        try:
+            result = transport.execute(_API_VERSION)
+            return (result.data or {}).get("settings", {}).get("apiVersion")
+        except Exception as e:
+            logger.debug(f"Unable to read API version: {e}")
+            return None
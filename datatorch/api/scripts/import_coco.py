@@ -4,14 +4,17 @@ import copy
 import numpy as np
 import click
 import logging
-import pathlib
 import tqdm
 
 from typing import List
+from .utils.files import file_key, resolve_in_batches
 from .utils.simplify import simplify_points
 
-from .. import ApiClient, BoundingBox, File, Where, Project
+from ..context import default_client
+from .. import ApiClient, BoundingBox, File, Project
 from ...utils.converters import (
+    POINTS,
+    encode_path_data,
     points_to_segmentation,
     segmentation_to_points,
     simplify_segmentation,
@@ -117,7 +120,14 @@ def import_coco(
     api: ApiClient = None,
     upload_file_metadata: bool = False,
     upload_anno_metadata: bool = False,
+    precision: int = None,
+    path_encoding: str = POINTS,
 ):
+    """Imports the annotations of a COCO file into a project.
+
+    Segmentation coordinates are rounded to `precision` decimals if given,
+    and sent with `path_encoding` (see `encode_path_data`).
+    """
     if not import_segmentation and not import_bbox:
         _LOGGER.warning("Nothing to import. Both segmentation and bbox are disabled.")
         return
@@ -126,11 +136,13 @@ def import_coco(
         raise ValueError(f"Provided path '{file_path}' is not a file.")
 
     check_iou: bool = max_iou != 0
+    # Existing annotations are only needed to compare against
+    file_fields = File.REF_FIELDS + (("annotations",) if check_iou else ())
 
     # Get DataTorch project information
     _LOGGER.debug("Connecting to DataTorch API.")
     if api is None:
-        api = ApiClient()
+        api = default_client()
 
     _LOGGER.debug("Loading Project Information.")
     if "/" in project_string:
@@ -158,24 +170,26 @@ def import_coco(
             _LOGGER.error("Could not find %s in project labels.", name)
             continue
 
+    # Mutations of many images are sent together, see ApiClient.batch
+    mutations = api.batch()
+    results = []
+
     _LOGGER.info("Beginning annotation imports...")
     # Iterate each annotations to add them to datatorch
     coco_category_ids = label_mapping.keys()
-    for image_id in tqdm.tqdm(coco.getImgIds(), unit="image", disable=None):
-        (coco_image,) = coco.loadImgs(ids=image_id)
+    image_ids = coco.getImgIds()
+    images = resolve_in_batches(
+        project,
+        coco.loadImgs(ids=image_ids),
+        lambda image: [file_key(image["file_name"], image_base_path)],
+        by="name" if image_base_path is None else "path",
+        fields=file_fields,
+    )
+    for coco_image, resolved in tqdm.tqdm(
+        images, total=len(image_ids), unit="image", disable=None
+    ):
         image_name = coco_image["file_name"]
-
-        if image_base_path is None:
-            file_filter = Where(name=image_name)
-        else:
-            file_filter = Where(
-                path=str(
-                    pathlib.PurePosixPath(image_base_path.strip("/")).joinpath(
-                        image_name
-                    )
-                )
-            )
-        dt_files = project.files(file_filter, limit=2)
+        dt_files = resolved.matches(file_key(image_name, image_base_path))
 
         with tqdm.tqdm.external_write_mode():
             if len(dt_files) > 1:
@@ -200,10 +214,9 @@ def import_coco(
             file_metadata = coco_image.get("metadata", {})
             if len(file_metadata) > 0:
                 for key, value in file_metadata.items():
-                    api.execute(
-                        _SET_FILE_METADATA,
-                        params={"fileId": dt_file.id, "key": key, "value": value},
-                    )
+                    params = {"fileId": dt_file.id, "key": key, "value": value}
+                    result = mutations.execute(_SET_FILE_METADATA, params=params)
+                    results.append((image_name, "set metadata", result))
 
         coco_annotation_ids = coco.getAnnIds(
             catIds=coco_category_ids, imgIds=coco_image["id"]
@@ -293,7 +306,9 @@ def import_coco(
                         annotation["sources"].append(
                             {
                                 "type": "PaperSegmentations",
-                                "data": {"pathData": path_data},
+                                "data": encode_path_data(
+                                    path_data, precision, path_encoding
+                                ),
                             }
                         )
 
@@ -310,7 +325,14 @@ def import_coco(
 
         if len(new_annotations) > 0:
             # Insert new annotations
-            api.execute(_CREATE_ANNOTATIONS, params={"annotations": new_annotations})
+            params = {"annotations": new_annotations}
+            result = mutations.execute(_CREATE_ANNOTATIONS, params=params)
+            results.append((image_name, "create annotations", result))
 
         with tqdm.tqdm.external_write_mode():
             _LOGGER.info(f"[{dt_file.name}] Added {len(new_annotations)} annnotations.")
+
+    mutations.flush()
+    for image_name, action, result in results:
+        if result.exception() is not None:
+            _LOGGER.error(f"[{image_name}] Failed to {action}: {result.exception()}")
@@ -1,17 +1,21 @@
 import os
 import glob
 import logging
-import pathlib
 import numpy as np
 import tqdm
 
 from typing import List, Dict, Optional, Tuple
+from .utils.files import file_key, resolve_in_batches
 from .utils.simplify import simplify_points
 
-from .. import ApiClient, File, Where, Project
+from ..context import default_client
+from .. import ApiClient, File, Project
 from ...utils.converters import (
+    POINTS,
+    encode_path_data,
     pixmask2cocopoly,
     points_to_segmentation,
+    quantize_points,
     segmentation_to_points,
     simplify_segmentation,
 )
@@ -31,6 +35,7 @@ def mask_to_polygons(
     mask: np.ndarray,
     simplify_tolerance: float = 1.0,
     min_area: float = 100.0,
+    precision: Optional[int] = 0,
 ) -> List[List[List[float]]]:
     """
     Convert a pixel mask to polygon contours using OpenCV.
@@ -39,6 +44,9 @@ def mask_to_polygons(
         mask: Pixel mask image (numpy array)
         simplify_tolerance: Tolerance for polygon simplification (0 to disable)
         min_area: Minimum polygon area to include
+        precision: Decimals of the coordinates (None for floats). Contours
+            run through whole pixels, so the default of 0 loses nothing and
+            returns integers.
 
     Returns:
         List of polygons in [[[x1,y1], [x2,y2], ...]] format
@@ -85,7 +93,7 @@ def mask_to_polygons(
         # Filter out polygons that became too small after simplification
         polygons = [p for p in simplified if len(p) >= 3]
 
-    return polygons
+    return quantize_points(polygons, precision)
 
 
 def find_mask_files(
@@ -165,6 +173,30 @@ _CREATE_ANNOTATIONS = """
 """
 
 
+def image_search_names(image_name: str) -> List[str]:
+    """Names an image of a mask may have, with and without an extension"""
+    return [
+        image_name,
+        f"{image_name}.png",
+        f"{image_name}.jpg",
+        f"{image_name}.jpeg",
+        f"{image_name}.tif",
+        f"{image_name}.tiff",
+    ]
+
+
+def mask_file_keys(
+    mask_basename: str,
+    mask_suffix: str,
+    image_base_path: Optional[str] = None,
+    label_name: Optional[str] = None,
+) -> List[str]:
+    """Names, or paths under `image_base_path`, of the image of a mask"""
+    image_name, _ = parse_mask_filename(mask_basename, mask_suffix, label_name)
+    names = image_search_names(image_name)
+    return [file_key(name, image_base_path) for name in names]
+
+
 def import_pixmask(
     mask_folder: str,
     project_string: str,
@@ -177,6 +209,7 @@ def import_pixmask(
     invert_mask: bool = False,
     skip_annotated: bool = False,
     api: ApiClient = None,
+    path_encoding: str = POINTS,
 ):
     """
     Import pixel masks from a folder into DataTorch as polygon annotations.
@@ -196,6 +229,7 @@ def import_pixmask(
         invert_mask: If True, invert the pixel mask before processing
         skip_annotated: If True, skip files that already have annotations
         api: DataTorch API client (optional, will create one if not provided)
+        path_encoding: Encoding of the polygons sent, see `encode_path_data`
     """
     if not os.path.isdir(mask_folder):
         raise ValueError(f"Provided path '{mask_folder}' is not a directory.")
@@ -203,7 +237,7 @@ def import_pixmask(
     # Get DataTorch project information
     _LOGGER.debug("Connecting to DataTorch API.")
     if api is None:
-        api = ApiClient()
+        api = default_client()
 
     _LOGGER.debug("Loading Project Information.")
     project: Project = api.project(project_string)
@@ -228,6 +262,9 @@ def import_pixmask(
             f"Please create the label in DataTorch first."
         )
 
+    # Only the annotation count is needed to skip annotated files
+    file_fields = File.REF_FIELDS + (("annotations_count",) if skip_annotated else ())
+
     # Find all mask files
     mask_files = find_mask_files(mask_folder, file_extensions)
 
@@ -237,9 +274,17 @@ def import_pixmask(
 
     _LOGGER.info(f"Found {len(mask_files)} mask files to process.")
 
+    masks = resolve_in_batches(
+        project,
+        mask_files.items(),
+        lambda mask: mask_file_keys(mask[0], mask_suffix, image_base_path, label_name),
+        by="name" if image_base_path is None else "path",
+        fields=file_fields,
+    )
+
     # Process each mask file
-    for mask_basename, mask_path in tqdm.tqdm(
-        mask_files.items(), unit="mask", disable=None
+    for (mask_basename, mask_path), resolved in tqdm.tqdm(
+        masks, total=len(mask_files), unit="mask", disable=None
     ):
         # Parse mask filename to get image name and optional label
         image_name, detected_label = parse_mask_filename(
@@ -266,30 +311,12 @@ def import_pixmask(
 
         # Try to find matching file in DataTorch
         # Try with common image extensions
-        search_names = [
-            image_name,
-            f"{image_name}.png",
-            f"{image_name}.jpg",
-            f"{image_name}.jpeg",
-            f"{image_name}.tif",
-            f"{image_name}.tiff",
-        ]
+        search_names = image_search_names(image_name)
 
         dt_file = None
         multiple_found = False
         for search_name in search_names:
-            if image_base_path is None:
-                file_filter = Where(name=search_name)
-            else:
-                file_filter = Where(
-                    path=str(
-                        pathlib.PurePosixPath(image_base_path.strip("/")).joinpath(
-                            search_name
-                        )
-                    )
-                )
-
-            dt_files = project.files(file_filter, limit=2)
+            dt_files = resolved.matches(file_key(search_name, image_base_path))
 
             if len(dt_files) == 1:
                 dt_file = dt_files[0]
@@ -327,10 +354,10 @@ def import_pixmask(
             continue
 
         # Skip files that already have annotations if flag is set
-        if skip_annotated and hasattr(dt_file, "annotations") and dt_file.annotations:
+        if skip_annotated and dt_file.annotations_count:
             with tqdm.tqdm.external_write_mode():
                 _LOGGER.info(
-                    f"[{mask_basename}] File already has {len(dt_file.annotations)} annotation(s), skipping"
+                    f"[{mask_basename}] File already has {dt_file.annotations_count} annotation(s), skipping"
                 )
             continue
 
@@ -370,7 +397,7 @@ def import_pixmask(
             "sources": [
                 {
                     "type": "PaperSegmentations",
-                    "data": {"pathData": polygons},
+                    "data": encode_path_data(polygons, encoding=path_encoding),
                 }
             ],
         }
@@ -396,6 +423,7 @@ def import_pixmask_multi_label(
     min_area: float = 100.0,
     file_extensions: List[str] = None,
     api: ApiClient = None,
+    path_encoding: str = POINTS,
 ):
     """
     Import multi-class segmentation masks where each pixel value corresponds to a class.
@@ -413,6 +441,7 @@ def import_pixmask_multi_label(
         min_area: Minimum polygon area to include as annotation
         file_extensions: List of image extensions to look for
         api: DataTorch API client (optional, will create one if not provided)
+        path_encoding: Encoding of the polygons sent, see `encode_path_data`
     """
     if not os.path.isdir(mask_folder):
         raise ValueError(f"Provided path '{mask_folder}' is not a directory.")
@@ -420,7 +449,7 @@ def import_pixmask_multi_label(
     # Get DataTorch project information
     _LOGGER.debug("Connecting to DataTorch API.")
     if api is None:
-        api = ApiClient()
+        api = default_client()
 
     _LOGGER.debug("Loading Project Information.")
     project: Project = api.project(project_string)
@@ -437,6 +466,8 @@ def import_pixmask_multi_label(
                 f"Available labels: {list(names_mapping.keys())}"
             )
 
+    file_fields = File.REF_FIELDS
+
     # Find all mask files
     mask_files = find_mask_files(mask_folder, file_extensions)
 
@@ -446,37 +477,27 @@ def import_pixmask_multi_label(
 
     _LOGGER.info(f"Found {len(mask_files)} mask files to process.")
 
+    masks = resolve_in_batches(
+        project,
+        mask_files.items(),
+        lambda mask: mask_file_keys(mask[0], mask_suffix, image_base_path),
+        by="name" if image_base_path is None else "path",
+        fields=file_fields,
+    )
+
     # Process each mask file
-    for mask_basename, mask_path in tqdm.tqdm(
-        mask_files.items(), unit="mask", disable=None
+    for (mask_basename, mask_path), resolved in tqdm.tqdm(
+        masks, total=len(mask_files), unit="mask", disable=None
     ):
         # Parse mask filename to get image name
         image_name, _ = parse_mask_filename(mask_basename, mask_suffix)
 
         # Try to find matching file in DataTorch
-        search_names = [
-            image_name,
-            f"{image_name}.png",
-            f"{image_name}.jpg",
-            f"{image_name}.jpeg",
-            f"{image_name}.tif",
-            f"{image_name}.tiff",
-        ]
+        search_names = image_search_names(image_name)
 
         dt_file = None
         for search_name in search_names:
-            if image_base_path is None:
-                file_filter = Where(name=search_name)
-            else:
-                file_filter = Where(
-                    path=str(
-                        pathlib.PurePosixPath(image_base_path.strip("/")).joinpath(
-                            search_name
-                        )
-                    )
-                )
-
-            dt_files = project.files(file_filter, limit=2)
+            dt_files = resolved.matches(file_key(search_name, image_base_path))
 
             if len(dt_files) == 1:
                 dt_file = dt_files[0]
@@ -546,7 +567,7 @@ def import_pixmask_multi_label(
                 "sources": [
                     {
                         "type": "PaperSegmentations",
-                        "data": {"pathData": polygons},
+                        "data": encode_path_data(polygons, encoding=path_encoding),
                     }
                 ],
             }
@@ -0,0 +1,51 @@
+import pathlib
+
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from ...entity.file import File
+from ...entity.project import Project, ResolvedFiles
+
+T = TypeVar("T")
+
+# Items whose files are resolved together, bounding the files held in memory
+RESOLVE_BATCH_SIZE = 500
+
+
+def file_key(name: str, base_path: Optional[str] = None) -> str:
+    """Name of a file, or its path in the project under `base_path`"""
+    if base_path is None:
+        return name
+    return str(pathlib.PurePosixPath(base_path.strip("/")).joinpath(name))
+
+
+def resolve_in_batches(
+    project: Project,
+    items: Iterable[T],
+    keys: Callable[[T], List[str]],
+    by: str = "name",
+    fields: Sequence[str] = File.REF_FIELDS,
+    batch_size: int = RESOLVE_BATCH_SIZE,
+) -> Iterator[Tuple[T, ResolvedFiles]]:
+    """Yields each item with the resolved files of its batch.
+
+    The files of every key of `batch_size` items are found together with
+    `Project.resolve_files`, rather than with a query per key.
+    """
+    items = iter(items)
+    while True:
+        batch = [item for _, item in zip(range(batch_size), items)]
+        if not batch:
+            return
+        names = [key for item in batch for key in keys(item)]
+        resolved = project.resolve_files(names, by=by, fields=fields)
+        for item in batch:
+            yield item, resolved
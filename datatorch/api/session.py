@@ -0,0 +1,495 @@
+import gzip
+import json
+import socket
+import hashlib
+import importlib
+import threading
+import weakref
+
+from typing import Any, Callable, Iterator, Sequence, Union
+
+import requests
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+from gql.transport.requests import RequestsHTTPTransport
+from graphql import ExecutionResult, get_operation_ast, print_ast
+from graphql.language.ast import DocumentNode, OperationType
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from . import tracing
+from .retry import IDEMPOTENT_METHODS, RetryPolicy
+from .stream import iter_json_array
+
+__all__ = (
+    "PoolConfig",
+    "PoolStats",
+    "PooledSession",
+    "SessionHTTPTransport",
+    "register_backend",
+)
+
+
+# Read size of streamed GraphQL responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Smallest JSON body worth compressing, below it gzip saves little
+COMPRESS_MIN_SIZE = 16 * 1024
+# Polygon coordinates shrink 2-4x at level 1, higher levels save a few
+# percent more for several times the CPU time
+COMPRESS_LEVEL = 1
+
+
+def compress_json(kwargs: dict, min_size: int) -> None:
+    """Replaces a `json` request body with its encoding, gzipped if large.
+
+    Encoding once here also lets retries resend the same bytes.
+    """
+    body = json.dumps(kwargs.pop("json"), allow_nan=False).encode("utf-8")
+    headers = {**(kwargs.get("headers") or {}), "Content-Type": "application/json"}
+    if len(body) >= min_size:
+        body = gzip.compress(body, COMPRESS_LEVEL, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+    kwargs["data"] = body
+    kwargs["headers"] = headers
+
+
+class PoolStats(object):
+    """Thread safe counters of connection reuse for a pooled session.
+
+    A `hit` is a request served over an already open connection, a `miss` is a
+    request that had to open a new connection (TCP and TLS handshake).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.misses = 0
+
+    @property
+    def hits(self) -> int:
+        return max(self.requests - self.misses, 0)
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.misses = 0
+
+    def dict(self) -> dict:
+        return {"requests": self.requests, "hits": self.hits, "misses": self.misses}
+
+    def __repr__(self):
+        return f"PoolStats(requests={self.requests}, hits={self.hits}, misses={self.misses})"
+
+
+class PoolConfig(object):
+    """Connection pool settings for a client.
+
+    Args:
+        pool_connections (int): number of hosts to keep connection pools for.
+        pool_maxsize (int): maximum open connections kept per host.
+        pool_block (bool): block when `pool_maxsize` connections to a host are
+            in use instead of opening throw away connections, making
+            `pool_maxsize` a hard per-host limit.
+        keep_alive (bool): keep connections open between requests and enable
+            TCP keep-alive probes on idle sockets.
+        backend (str): library sending the requests, `requests` (urllib3,
+            one request per connection at a time) or `httpx` (HTTP/2, many
+            requests multiplexed on a connection, needs `httpx[http2]`).
+            See `register_backend` for others.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 32,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        backend: str = "requests",
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.backend = backend
+
+    def create_session(self) -> "PooledSession":
+        return PooledSession(self)
+
+
+def _counting_pool(base: type, stats: PoolStats) -> type:
+    class CountingConnection(base.ConnectionCls):
+        def _new_conn(self):
+            # Called for every new socket, including reconnects of pooled
+            # connections the server closed.
+            stats.record_miss()
+            return super()._new_conn()
+
+    class CountingConnectionPool(base):
+        ConnectionCls = CountingConnection
+
+        def urlopen(self, *args, **kwargs):
+            stats.record_request()
+            return super().urlopen(*args, **kwargs)
+
+    return CountingConnectionPool
+
+
+class _PooledAdapter(HTTPAdapter):
+    def __init__(self, config: PoolConfig, stats: PoolStats):
+        self.pool_config = config
+        self.stats = stats
+        super().__init__(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            pool_block=config.pool_block,
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.pool_config.keep_alive:
+            pool_kwargs.setdefault(
+                "socket_options",
+                HTTPConnection.default_socket_options
+                + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+            )
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+
+AdapterFactory = Callable[[PoolConfig, PoolStats], BaseAdapter]
+
+# Adapters of each `PoolConfig.backend`, either a factory or the
+# "module:attr" path of one, imported when the backend is first used
+BACKENDS: dict = {
+    "requests": _PooledAdapter,
+    "httpx": "datatorch.api.httpx_adapter:HttpxAdapter",
+}
+
+
+def register_backend(name: str, factory: Union[AdapterFactory, str]) -> None:
+    """Adds a backend that can be selected with `PoolConfig(backend=name)`.
+
+    `factory` is called with the `PoolConfig` and `PoolStats` of a session
+    and returns the `requests` adapter sending its requests. Retries,
+    compression and tracing are handled by the session for every backend.
+    """
+    BACKENDS[name] = factory
+
+
+def _create_adapter(config: PoolConfig, stats: PoolStats) -> BaseAdapter:
+    factory = BACKENDS.get(config.backend)
+    if factory is None:
+        raise ValueError(f"Unknown HTTP backend '{config.backend}'")
+    if isinstance(factory, str):
+        module, attr = factory.split(":")
+        factory = BACKENDS[config.backend] = getattr(
+            importlib.import_module(module), attr
+        )
+    return factory(config, stats)
+
+
+class PooledSession(requests.Session):
+    """`requests.Session` backed by a configurable, instrumented connection pool.
+
+    A single instance is owned by each `Client` and shared by the GraphQL
+    transport and every file upload and download.
+    """
+
+    def __init__(self, config: PoolConfig = None, retry: RetryPolicy = None):
+        super().__init__()
+        self.config = config or PoolConfig()
+        self.stats = PoolStats()
+        self.retry = retry or RetryPolicy()
+
+        adapter = _create_adapter(self.config, self.stats)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+        if not self.config.keep_alive:
+            self.headers["Connection"] = "close"
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *args,
+        idempotent: bool = None,
+        compress: int = None,
+        **kwargs,
+    ):
+        """Sends a request, retrying it according to the session's `retry` policy.
+
+        `idempotent` overrides whether the request may be repeated, it
+        defaults to true for GET, HEAD, OPTIONS, PUT and DELETE. Streamed
+        bodies can only be sent once and are not retried here.
+
+        With `compress`, `json` bodies of at least that many bytes are sent
+        gzipped with `Content-Encoding: gzip`.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        if compress is not None and kwargs.get("json") is not None:
+            compress_json(kwargs, compress)
+        data = kwargs.get("data")
+        streamed = kwargs.get("files") or not (
+            data is None or isinstance(data, (bytes, str, dict, list, tuple))
+        )
+        if args or streamed:
+            if self.retry.breaker:
+                self.retry.breaker.wait()
+            return super().request(method, url, *args, **kwargs)
+
+        def send():
+            return super(PooledSession, self).request(method, url, **kwargs)
+
+        return self.retry.call(send, idempotent, f"{method} {url}")
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = super().send(request, **kwargs)
+        span = tracing.current_span()
+        if span is not None:
+            # Bytes of every attempt, streamed bodies are counted by the caller
+            length = request.headers.get("Content-Length")
+            if length is not None:
+                span.request_bytes = (span.request_bytes or 0) + int(length)
+            if not kwargs.get("stream"):
+                span.add_response_bytes(len(response.content))
+            span.status = response.status_code
+        return response
+
+
+def _persisted_query_error(errors: list) -> str:
+    """Name of the persisted query error in GraphQL errors, empty if there is none"""
+    for error in errors or []:
+        message = error.get("message", "") if isinstance(error, dict) else ""
+        if message in ("PersistedQueryNotFound", "PersistedQueryNotSupported"):
+            return message
+    return ""
+
+
+class SessionHTTPTransport(RequestsHTTPTransport):
+    """GraphQL HTTP transport that runs on a session owned by the client.
+
+    `RequestsHTTPTransport` creates and closes a new `requests.Session` around
+    every execution, discarding its open connections. This transport reuses
+    the given session instead and leaves closing it to the owner.
+
+    With `compress` set, request bodies of at least that many bytes are
+    gzipped (see `PooledSession.request`).
+
+    With `persisted_queries` the transport uses automatic persisted queries:
+    only the SHA-256 hash of a document is sent, and the full query is sent
+    once when the server answers `PersistedQueryNotFound`. If the server
+    does not support them the transport falls back to sending full queries.
+
+    `execute_stream` sends queries the same way, but decodes the response
+    as it arrives.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        persisted_queries: bool = False,
+        compress: int = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.shared_session = session
+        self.persisted_queries = persisted_queries
+        self.compress = compress
+        self._hashes = weakref.WeakKeyDictionary()
+        # Hashes of the queries the server is known to have persisted
+        self._persisted = set()
+
+    def connect(self):
+        self.session = self.shared_session
+
+    def close(self):
+        pass
+
+    def query_hash(self, document: DocumentNode):
+        """Query string and hash of a document, computed once per document"""
+        hashed = self._hashes.get(document)
+        if hashed is None:
+            query = print_ast(document)
+            digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+            hashed = self._hashes[document] = (query, digest)
+        return hashed
+
+    def execute(
+        self,
+        document: DocumentNode,
+        variable_values=None,
+        operation_name=None,
+        *args,
+        **kwargs,
+    ) -> ExecutionResult:
+        if isinstance(self.shared_session, PooledSession):
+            # Queries can be retried, mutations only if the policy allows it
+            operation = get_operation_ast(document, operation_name)
+            query = operation is not None and operation.operation == OperationType.QUERY
+            kwargs["extra_args"] = {
+                **(kwargs.get("extra_args") or {}),
+                "idempotent": query,
+                "compress": self.compress,
+            }
+
+        if not self.persisted_queries or kwargs.get("upload_files"):
+            return super().execute(
+                document, variable_values, operation_name, *args, **kwargs
+            )
+
+        query, digest = self.query_hash(document)
+        payload = {
+            "extensions": {"persistedQuery": {"version": 1, "sha256Hash": digest}}
+        }
+        if operation_name:
+            payload["operationName"] = operation_name
+        if variable_values:
+            payload["variables"] = variable_values
+
+        # The payload replaces the body the base transport builds
+        extra_args = {**(kwargs.pop("extra_args", None) or {}), "json": payload}
+        result = super().execute(
+            document,
+            variable_values,
+            operation_name,
+            *args,
+            extra_args=extra_args,
+            **kwargs,
+        )
+
+        error = _persisted_query_error(result.errors)
+        if error == "PersistedQueryNotSupported":
+            self.persisted_queries = False
+        if error:
+            payload["query"] = query
+            result = super().execute(
+                document,
+                variable_values,
+                operation_name,
+                *args,
+                extra_args=extra_args,
+                **kwargs,
+            )
+        if not _persisted_query_error(result.errors):
+            self._persisted.add(digest)
+        return result
+
+    def execute_stream(
+        self,
+        document: DocumentNode,
+        path: Sequence[str],
+        variable_values: dict = None,
+        operation_name: str = None,
+    ) -> Iterator[Any]:
+        """Executes a document, yielding the items of the list at `path`.
+
+        Errors are raised like `execute` and `Client.execute` do: GraphQL
+        errors as `TransportQueryError`, after the items that arrived, and
+        other failed responses as `TransportServerError`. A query the server
+        has not persisted yet is sent in full along with its hash.
+        """
+        query, digest = self.query_hash(document)
+        payload = {}
+        if operation_name:
+            payload["operationName"] = operation_name
+        if variable_values:
+            payload["variables"] = variable_values
+        extra_args = {"stream": True}
+        if isinstance(self.shared_session, PooledSession):
+            operation = get_operation_ast(document, operation_name)
+            query_operation = (
+                operation is not None and operation.operation == OperationType.QUERY
+            )
+            extra_args.update(idempotent=query_operation, compress=self.compress)
+
+        while True:
+            hashed = self.persisted_queries and digest in self._persisted
+            if self.persisted_queries:
+                payload["extensions"] = {
+                    "persistedQuery": {"version": 1, "sha256Hash": digest}
+                }
+            payload.pop("query", None)
+            if not hashed:
+                payload["query"] = query
+
+            yielded = False
+            try:
+                for item in self._stream_items(payload, path, extra_args):
+                    yielded = True
+                    yield item
+            except TransportQueryError as e:
+                error = _persisted_query_error(e.errors)
+                if yielded or not (error and self.persisted_queries):
+                    raise
+                # Evicted or unsupported, sent again in full without the hash
+                # if the server does not support persisted queries at all
+                if error == "PersistedQueryNotSupported":
+                    self.persisted_queries = False
+                    payload.pop("extensions")
+                elif not hashed:
+                    raise
+                self._persisted.discard(digest)
+                continue
+            if self.persisted_queries:
+                self._persisted.add(digest)
+            return
+
+    def _stream_items(
+        self, payload: dict, path: Sequence[str], extra_args: dict
+    ) -> Iterator[Any]:
+        response = self.shared_session.request(
+            self.method,
+            self.url,
+            json=payload,
+            headers=self.headers,
+            auth=self.auth,
+            cookies=self.cookies,
+            timeout=self.default_timeout,
+            verify=self.verify,
+            **self.kwargs,
+            **extra_args,
+        )
+        with response:
+            if response.status_code >= 400:
+                _raise_for_result(response)
+            chunks = response.iter_content(STREAM_CHUNK_SIZE)
+            span = tracing.current_span()
+            if span is not None:
+                chunks = _counted(chunks, span)
+            yield from iter_json_array(chunks, ["data", *path])
+
+
+def _raise_for_result(response: requests.Response) -> None:
+    """Raises the GraphQL errors of a failed response, or its HTTP error"""
+    try:
+        result = response.json()
+    except ValueError:
+        result = None
+    if isinstance(result, dict) and result.get("errors"):
+        errors = result["errors"]
+        raise TransportQueryError(
+            str(errors[0]), errors=errors, data=result.get("data")
+        )
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        raise TransportServerError(str(e), e.response.status_code) from e
+
+
+def _counted(chunks: Iterator[bytes], span: tracing.Span) -> Iterator[bytes]:
+    for chunk in chunks:
+        span.add_response_bytes(len(chunk))
+        yield chunk
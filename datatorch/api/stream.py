@@ -0,0 +1,133 @@
+import json
+import codecs
+
+from typing import Any, Iterable, Iterator, List, Sequence
+
+from gql.transport.exceptions import TransportQueryError
+
+__all__ = "iter_json_array"
+
+
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader(object):
+    """Text buffer over byte chunks, trimmed as values are consumed"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.decoder_json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.eof = True
+            self.buffer += self.decoder.decode(b"", final=True)
+            return True
+        # Drop consumed text so the buffer only holds the current value
+        self.buffer = self.buffer[self.pos :] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer):
+                if self.buffer[self.pos] not in _WHITESPACE:
+                    return self.buffer[self.pos]
+                self.pos += 1
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at position {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decodes the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder_json.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow the pending text geometrically so large values are not
+            # rescanned from their start for every chunk
+            pending = len(self.buffer) - self.pos
+            while self._fill() and len(self.buffer) - self.pos < pending * 2:
+                pass
+
+
+def iter_json_array(chunks: Iterable[bytes], path: Sequence[str]) -> Iterator[Any]:
+    """Yields the items of the array at `path` of a streamed JSON object.
+
+    Only the item being decoded and the unread part of the last chunk are
+    held in memory, however large the array is. Values before and after the
+    array are skipped, except a top level GraphQL `errors` array which is
+    raised as a `TransportQueryError` once the stream ends.
+
+    A missing or null value at `path` yields nothing.
+
+        >>> list(iter_json_array([b'{"data": {"nodes": [1, 2]}}'], ["data", "nodes"]))
+        [1, 2]
+    """
+    reader = _Reader(chunks)
+    errors = []
+    yield from _iter_object(reader, list(path), errors, top=True)
+    if errors:
+        raise TransportQueryError(str(errors[0]), errors=errors)
+
+
+def _iter_object(reader: _Reader, path: List[str], errors: list, top=False):
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        char = reader.peek()
+        if path and key == path[0] and char in "{[":
+            if len(path) == 1 and char == "[":
+                yield from _iter_array(reader)
+            elif len(path) > 1 and char == "{":
+                yield from _iter_object(reader, path[1:], errors)
+            else:
+                reader.value()
+        else:
+            value = reader.value()
+            if top and key == "errors" and value:
+                errors.extend(value)
+        char = reader.peek()
+        reader.pos += 1
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or '}}' at position {reader.pos - 1}")
+
+
+def _iter_array(reader: _Reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        char = reader.peek()
+        reader.pos += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or ']' at position {reader.pos - 1}")
@@ -0,0 +1,303 @@
+import json
+import math
+import time
+import threading
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import IO, Dict, Iterable, Iterator, List, Optional, TypeVar, Union
+
+__all__ = (
+    "Span",
+    "Tracer",
+    "TraceAggregator",
+    "JsonlTracer",
+    "add_tracer",
+    "remove_tracer",
+    "trace",
+    "current_span",
+)
+
+
+class Span(object):
+    """Timing of a single API call, passed to every registered `Tracer`.
+
+    `kind` is `graphql`, `upload` or `download`. For GraphQL calls `name` is
+    the operation name and `variables_bytes` the size of its JSON encoded
+    variables. Byte counts are None when they are not known, such as
+    responses read as a stream by the caller.
+    """
+
+    __slots__ = (
+        "name",
+        "kind",
+        "started_at",
+        "elapsed",
+        "variables_bytes",
+        "request_bytes",
+        "response_bytes",
+        "status",
+        "retries",
+        "error",
+    )
+
+    def __init__(self, name: str, kind: str):
+        self.name = name
+        self.kind = kind
+        self.started_at = time.time()
+        self.elapsed = 0.0
+        self.variables_bytes: Optional[int] = None
+        self.request_bytes: Optional[int] = None
+        self.response_bytes: Optional[int] = None
+        self.status: Optional[int] = None
+        self.retries = 0
+        self.error: Optional[str] = None
+
+    def add_response_bytes(self, size: int) -> None:
+        self.response_bytes = (self.response_bytes or 0) + size
+
+    def dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return f"Span({self.kind} {self.name!r}, {self.elapsed * 1000:.1f}ms)"
+
+
+class Tracer(object):
+    """Receives the spans of API calls, see `add_tracer`.
+
+    Both hooks are called on the thread making the call, so they should be
+    quick and thread safe.
+    """
+
+    def start(self, span: Span) -> None:
+        pass
+
+    def end(self, span: Span) -> None:
+        pass
+
+
+T = TypeVar("T")
+
+_tracers: List[Tracer] = []
+_lock = threading.Lock()
+_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def add_tracer(tracer: Tracer) -> Tracer:
+    """Registers `tracer` for every API call of the process"""
+    global _tracers
+    with _lock:
+        # Replaced rather than mutated so calls in flight keep a stable list
+        _tracers = [*_tracers, tracer]
+    return tracer
+
+
+def remove_tracer(tracer: Tracer) -> None:
+    global _tracers
+    with _lock:
+        _tracers = [t for t in _tracers if t is not tracer]
+
+
+@contextmanager
+def trace(*tracers: Tracer) -> Iterator[None]:
+    """Registers `tracers` for the API calls made within the block"""
+    for tracer in tracers:
+        add_tracer(tracer)
+    try:
+        yield
+    finally:
+        for tracer in tracers:
+            remove_tracer(tracer)
+
+
+def active() -> bool:
+    """True if any tracer is registered"""
+    return bool(_tracers)
+
+
+def current_span() -> Optional[Span]:
+    """Span of the API call running in this thread or task, if traced"""
+    return _span.get()
+
+
+@contextmanager
+def span(name: str, kind: str, current: bool = True) -> Iterator[Optional[Span]]:
+    """Traces the API call made within the block.
+
+    Yields None when no tracer is registered, so untraced calls pay no more
+    than a list lookup. With `current=False` the span is not made the
+    `current_span` of the block, for blocks that yield to other code such as
+    generators, see `iterate`.
+    """
+    tracers = _tracers
+    if not tracers:
+        yield None
+        return
+
+    set_current, current = current, Span(name, kind)
+    for tracer in tracers:
+        tracer.start(current)
+    # Restored rather than reset with a token, since the block can be a
+    # generator that is closed from another context
+    previous = _span.get()
+    if set_current:
+        _span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.elapsed = time.perf_counter() - start
+        if set_current:
+            _span.set(previous)
+        for tracer in tracers:
+            tracer.end(current)
+
+
+def iterate(span: Optional[Span], items: Iterable[T]) -> Iterator[T]:
+    """Yields `items` with `span` current only while each item is read.
+
+    Code the caller runs between items, such as other API calls, is then
+    not counted in the span as it would be if the span stayed current.
+    """
+    if span is None:
+        yield from items
+        return
+    items = iter(items)
+    try:
+        while True:
+            previous = _span.get()
+            _span.set(span)
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                _span.set(previous)
+            yield item
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest rank percentile of sorted `values`"""
+    rank = math.ceil(percent / 100 * len(values))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+class _Operation(object):
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.errors = 0
+
+
+class TraceAggregator(Tracer):
+    """Collects latency percentiles and bytes sent per operation.
+
+    >>> aggregator = TraceAggregator()
+    >>> with trace(aggregator):
+    ...     import_coco(...)
+    >>> print(aggregator.summary())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations: Dict[tuple, _Operation] = {}
+
+    def end(self, span: Span) -> None:
+        with self._lock:
+            operation = self.operations.get((span.kind, span.name))
+            if operation is None:
+                operation = self.operations[(span.kind, span.name)] = _Operation()
+            operation.latencies.append(span.elapsed)
+            operation.request_bytes += span.request_bytes or 0
+            operation.response_bytes += span.response_bytes or 0
+            operation.retries += span.retries
+            operation.errors += span.error is not None
+
+    def stats(self) -> List[dict]:
+        """Statistics of each operation, slowest in total first"""
+        with self._lock:
+            items = list(self.operations.items())
+        rows = []
+        for (kind, name), operation in items:
+            latencies = sorted(operation.latencies)
+            rows.append(
+                {
+                    "kind": kind,
+                    "name": name,
+                    "calls": len(latencies),
+                    "total": sum(latencies),
+                    "p50": _percentile(latencies, 50),
+                    "p95": _percentile(latencies, 95),
+                    "p99": _percentile(latencies, 99),
+                    "sent": operation.request_bytes,
+                    "received": operation.response_bytes,
+                    "retries": operation.retries,
+                    "errors": operation.errors,
+                }
+            )
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def summary(self) -> str:
+        """Table of `stats`, latencies in milliseconds"""
+        rows = self.stats()
+        if not rows:
+            return "No API calls."
+        width = max(len(row["name"]) for row in rows) + 2
+        lines = [
+            f"{'operation':<{width}}{'calls':>7}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'sent':>10}{'received':>10}{'retries':>9}{'errors':>8}"
+        ]
+        for row in rows:
+            lines.append(
+                f"{row['name']:<{width}}{row['calls']:>7}"
+                f"{row['p50'] * 1000:>9.1f}{row['p95'] * 1000:>9.1f}"
+                f"{row['p99'] * 1000:>9.1f}"
+                f"{_format_bytes(row['sent']):>10}"
+                f"{_format_bytes(row['received']):>10}"
+                f"{row['retries']:>9}{row['errors']:>8}"
+            )
+        return "\n".join(lines)
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+class JsonlTracer(Tracer):
+    """Writes every span as a line of JSON to `file`.
+
+    Args:
+        file: path of the trace file, or an open text file which is left
+            open on `close`.
+    """
+
+    def __init__(self, file: Union[str, IO]):
+        self._lock = threading.Lock()
+        self._owned = isinstance(file, str)
+        self.file = open(file, "a") if isinstance(file, str) else file
+
+    def end(self, span: Span) -> None:
+        line = json.dumps(span.dict())
+        with self._lock:
+            self.file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._owned:
+                self.file.close()
+            else:
+                self.file.flush()
@@ -0,0 +1,88 @@
+import time
+
+from typing import List, Optional
+
+__all__ = "TransferResult", "TransferReport"
+
+
+class TransferResult(object):
+    """Outcome of transferring a single file"""
+
+    def __init__(
+        self,
+        path: str,
+        success: bool,
+        size: int = 0,
+        elapsed: float = 0.0,
+        error: Optional[Exception] = None,
+        folder: Optional[str] = None,
+        skipped: bool = False,
+    ):
+        self.path = path
+        self.success = success
+        self.size = size
+        self.elapsed = elapsed
+        self.error = error
+        self.folder = folder
+        self.skipped = skipped
+
+    def __repr__(self):
+        status = "ok" if self.success else f"failed: {self.error}"
+        if self.skipped:
+            status = "skipped"
+        return f"TransferResult({self.path!r}, {status})"
+
+
+class TransferReport(object):
+    """Per file results and throughput of a bulk transfer"""
+
+    def __init__(self):
+        self.results: List[TransferResult] = []
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    def add(self, result: TransferResult) -> None:
+        self.results.append(result)
+
+    def finish(self) -> "TransferReport":
+        self.finished_at = time.monotonic()
+        return self
+
+    @property
+    def succeeded(self) -> List[TransferResult]:
+        return [r for r in self.results if r.success and not r.skipped]
+
+    @property
+    def skipped(self) -> List[TransferResult]:
+        """Files that were already transferred by an earlier run"""
+        return [r for r in self.results if r.skipped]
+
+    @property
+    def failed(self) -> List[TransferResult]:
+        return [r for r in self.results if not r.success]
+
+    @property
+    def size(self) -> int:
+        """Total bytes transferred by successful transfers"""
+        return sum(r.size for r in self.succeeded)
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at or time.monotonic()
+        return end - self.started_at
+
+    @property
+    def files_per_second(self) -> float:
+        return len(self.succeeded) / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.succeeded)} succeeded, {len(self.failed)} failed, "
+            f"{len(self.skipped)} skipped "
+            f"in {self.elapsed:.1f}s ({self.files_per_second:.1f} files/s, "
+            f"{self.bytes_per_second / 1e6:.2f} MB/s)"
+        )
@@ -0,0 +1,330 @@
+import os
+import glob
+import json
+import hashlib
+import functools
+import logging
+import pathlib
+import threading
+
+from typing import IO, Optional, Set
+
+import requests
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+
+from datatorch.core import Settings, folder
+
+from .retry import IDEMPOTENT_METHODS, RetryPolicy
+
+import mimetypes
+
+__all__ = (
+    "SniffedFile",
+    "multipart_encoder",
+    "ChunkedUploader",
+    "FolderManifest",
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+SNIFF_SIZE = 2048
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+PART_RETRIES = 3
+
+
+def uploads_dir() -> str:
+    """Directory where the state of resumable uploads is kept"""
+    return os.path.join(folder.get_app_dir(), "uploads")
+
+
+def file_key(path: str, *context) -> str:
+    """Identifies the content of a file on disk along with where it is uploaded.
+
+    Size and modification time are included so a file that changed since it
+    was recorded is uploaded again.
+    """
+    stat = os.stat(path)
+    parts = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns, *context]
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def guess_mimetype(buffer: bytes, name: str) -> Optional[str]:
+    magic = _magic()
+    if magic:
+        return magic.from_buffer(buffer, mime=True)
+    return mimetypes.guess_type(name)[0]
+
+
+@functools.lru_cache(maxsize=None)
+def _magic():
+    """python-magic if installed, imported on first use as it loads libmagic"""
+    try:
+        import magic
+    except ImportError:
+        return None
+    return magic
+
+
+def _remaining_size(file: IO) -> Optional[int]:
+    """Bytes left to read from the current position, None if unknown"""
+    try:
+        position = file.tell()
+    except (AttributeError, OSError):
+        position = 0
+    try:
+        return os.fstat(file.fileno()).st_size - position
+    except (AttributeError, OSError):
+        pass
+    try:
+        end = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return end - position
+    except (AttributeError, OSError):
+        return None
+
+
+class SniffedFile(object):
+    """Read-only view of a file that keeps the first bytes in memory.
+
+    The leading `SNIFF_SIZE` bytes are read once to detect the mimetype and are
+    then served again from the same buffer, so the file never has to seek
+    back. Reads after the buffer go straight to the underlying file in
+    whatever chunk size the caller requests.
+    """
+
+    def __init__(self, file: IO, sniff_size: int = SNIFF_SIZE):
+        self.file = file
+        self.name = getattr(file, "name", "file")
+        self.size = _remaining_size(file)
+        if self.size is None:
+            raise ValueError(f"Unable to determine the size of '{self.name}'.")
+        self._buffer = file.read(sniff_size)
+        self._position = 0
+
+    @property
+    def len(self) -> int:
+        """Bytes left to read"""
+        return self.size - self._position
+
+    @property
+    def mimetype(self) -> Optional[str]:
+        return guess_mimetype(self._buffer, self.name)
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        buffered = len(self._buffer)
+        if self._position < buffered:
+            end = buffered if size is None or size < 0 else self._position + size
+            chunk = self._buffer[self._position : end]
+            self._position += len(chunk)
+            return chunk
+
+        chunk = self.file.read(size)
+        self._position += len(chunk)
+        return chunk
+
+
+def multipart_encoder(file: IO, field: str = "file") -> MultipartEncoder:
+    """Creates a streaming multipart body for uploading `file`.
+
+    Unlike `requests`' `files=` argument the body is not built in memory, it is
+    read from the file in chunks while being sent.
+    """
+    sniffed = SniffedFile(file)
+    filename = os.path.basename(sniffed.name)
+    return MultipartEncoder(fields={field: (filename, sniffed, sniffed.mimetype)})
+
+
+def glob_root(pattern: str) -> str:
+    """Folder a glob pattern matches files in, its path before any wildcard"""
+    parts = []
+    for part in pathlib.PurePath(pattern).parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.path.join(*parts) if parts else os.curdir
+
+
+class FolderManifest(object):
+    """Append only record of files uploaded by a folder upload.
+
+    Lets a rerun of an interrupted folder upload skip the files that already
+    completed. Entries are keys created by `key`, from the path of a file
+    relative to the uploaded folder `root`, so they do not depend on the
+    storage folder a file is sharded into.
+    """
+
+    def __init__(self, path: str, root: str = os.curdir):
+        self.path = path
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        self.done: Set[str] = set()
+        try:
+            with open(path) as f:
+                self.done = set(line.strip() for line in f if line.strip())
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def for_upload(cls, root: str, *context) -> "FolderManifest":
+        """Manifest shared by all runs uploading `root` to the same destination"""
+        parts = [os.path.abspath(root), *context]
+        name = hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+        directory = uploads_dir()
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, f"folder-{name}.log"), root)
+
+    def key(self, path: str) -> str:
+        """Identifies a file of the folder along with its size and modification time"""
+        stat = os.stat(path)
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        parts = [relative.replace(os.sep, "/"), stat.st_size, stat.st_mtime_ns]
+        return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self.done.add(key)
+            with open(self.path, "a") as f:
+                f.write(key + "\n")
+
+
+class ChunkedUploader(object):
+    """Uploads a file in fixed size parts that can be resumed.
+
+    Protocol, relative to the storage upload endpoint
+    `{api}/file/v1/upload/{storageId}`:
+
+    - `POST /sessions` with the upload query string and a JSON body of
+      `name`, `size`, `mimetype` and `partSize` starts a session and returns
+      its `id`.
+    - `GET /sessions/{id}` returns the acknowledged part numbers as `parts`.
+    - `PUT /sessions/{id}/parts/{n}` uploads part `n` with a `Content-Range`
+      header. Parts are idempotent and are retried individually.
+    - `POST /sessions/{id}/complete` assembles the file.
+
+    Requests are retried by `retry`, the policy of a `PooledSession` by
+    default: parts and session lookups on transient
+    errors, while the `POST` requests are only repeated when the server
+    rejected them unprocessed. Other client errors fail immediately.
+
+    The session id and acknowledged parts are saved to a local manifest after
+    every part, so running the same upload again continues from the last
+    acknowledged part instead of from the start.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        endpoint: str,
+        headers: dict = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        retry: RetryPolicy = None,
+        manifest_dir: str = None,
+    ):
+        self.session = session
+        self.endpoint = endpoint
+        self.headers = headers or {}
+        self.part_size = part_size
+        # The client's policy, so its circuit breaker also covers uploads
+        self.retry = (
+            retry or getattr(session, "retry", None) or RetryPolicy(PART_RETRIES)
+        )
+        self.manifest_dir = manifest_dir or uploads_dir()
+
+    def _url(self, *path) -> str:
+        return "/".join([self.endpoint.rstrip("/"), "sessions", *map(str, path)])
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("headers", self.headers)
+
+        def send() -> requests.Response:
+            # A single attempt, so retries of the session do not add up
+            return requests.Session.request(self.session, method, url, **kwargs)
+
+        idempotent = method in IDEMPOTENT_METHODS
+        return self.retry.call(send, idempotent, f"{method} {url}")
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        r = self._send(method, url, **kwargs)
+        r.raise_for_status()
+        return r
+
+    def _acknowledged(self, session_id: str) -> Optional[Set[int]]:
+        """Parts the server has, None if the session no longer exists"""
+        r = self._send("GET", self._url(session_id))
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return set(r.json().get("parts", []))
+
+    def upload(self, file: IO, params: dict = None) -> requests.Response:
+        """Uploads `file` from its start, resuming a previous attempt if any"""
+        path = getattr(file, "name", None)
+        name = os.path.basename(path) if isinstance(path, str) else "file"
+        size = os.fstat(file.fileno()).st_size
+        parts = max((size + self.part_size - 1) // self.part_size, 1)
+
+        manifest = None
+        if isinstance(path, str) and os.path.isfile(path):
+            key = file_key(path, self.endpoint, params, self.part_size)
+            manifest = Settings(self.manifest_dir, f"{key}.json")
+
+        session_id = manifest.get("sessionId") if manifest else None
+        done: Set[int] = set()
+        if session_id is not None:
+            done = self._acknowledged(session_id)
+            if done is None:
+                logger.info(f"Upload session for {name} expired, restarting.")
+                session_id, done = None, set()
+            else:
+                logger.info(f"Resuming {name} from part {len(done)}/{parts}.")
+
+        if session_id is None:
+            file.seek(0)
+            mimetype = guess_mimetype(file.read(SNIFF_SIZE), name)
+            r = self._request(
+                "POST",
+                self._url(),
+                params=params,
+                json={
+                    "name": name,
+                    "size": size,
+                    "mimetype": mimetype,
+                    "partSize": self.part_size,
+                },
+            )
+            session_id = r.json()["id"]
+            if manifest:
+                manifest.set("sessionId", session_id)
+
+        for part in range(parts):
+            if part in done:
+                continue
+            start = part * self.part_size
+            file.seek(start)
+            data = file.read(self.part_size)
+            end = start + len(data) - 1
+            self._request(
+                "PUT",
+                self._url(session_id, "parts", part),
+                data=data,
+                headers={
+                    **self.headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                },
+            )
+            done.add(part)
+            if manifest:
+                manifest.set("parts", sorted(done))
+
+        r = self._request("POST", self._url(session_id, "complete"))
+        if manifest:
+            os.remove(manifest.file)
+        return r
@@ -1,26 +1,17 @@
+import importlib
+
 from typing import List
 from .client import Client
-from .entity.base import BaseEntity
 
 
 def map_entities(entities: List[object], EntityClass, client: Client = None) -> list:
     return list(map(lambda d: EntityClass(d, client), entities))
 
 
-class Bulk(object):
-    __slot__ = ("entities",)
-
-    entities: List[BaseEntity]
-
-    def add(self, entity):
-        self.entities.append(entity)
-        return self
-
-    def save(self):
-        pass
-
-    def delete(self):
-        pass
-
-    def create(self):
-        pass
+def __getattr__(name: str):
+    # Imported on use, since the entities `bulk` imports depend on this module
+    if name not in ("Bulk", "BulkError"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(".bulk", __package__), name)
+    globals()[name] = value
+    return value
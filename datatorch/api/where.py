@@ -14,7 +14,8 @@ operators = {
     "gt",
     "gte",
     "lt",
-    "lte" "like",
+    "lte",
+    "like",
     "starts_with",
     "ends_with",
 }
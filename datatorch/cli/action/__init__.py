@@ -1,15 +1,16 @@
 import click
 
-from .create import create
-from .pull import pull
-from .run import run
+from ..lazy import LazyGroup
 
 
-@click.group(help="Commands for managing actions.")
+@click.group(
+    help="Commands for managing actions.",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "create": "datatorch.cli.action.create:create",
+        "pull": "datatorch.cli.action.pull:pull",
+        "run": "datatorch.cli.action.run:run",
+    },
+)
 def action():
     pass
-
-
-action.add_command(create)
-action.add_command(pull)
-action.add_command(run)
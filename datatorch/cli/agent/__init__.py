@@ -1,15 +1,16 @@
 import click
 
-from .start import start
-from .create import create
-from .dir import dir
+from ..lazy import LazyGroup
 
 
-@click.group(help="Commands for managing agents.")
+@click.group(
+    help="Commands for managing agents.",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "start": "datatorch.cli.agent.start:start",
+        "create": "datatorch.cli.agent.create:create",
+        "dir": "datatorch.cli.agent.dir:dir",
+    },
+)
 def agent():
     pass
-
-
-agent.add_command(start)
-agent.add_command(create)
-agent.add_command(dir)
@@ -1,34 +1,37 @@
+import os
 import click
 
-from datatorch.utils.package import get_version
-
-# from .main.agent import agent
-from .main.login import login
-from .main.logout import logout
-from .main.upgrade import package_upgrade
-from .main.version import version
-
-from .agent import agent
-from .pipeline import pipeline
-from .action import action
-from .import_cmds import import_cmd
-from .upload import upload
-
-
-@click.group()
-@click.version_option(prog_name="DataTorch", version=get_version())
-def main():
-    pass
-
-
-main.add_command(login)
-main.add_command(logout)
-main.add_command(version)
-main.add_command(package_upgrade)
-
-main.add_command(pipeline)
-main.add_command(agent)
-main.add_command(action)
-main.add_command(import_cmd)
-
-main.add_command(upload)
+from datatorch.core import env
+from .lazy import LazyGroup
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "login": "datatorch.cli.main.login:login",
+        "logout": "datatorch.cli.main.logout:logout",
+        "version": "datatorch.cli.main.version:version",
+        "upgrade": "datatorch.cli.main.upgrade:package_upgrade",
+        "pipeline": "datatorch.cli.pipeline:pipeline",
+        "agent": "datatorch.cli.agent:agent",
+        "action": "datatorch.cli.action:action",
+        "import": "datatorch.cli.import_cmds:import_cmd",
+        "upload": "datatorch.cli.upload:upload",
+    },
+)
+@click.version_option(prog_name="DataTorch", package_name="datatorch")
+@click.option(
+    "--no-schema",
+    is_flag=True,
+    help="Skip loading the GraphQL schema used to validate queries locally.",
+)
+@click.option(
+    "--compress",
+    is_flag=True,
+    help="Gzip large requests, such as annotations with many points.",
+)
+def main(no_schema, compress):
+    if no_schema:
+        os.environ[env.NO_SCHEMA] = "1"
+    if compress:
+        os.environ[env.COMPRESS] = "1"
@@ -1,13 +1,16 @@
 import click
 
-from .coco import coco_cmd
-from .pixmask import pixmask_cmd
+from ..lazy import LazyGroup
 
 
-@click.group("import", help="Commands for importing annotations.")
+@click.group(
+    "import",
+    help="Commands for importing annotations.",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "coco": "datatorch.cli.import_cmds.coco:coco_cmd",
+        "pixmask": "datatorch.cli.import_cmds.pixmask:pixmask_cmd",
+    },
+)
 def import_cmd():
     pass
-
-
-import_cmd.add_command(coco_cmd)
-import_cmd.add_command(pixmask_cmd)
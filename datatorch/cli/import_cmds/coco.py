@@ -1,5 +1,7 @@
 import click
 
+from ..trace import traced
+
 
 @click.command("coco", help="Import a COCO formated file.")
 @click.option(
@@ -46,8 +48,31 @@ import click
     default=False,
     help="Flag to enable to import of coco bounding boxes.",
 )
-def coco_cmd(file, project, max_iou, no_segmentations, import_bbox, simplify):
+@click.option(
+    "--precision",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Round segmentation coordinates to this many decimals.",
+)
+@click.option(
+    "--flat-paths",
+    is_flag=True,
+    default=False,
+    help="Send segmentations as flat coordinate arrays. Requires server support.",
+)
+@traced
+def coco_cmd(
+    file,
+    project,
+    max_iou,
+    no_segmentations,
+    import_bbox,
+    simplify,
+    precision,
+    flat_paths,
+):
     from datatorch.api.scripts.import_coco import import_coco
+    from datatorch.utils.converters import FLAT, POINTS
 
     import_coco(
         file,
@@ -56,4 +81,6 @@ def coco_cmd(file, project, max_iou, no_segmentations, import_bbox, simplify):
         import_segmentation=no_segmentations,
         max_iou=max_iou,
         simplify_tolerance=simplify,
+        precision=precision,
+        path_encoding=FLAT if flat_paths else POINTS,
     )
@@ -1,5 +1,7 @@
 import click
 
+from ..trace import traced
+
 
 @click.command(
     "pixmask", help="Import pixel masks from a folder as polygon annotations."
@@ -70,8 +72,24 @@ import click
     default=False,
     help="Skip files that already have annotations.",
 )
+@click.option(
+    "--flat-paths",
+    is_flag=True,
+    default=False,
+    help="Send polygons as flat coordinate arrays. Requires server support.",
+)
+@traced
 def pixmask_cmd(
-    folder, project, label, suffix, base_path, simplify, min_area, invert, skip
+    folder,
+    project,
+    label,
+    suffix,
+    base_path,
+    simplify,
+    min_area,
+    invert,
+    skip,
+    flat_paths,
 ):
     """Import pixel masks from a folder into DataTorch as polygon annotations.
 
@@ -105,6 +123,7 @@ def pixmask_cmd(
     $ datatorch import pixmask -f ./masks -p myproject -l "nail" --skip
     """
     from datatorch.api.scripts.import_pixmask import import_pixmask
+    from datatorch.utils.converters import FLAT, POINTS
 
     import_pixmask(
         mask_folder=folder,
@@ -116,4 +135,5 @@ def pixmask_cmd(
         min_area=min_area,
         invert_mask=invert,
         skip_annotated=skip,
+        path_encoding=FLAT if flat_paths else POINTS,
     )
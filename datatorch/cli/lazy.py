@@ -0,0 +1,29 @@
+import importlib
+
+from typing import Dict, List, Optional
+
+import click
+
+__all__ = "LazyGroup"
+
+
+class LazyGroup(click.Group):
+    """Group that imports its subcommands when they are first used.
+
+    `lazy_subcommands` maps command names to `"module:attribute"` paths, so
+    running one command only loads that command's modules.
+    """
+
+    def __init__(self, *args, lazy_subcommands: Dict[str, str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx: click.Context, name: str) -> Optional[click.Command]:
+        if name in self.lazy_subcommands and name not in self.commands:
+            module, attribute = self.lazy_subcommands[name].split(":")
+            command = getattr(importlib.import_module(module), attribute)
+            self.add_command(command, name)
+        return super().get_command(ctx, name)
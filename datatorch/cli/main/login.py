@@ -1,7 +1,6 @@
 import click
 
 from datatorch.core import BASE_URL, user_settings
-from datatorch.api import ApiClient
 from ..spinner import Spinner
 from .logout import logout
 
@@ -50,6 +49,8 @@ def login(key, host, no_web, relogin):  # type: ignore
     user_settings.api_url = host
     user_settings.api_key = key
 
+    from datatorch.api import ApiClient
+
     spinner = Spinner("Validating API key")
     try:
         api = ApiClient()
@@ -1,15 +1,15 @@
 import click
 
-from .run import run
-from .generate import generate
-from .upload import upload
+from ..lazy import LazyGroup
 
 
-@click.group()
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "run": "datatorch.cli.pipeline.run:run",
+        "generate": "datatorch.cli.pipeline.generate:generate",
+        "upload": "datatorch.cli.pipeline.upload:upload",
+    },
+)
 def pipeline():
     pass
-
-
-pipeline.add_command(run)  # type: ignore
-pipeline.add_command(generate)  # type: ignore
-pipeline.add_command(upload)  # type: ignore
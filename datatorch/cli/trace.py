@@ -0,0 +1,34 @@
+import functools
+
+import click
+
+from datatorch.api.tracing import JsonlTracer, TraceAggregator, trace
+
+
+def traced(command):
+    """Adds a `--trace` option and prints API call timings after `command`"""
+
+    @click.option(
+        "--trace",
+        "trace_file",
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        help="Write the timing of every API call to this file as JSON lines.",
+    )
+    @functools.wraps(command)
+    def wrapper(*args, trace_file=None, **kwargs):
+        aggregator = TraceAggregator()
+        tracers = [aggregator]
+        if trace_file:
+            tracers.append(JsonlTracer(trace_file))
+        try:
+            with trace(*tracers):
+                return command(*args, **kwargs)
+        finally:
+            for tracer in tracers[1:]:
+                tracer.close()
+            if aggregator.operations:
+                click.echo("\nAPI calls (ms):")
+                click.echo(aggregator.summary())
+
+    return wrapper
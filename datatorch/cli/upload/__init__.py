@@ -1,10 +1,14 @@
 import click
-from .folder import folder
 
+from ..lazy import LazyGroup
 
-@click.group(help="Commands for managing uploads.")
+
+@click.group(
+    help="Commands for managing uploads.",
+    cls=LazyGroup,
+    lazy_subcommands={
+        "folder": "datatorch.cli.upload.folder:folder",
+    },
+)
 def upload():
     pass
-
-
-upload.add_command(folder)
@@ -2,22 +2,52 @@ import os
 import click
 from datatorch.core.settings import UserSettings
 from datatorch.api.api import ApiClient
-from datatorch.api.entity.project import Project
+from datatorch.api.upload import FolderManifest
 from ..spinner import Spinner
+from ..trace import traced
 
 
 @click.command("folder")
 @click.argument("folder_path", type=click.Path(exists=True, file_okay=False))
 @click.argument("project_id", type=str)
-def folder(folder_path, project_id):
+@click.option(
+    "-c",
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Number of files to upload at the same time.",
+)
+@click.option(
+    "-r",
+    "--recursive",
+    is_flag=True,
+    default=False,
+    help="Include files in subfolders.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Skip files uploaded by an earlier run with --resume.",
+)
+@traced
+def folder(folder_path, project_id, concurrency, recursive, resume):
     """Bulk upload files to a specified project."""
 
     # Get the list of files to upload
-    files = [
-        f
-        for f in os.listdir(folder_path)
-        if os.path.isfile(os.path.join(folder_path, f))
-    ]
+    if recursive:
+        files = [
+            os.path.join(root, f)
+            for root, _, names in os.walk(folder_path)
+            for f in sorted(names)
+        ]
+    else:
+        files = [
+            os.path.join(folder_path, f)
+            for f in sorted(os.listdir(folder_path))
+            if os.path.isfile(os.path.join(folder_path, f))
+        ]
     total_files = len(files)
 
     if total_files == 0:
@@ -51,6 +81,7 @@ def folder(folder_path, project_id):
         return
 
     # Display available dataset
+    selected_dataset = None
     try:
         datasets = project.datasets()
         if datasets:
@@ -120,23 +151,45 @@ def folder(folder_path, project_id):
         click.echo(f"Error retrieving storage: {e}")
         return
 
+    manifest = None
+    if resume:
+        manifest = FolderManifest.for_upload(
+            folder_path,
+            api_url,
+            selected_storage_link.id,
+            None if selected_dataset is None else selected_dataset.id,
+        )
+
     # Initialize the spinner
     spinner = Spinner(f"Uploading files (0/{total_files})")
 
     # Upload files to the selected storage and dataset using their IDs
+    completed = 0
+
+    def on_complete(result):
+        nonlocal completed
+        completed += 1
+        spinner.set_text(f"Uploading files ({completed}/{total_files})")
+        if not result.success:
+            click.echo(f"\nFailed to upload {result.path}: {result.error}")
+
     try:
-        for idx, file_name in enumerate(files, start=1):
-            file_path = os.path.join(folder_path, file_name)
-            spinner.set_text(f"Uploading file ({idx}/{total_files})")
-            with open(file_path, "rb") as file:
-                client.upload_to_filesource(
-                    project=project,
-                    file=file,
-                    storageId=selected_storage_link.id,
-                    storageFolderName=None,
-                    dataset=selected_dataset,
-                )
-        spinner.done(f"Uploaded all {total_files} files successfully!")
+        report = client.upload_many(
+            project,
+            files,
+            storageId=selected_storage_link.id,
+            storageFolderName=None,
+            dataset=selected_dataset,
+            concurrency=concurrency,
+            callback=on_complete,
+            manifest=manifest,
+        )
     except Exception as e:
         spinner.done(f"Error during upload: {e}")
         return
+
+    if report.failed:
+        spinner.done(f"Uploaded {len(report.succeeded)} of {total_files} files.")
+    else:
+        spinner.done(f"Uploaded all {total_files} files successfully!")
+    click.echo(report.summary())
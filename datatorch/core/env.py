@@ -3,3 +3,5 @@ AGENT_ID = "DATATORCH_AGENT_ID"
 API_KEY = "DATATORCH_API_KEY"
 API_URL = "DATATORCH_API_URL"
 CONFIG_DIR = "DATATORCH_DIR"
+NO_SCHEMA = "DATATORCH_NO_SCHEMA"
+COMPRESS = "DATATORCH_COMPRESS"
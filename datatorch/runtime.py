@@ -0,0 +1,32 @@
+"""Helpers for scripts run as action steps.
+
+Only depends on the standard library, so actions that just read their
+inputs and set outputs start without loading the API client.
+"""
+
+import sys
+import json
+from typing import Any
+
+__all__ = ["get_inputs", "get_input", "set_output"]
+
+
+_inputs = None
+
+
+def get_inputs() -> dict:
+    global _inputs
+    try:
+        if _inputs is None:
+            _inputs = json.loads(sys.argv[-1])
+        return _inputs
+    except:
+        return {}
+
+
+def get_input(key: str) -> Any:
+    return get_inputs().get(key)
+
+
+def set_output(var: str, value: Any):
+    print(f"::{var}::{json.dumps(value)}")
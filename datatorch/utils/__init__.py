@@ -1,22 +1,55 @@
+import importlib
+from typing import TYPE_CHECKING
+
 from .string_style import camel_to_snake, snake_to_camel
 from .objects import get_annotations
 from .url import normalize_api_url
-from .converters import (
-    pixmask2cocorle,
-    pixmask2cocopoly,
-    points_to_segmentation,
-    segmentation_to_points,
-    simplify_segmentation,
-)
+
+if TYPE_CHECKING:
+    from .converters import (
+        encode_path_data,
+        pixmask2cocorle,
+        pixmask2cocopoly,
+        points_to_segmentation,
+        quantize_points,
+        segmentation_to_points,
+        simplify_segmentation,
+    )
 
 __all__ = [
     "camel_to_snake",
     "snake_to_camel",
     "get_annotations",
     "normalize_api_url",
+    "encode_path_data",
     "pixmask2cocorle",
     "pixmask2cocopoly",
     "points_to_segmentation",
+    "quantize_points",
     "segmentation_to_points",
     "simplify_segmentation",
 ]
+
+
+# Converters need numpy, they are imported on first access
+_CONVERTERS = {
+    "encode_path_data",
+    "pixmask2cocorle",
+    "pixmask2cocopoly",
+    "points_to_segmentation",
+    "quantize_points",
+    "segmentation_to_points",
+    "simplify_segmentation",
+}
+
+
+def __getattr__(name: str):
+    if name not in _CONVERTERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(".converters", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_CONVERTERS])
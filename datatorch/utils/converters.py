@@ -2,7 +2,7 @@ import os
 import itertools
 import errno
 import numpy as np
-from typing import List
+from typing import List, Optional
 
 from datatorch.api.scripts.utils.simplify import simplify_points
 
@@ -50,7 +50,37 @@ def pixmask2cocopoly(pixel_mask):
     return segmentation
 
 
-def points_to_segmentation(points: List[List[List[float]]]) -> List[List[float]]:
+# Encodings of `PaperSegmentations` path data sent to the API
+POINTS = "points"
+FLAT = "flat"
+
+
+def quantize(polygon, precision: Optional[int] = None) -> np.ndarray:
+    """
+    Rounds the coordinates of a polygon to `precision` decimals.
+
+    With a precision of 0 or less coordinates become integers, which are
+    written to JSON without a fractional part. None keeps full precision.
+    """
+    array = np.asarray(polygon)
+    if precision is None:
+        return array
+    array = np.round(array, precision)
+    return array.astype(np.int64) if precision <= 0 else array
+
+
+def quantize_points(
+    points: List[List[List[float]]], precision: Optional[int] = None
+) -> List[List[List[float]]]:
+    """Rounds the coordinates of polygons in points format, see `quantize`"""
+    if precision is None:
+        return points
+    return [quantize(polygon, precision).tolist() for polygon in points]
+
+
+def points_to_segmentation(
+    points: List[List[List[float]]], precision: Optional[int] = None
+) -> List[List[float]]:
     """
     Converts from points format to COCO segmentation format.
 
@@ -59,10 +89,12 @@ def points_to_segmentation(points: List[List[List[float]]]) -> List[List[float]]
     to:
         [[x1,y1,x2,y2...]]
     """
-    return [np.array(polygon).flatten().tolist() for polygon in points]
+    return [quantize(polygon, precision).ravel().tolist() for polygon in points]
 
 
-def segmentation_to_points(segmentation: List[List[float]]) -> List[List[List[float]]]:
+def segmentation_to_points(
+    segmentation: List[List[float]], precision: Optional[int] = None
+) -> List[List[List[float]]]:
     """
     Converts from COCO segmentation format to points format.
 
@@ -71,11 +103,35 @@ def segmentation_to_points(segmentation: List[List[float]]) -> List[List[List[fl
     to:
         [[[x1,y1], [x2,y2], ...]]
     """
-    return [np.reshape(polygon, (-1, 2)).tolist() for polygon in segmentation]
+    return [
+        quantize(polygon, precision).reshape(-1, 2).tolist() for polygon in segmentation
+    ]
+
+
+def encode_path_data(
+    points: List[List[List[float]]],
+    precision: Optional[int] = None,
+    encoding: str = POINTS,
+) -> dict:
+    """
+    Data of a `PaperSegmentations` source from polygons in points format.
+
+    `POINTS` sends `pathData` as [[[x1,y1], [x2,y2], ...]]. `FLAT` sends
+    [[x1,y1,x2,y2...]] with `encoding` set to "flat", which is 10-15%
+    smaller and about twice as fast to encode and decode, but must be
+    supported by the server.
+    """
+    if encoding == POINTS:
+        return {"pathData": quantize_points(points, precision)}
+    if encoding == FLAT:
+        return {"pathData": points_to_segmentation(points, precision), "encoding": FLAT}
+    raise ValueError(f"Unknown path data encoding '{encoding}'")
 
 
 def simplify_segmentation(
-    segmentation: List[List[float]], tolerance: float = 1
+    segmentation: List[List[float]],
+    tolerance: float = 1,
+    precision: Optional[int] = None,
 ) -> List[List[float]]:
     """
     Simplifies an array of polygons in COCO polygon format [[x1,y1,x2,y2,...]].
@@ -83,12 +139,15 @@ def simplify_segmentation(
     Args:
         segmentation: List of polygons in COCO format
         tolerance: Simplification tolerance (0 to disable)
+        precision: Decimals the coordinates are rounded to (None to disable)
 
     Returns:
         Simplified polygons in COCO format
     """
     if tolerance == 0:
-        return segmentation
+        if precision is None:
+            return segmentation
+        return [quantize(polygon, precision).tolist() for polygon in segmentation]
 
     points_format = segmentation_to_points(segmentation)
     simplified = [
@@ -97,4 +156,4 @@ def simplify_segmentation(
     ]
     # Filter out polygons with less than 3 points (6 coordinates)
     simplified = [polygon for polygon in simplified if len(polygon) >= 3]
-    return points_to_segmentation(simplified)
+    return points_to_segmentation(simplified, precision)
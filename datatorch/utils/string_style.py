@@ -1,6 +1,10 @@
 import re
+from functools import lru_cache
 from typing import Callable, Any, Union
 
+# API responses repeat the same few keys, so conversions are memoized
+_CACHE_SIZE = 4096
+
 
 def camel_to_snake(value: Union[str, dict]) -> Union[str, dict]:
     """Converts camel to snake case
@@ -14,10 +18,9 @@ def camel_to_snake(value: Union[str, dict]) -> Union[str, dict]:
         Union[str, dict]: [description]
     """
     if type(value) == str:
-        value = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
-        return re.sub("([a-z0-9])([A-Z])", r"\1_\2", value).lower()
+        return _camel_to_snake(value)
     if type(value) == dict:
-        return _process_keys(value, camel_to_snake)
+        return _process_keys(value, _camel_to_snake)
 
 
 def snake_to_camel(value: Union[str, dict]) -> Union[str, dict]:
@@ -32,14 +35,28 @@ def snake_to_camel(value: Union[str, dict]) -> Union[str, dict]:
         input in converted format
     """
     if type(value) == str:
-        components = value.split("_")
-        return components[0] + "".join(x.title() for x in components[1:])
+        return _snake_to_camel(value)
     if type(value) == dict:
-        return _process_keys(value, snake_to_camel)
+        return _process_keys(value, _snake_to_camel)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _camel_to_snake(value: str) -> str:
+    value = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
+    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", value).lower()
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _snake_to_camel(value: str) -> str:
+    components = value.split("_")
+    return components[0] + "".join(x.title() for x in components[1:])
 
 
 def _process_keys(obj: Any, func: Callable[[str], str]):
     if type(obj) == dict:
-        return {func(k): _process_keys(v, func) for k, v in obj.items()}
+        return {
+            func(k): _process_keys(v, func) if type(v) == dict else v
+            for k, v in obj.items()
+        }
     else:
         return obj
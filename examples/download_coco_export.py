@@ -38,9 +38,12 @@ exportPath, result = api.download_file(file_id, "coco.json", export_path)
 with open(exportPath) as coco_file:
     coco = json.load(coco_file)
 
-# Download the images and write to disk, assumes export format is COCO
-for image in coco["images"]:
-    # Collect the filename, and the datatorch ID to download via datatorch, and not directly the source Blob, S3 etc.
-    file_id = image["datatorch_id"]
-    file_name = image["file_name"]
-    api.download_file(file_id, file_name, export_path)
+# Download the images 8 at a time and write to disk, assumes export format is COCO
+# Collect the filename, and the datatorch ID to download via datatorch, and not directly the source Blob, S3 etc.
+report = api.download_many(
+    [image["datatorch_id"] for image in coco["images"]],
+    directory=export_path,
+    names=[image["file_name"] for image in coco["images"]],
+    concurrency=8,
+)
+print(report.summary())
@@ -16,6 +16,7 @@ requirements = [
     "typing_extensions>=4.1.0",
     "psutil~=5.9.4",
     "aiodocker~=0.19.0",
+    "aiohttp>=3.8",
     "Jinja2~=2.0",
     "PyYAML~=6.0",
     "aiostream~=0.4.0",
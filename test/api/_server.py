@@ -0,0 +1,67 @@
+"""Local HTTP server the API tests send their requests to.
+
+Tests subclass `Handler` with the `do_*` methods of the fake API, then
+either subclass `ServerTestCase`, which serves it for all tests of the
+class at `cls.url`, or serve it for a single test with `serve`.
+"""
+
+import json
+import threading
+import unittest
+
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Type
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Keep-alive request handler which does not log requests"""
+
+    protocol_version = "HTTP/1.1"
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def reply(self, code: int, body: bytes, headers: dict = None):
+        self.send_response(code)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def reply_json(self, result, code: int = 200, headers: dict = None):
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        self.reply(code, json.dumps(result).encode(), headers)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve(handler: Type[Handler]) -> Iterator[ThreadingHTTPServer]:
+    """Serves `handler` on a free local port, with its url as `server.url`"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class ServerTestCase(unittest.TestCase):
+    """Serves `handler` at `cls.url` while the tests of the class run"""
+
+    handler: Type[Handler] = Handler
+
+    @classmethod
+    def setUpClass(cls):
+        cls._serving = serve(cls.handler)
+        cls.server = cls._serving.__enter__()
+        cls.url = cls.server.url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._serving.__exit__(None, None, None)
@@ -0,0 +1,139 @@
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+
+from urllib.parse import urlparse
+
+from _server import Handler, ServerTestCase
+
+from gql.transport.exceptions import TransportServerError
+
+from datatorch.api import (
+    Annotation,
+    AsyncApiClient,
+    BoundingBox,
+    CircuitBreaker,
+    RetryPolicy,
+    Tracer,
+    trace,
+)
+
+FILES = {"1": b"first" * 1000, "2": b"second" * 1000}
+
+
+class _ApiHandler(Handler):
+    operations = []
+    annotations = []
+    # Statuses the next requests fail with
+    failures = []
+
+    def fail(self) -> bool:
+        if not self.failures:
+            return False
+        self.reply_json({}, self.failures.pop(0), {"Retry-After": "0"})
+        return True
+
+    def do_POST(self):
+        body = json.loads(self.read_body())
+        variables = body.get("variables", {})
+        self.operations.append(body["query"].split("(")[0].strip())
+        if self.fail():
+            return
+        if "createAnnotations" in body["query"]:
+            self.annotations.extend(variables["annotations"])
+            data = {"createAnnotations": True}
+        else:
+            data = {"source": {"id": f"s-{variables['data']['x']}"}}
+        self.reply_json({"data": data})
+
+    def do_GET(self):
+        if self.fail():
+            return
+        file_id = urlparse(self.path).path.split("/")[4]
+        disposition = f'attachment; filename="{file_id}.bin"'
+        self.reply(200, FILES[file_id], {"Content-Disposition": disposition})
+
+
+class TestAsyncApiClient(ServerTestCase):
+    handler = _ApiHandler
+
+    def setUp(self):
+        _ApiHandler.operations.clear()
+        _ApiHandler.annotations.clear()
+        _ApiHandler.failures.clear()
+
+    def run_client(self, coroutine):
+        retry = RetryPolicy(backoff=0.001, breaker=CircuitBreaker(cooldown=0))
+
+        async def run():
+            async with AsyncApiClient(
+                api_url=self.url, schema=False, retry=retry
+            ) as api:
+                return await coroutine(api)
+
+        return asyncio.run(run())
+
+    def create_annotation(self, api):
+        return api.create_annotation(Annotation(file_id="f1", label_id="l1"))
+
+    def test_retries_and_traces_overloaded_requests(self):
+        ended = []
+        tracer = Tracer()
+        tracer.end = ended.append
+        _ApiHandler.failures.extend([503, 429])
+        with trace(tracer):
+            self.run_client(self.create_annotation)
+        self.assertEqual(_ApiHandler.operations, ["mutation CreateAnnotations"] * 3)
+        (traced,) = ended
+        self.assertEqual((traced.name, traced.retries), ("CreateAnnotations", 2))
+        self.assertIsNone(traced.error)
+
+    def test_does_not_repeat_failed_mutations(self):
+        _ApiHandler.failures.append(500)
+        with self.assertRaises(TransportServerError) as raised:
+            self.run_client(self.create_annotation)
+        self.assertEqual(raised.exception.code, 500)
+        self.assertEqual(len(_ApiHandler.operations), 1)
+
+    def test_retries_failed_downloads(self):
+        directory = tempfile.mkdtemp()
+        _ApiHandler.failures.append(502)
+        try:
+            path, size = self.run_client(
+                lambda api: api.download_file("1", "", directory)
+            )
+            self.assertEqual(size, len(FILES["1"]))
+            self.assertEqual(_ApiHandler.failures, [])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_create_annotation_with_sources(self):
+        annotation = Annotation(file_id="f1", label_id="l1")
+        annotation.sources = [BoundingBox.xywh(i, 0, 1, 1) for i in range(5)]
+
+        self.run_client(lambda api: api.create_annotation(annotation))
+
+        self.assertEqual(_ApiHandler.operations, ["mutation CreateAnnotations"])
+        (created,) = _ApiHandler.annotations
+        self.assertEqual(created["id"], annotation.id)
+        self.assertEqual(
+            [s["id"] for s in created["sources"]], [s.id for s in annotation.sources]
+        )
+        self.assertTrue(
+            all(s.annotation_id == annotation.id for s in annotation.sources)
+        )
+
+    def test_download_many(self):
+        directory = tempfile.mkdtemp()
+        try:
+            report = self.run_client(
+                lambda api: api.download_many(["1", "2"], directory)
+            )
+            self.assertEqual(len(report.succeeded), 2)
+            for file_id, data in FILES.items():
+                with open(os.path.join(directory, f"{file_id}.bin"), "rb") as f:
+                    self.assertEqual(f.read(), data)
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,106 @@
+import unittest
+
+from gql.transport.exceptions import TransportQueryError
+from graphql import build_schema, graphql_sync, print_ast, validate
+
+from datatorch.api.batch import Batch
+
+SCHEMA = build_schema("""
+    type File { id: ID, name: String, metadata(key: String!): String }
+    type Query { file(id: ID!): File }
+    type Mutation { setMetadata(fileId: ID!, key: String!): Boolean }
+""")
+
+_FILE = """
+    query GetFile($id: ID!) {
+      file(id: $id) { ...FileFields }
+    }
+    fragment FileFields on File { id name }
+"""
+
+_METADATA = """
+    query GetMetadata($id: ID!, $key: String!) {
+      file(id: $id) { ...MetadataFields }
+    }
+    fragment MetadataFields on File { id ...Value }
+    fragment Value on File { metadata(key: $key) }
+"""
+
+_SET_METADATA = """
+    mutation SetMetadata($fileId: ID!, $key: String!) {
+      setMetadata(fileId: $fileId, key: $key)
+    }
+"""
+
+
+def _file(info, id):
+    if id == "missing":
+        raise ValueError("File not found")
+    return {"id": id, "name": f"{id}.png", "metadata": lambda info, key: key}
+
+
+class _SchemaClient(object):
+    """Executes documents against a local schema, recording each request"""
+
+    def __init__(self):
+        self.documents = []
+
+    def execute(self, document, params={}):
+        errors = validate(SCHEMA, document)
+        assert not errors, errors
+        self.documents.append(print_ast(document))
+        root = {"file": _file, "setMetadata": lambda *_, **__: True}
+        result = graphql_sync(SCHEMA, self.documents[-1], root, variable_values=params)
+        if result.errors:
+            errors = [e.formatted for e in result.errors]
+            raise TransportQueryError(str(errors[0]), errors=errors, data=result.data)
+        return result.data
+
+
+class TestBatch(unittest.TestCase):
+    def test_merges_operations_into_one_request(self):
+        client = _SchemaClient()
+        with Batch(client) as batch:
+            results = [batch.execute(_FILE, params={"id": str(i)}) for i in range(3)]
+
+        self.assertEqual(len(client.documents), 1)
+        self.assertEqual(client.documents[0].count("fragment FileFields"), 1)
+        for i, result in enumerate(results):
+            self.assertEqual(
+                result.result(), {"file": {"id": str(i), "name": f"{i}.png"}}
+            )
+
+    def test_renames_variables_of_fragments(self):
+        client = _SchemaClient()
+        with Batch(client) as batch:
+            results = [
+                batch.execute(_METADATA, params={"id": str(i), "key": f"k{i}"})
+                for i in range(2)
+            ]
+
+        self.assertEqual(len(client.documents), 1)
+        for i, result in enumerate(results):
+            self.assertEqual(
+                result.result(), {"file": {"id": str(i), "metadata": f"k{i}"}}
+            )
+
+    def test_errors_only_fail_their_operation(self):
+        with Batch(_SchemaClient()) as batch:
+            found = batch.execute(_FILE, params={"id": "1"})
+            missing = batch.execute(_FILE, params={"id": "missing"})
+
+        self.assertEqual(found.result()["file"]["id"], "1")
+        with self.assertRaises(TransportQueryError):
+            missing.result()
+
+    def test_flushes_by_count_and_operation_type(self):
+        client = _SchemaClient()
+        batch = Batch(client, max_operations=2)
+        for i in range(3):
+            batch.execute(_SET_METADATA, params={"fileId": "1", "key": str(i)})
+        self.assertEqual(len(client.documents), 1)
+
+        batch.execute(_FILE, params={"id": "1"})
+        self.assertEqual(len(client.documents), 2)
+        batch.flush()
+        self.assertEqual(len(client.documents), 3)
@@ -0,0 +1,164 @@
+import threading
+import unittest
+
+from gql.transport.exceptions import TransportQueryError
+from graphql import build_schema, graphql_sync, parse, print_ast, validate
+
+from datatorch.api import Annotation, BoundingBox, Bulk, BulkError, Dataset, File
+from datatorch.api import utils
+from datatorch.api.batch import DEFAULT_MAX_BYTES, DEFAULT_MAX_OPERATIONS, Batch
+from datatorch.api.cache import TTLCache
+
+SCHEMA = build_schema("""
+    scalar JSON
+    input ImportFile { path: String, name: String, size: Int }
+    input CreateDatasetInput { projectId: ID!, name: String!, description: String }
+    input SourceInput { id: ID, type: String!, data: JSON }
+    input CreateAnnotationInput {
+      id: ID, fileId: ID!, labelId: ID!, name: String, color: String
+      sources: [SourceInput!]
+    }
+    type File { id: ID, name: String, path: String, mimetype: String, linkId: ID }
+    type Dataset { id: ID }
+    type Source { id: ID }
+    type Query { a: Int }
+    type Mutation {
+      createDataset(input: CreateDatasetInput!): Dataset
+      importFiles(linkId: ID!, files: [ImportFile!]!, datasetId: ID): [File]
+      createAnnotations(annotations: [CreateAnnotationInput!]!): Boolean
+      createSource(id: ID, annotationId: ID!, type: String!, data: JSON): Source
+      updateSource(id: ID!, type: String!, data: JSON!): Source
+    }
+""")
+
+
+class _Server(object):
+    """Executes documents against a local schema, recording each request"""
+
+    def __init__(self):
+        self.documents = []
+        self.annotations = []
+        self.lock = threading.Lock()
+        self.cache = TTLCache()
+
+    def batch(self, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES):
+        return Batch(self, max_operations=max_operations, max_bytes=max_bytes)
+
+    def execute(self, query, params={}):
+        document = parse(query) if isinstance(query, str) else query
+        errors = validate(SCHEMA, document)
+        assert not errors, errors
+        with self.lock:
+            self.documents.append(print_ast(document))
+        result = graphql_sync(SCHEMA, print_ast(document), self, variable_values=params)
+        if result.errors:
+            errors = [e.formatted for e in result.errors]
+            raise TransportQueryError(str(errors[0]), errors=errors, data=result.data)
+        return result.data
+
+    def createDataset(self, info, input):
+        return {"id": f"d-{input['name']}"}
+
+    def importFiles(self, info, linkId, files, datasetId=None):
+        return [{"id": f"f-{f['name']}", "linkId": linkId, **f} for f in files]
+
+    def createAnnotations(self, info, annotations):
+        if any(a["labelId"] == "missing" for a in annotations):
+            raise ValueError("Label not found")
+        with self.lock:
+            self.annotations.extend(annotations)
+        return True
+
+    def createSource(self, info, id, annotationId, type, data=None):
+        return {"id": id}
+
+    def updateSource(self, info, id, type, data):
+        return {"id": id}
+
+
+class TestBulk(unittest.TestCase):
+    def setUp(self):
+        self.server = _Server()
+
+    def annotation(self, file_id=None, label_id="l1"):
+        anno = Annotation({"labelId": label_id, "fileId": file_id}, self.server)
+        anno.sources = [BoundingBox.xywh(1, 2, 3, 4)]
+        return anno
+
+    def test_creates_annotations_in_chunks(self):
+        annotations = [self.annotation("f1") for _ in range(25)]
+        with Bulk(self.server, chunk_size=10) as bulk:
+            for anno in annotations:
+                bulk.add(anno)
+
+        self.assertEqual(len(self.server.documents), 3)
+        created = {a["id"]: a for a in self.server.annotations}
+        self.assertEqual(set(created), {a.id for a in annotations})
+        source = annotations[0].sources[0]
+        self.assertEqual(source.annotation_id, annotations[0].id)
+        self.assertEqual(created[annotations[0].id]["sources"][0]["id"], source.id)
+
+    def test_creates_files_before_their_annotations(self):
+        dataset = Dataset({"name": "train", "projectId": "p1"}, self.server)
+        file = File({"name": "a.png", "path": "a.png", "linkId": "s1"}, self.server)
+        file.kilobytes = 1
+        file.annotations = [self.annotation()]
+
+        bulk = Bulk(self.server).add(dataset).add(file)
+        self.assertEqual(len(bulk), 3)
+        bulk.flush()
+
+        self.assertEqual(dataset.id, "d-train")
+        self.assertEqual(file.id, "f-a.png")
+        self.assertEqual(self.server.annotations[0]["fileId"], "f-a.png")
+
+    def test_failed_chunks_are_kept(self):
+        good, bad = self.annotation("f1"), self.annotation("f1", "missing")
+        bulk = Bulk(self.server, chunk_size=1).add(good).add(bad)
+        with self.assertRaises(BulkError) as error:
+            bulk.flush()
+
+        self.assertEqual(error.exception.errors[0][0], [bad])
+        self.assertIsNotNone(good.id)
+        self.assertIsNone(bad.id)
+        self.assertIsNone(bad.sources[0].id)
+        self.assertEqual(bulk.entities, [bad])
+
+    def test_creates_and_updates_sources(self):
+        new = BoundingBox.xywh(1, 2, 3, 4)
+        new.annotation_id = "a1"
+        existing = BoundingBox({"id": "s1", "x": 0, "y": 0, "width": 1, "height": 1})
+        with Bulk(self.server) as bulk:
+            bulk.add(new).add(existing)
+
+        self.assertEqual(len(self.server.documents), 1)
+        self.assertIsNotNone(new.id)
+        self.assertIn("updateSource", self.server.documents[0])
+
+    def test_rejects_existing_entities(self):
+        with self.assertRaises(ValueError):
+            Bulk(self.server).add(Annotation({"id": "a1"}, self.server))
+
+    def test_delete_is_unsupported(self):
+        with self.assertRaises(NotImplementedError):
+            Bulk(self.server).delete()
+
+    def test_importable_from_utils(self):
+        self.assertIs(utils.Bulk, Bulk)
+
+
+class TestNestedCreation(unittest.TestCase):
+    def test_file_add_sends_one_mutation(self):
+        server = _Server()
+        file = File({"id": "f1"}, server)
+        annotations = [Annotation({"labelId": "l1"}, server) for _ in range(3)]
+        for anno in annotations:
+            anno.sources = [BoundingBox.xywh(1, 2, 3, 4), BoundingBox.xywh(0, 0, 1, 1)]
+
+        file.add(*annotations)
+
+        self.assertEqual(len(server.documents), 1)
+        self.assertEqual([a["fileId"] for a in server.annotations], ["f1"] * 3)
+        self.assertEqual(file.annotations, annotations)
+        for anno in annotations:
+            self.assertTrue(all(s.annotation_id == anno.id for s in anno.sources))
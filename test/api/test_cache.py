@@ -0,0 +1,81 @@
+import time
+import threading
+import unittest
+
+from unittest import mock
+
+from datatorch.api import ApiClient, Dataset, Project
+from datatorch.api.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_expires_entries(self):
+        cache = TTLCache(ttl=0.05)
+        load = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(cache.get(("labels", "p"), load), 1)
+        self.assertEqual(cache.get(("labels", "p"), load), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get(("labels", "p"), load), 2)
+
+    def test_invalidates_by_prefix(self):
+        cache = TTLCache()
+        cache.set(("labels", "a"), 1)
+        cache.set(("labels", "b"), 2)
+        cache.set(("datasets", "a"), 3)
+        cache.invalidate("labels", "a")
+        self.assertEqual(len(cache), 2)
+        cache.invalidate("labels")
+        self.assertEqual(len(cache), 1)
+
+    def test_loads_concurrent_misses_once(self):
+        cache = TTLCache()
+        calls = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        threads = [
+            threading.Thread(target=cache.get, args=(("viewer",), load))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+
+class TestProjectMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient(api_url="http://127.0.0.1:1", schema=False)
+        self.project = Project({"id": "p1"}, self.client)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_reuses_labels_and_storage(self):
+        results = {
+            "project": {
+                "labels": [{"id": "l1", "name": "cat"}],
+                "storageLinkDefault": {"id": "s1"},
+            }
+        }
+        with mock.patch.object(self.client, "execute", return_value=results) as ex:
+            for _ in range(3):
+                self.assertEqual(self.project.labels()[0].name, "cat")
+                self.assertEqual(self.project.storage_link_default().id, "s1")
+        self.assertEqual(ex.call_count, 2)
+
+    def test_creating_dataset_invalidates_datasets(self):
+        datasets = {"project": {"datasets": {"nodes": [{"id": "d1", "name": "a"}]}}}
+        created = {"dataset": {"id": "d2"}}
+        with mock.patch.object(
+            self.client, "execute", side_effect=[datasets, created, datasets]
+        ) as ex:
+            self.project.dataset("a")
+            self.project.dataset("a")
+            Dataset({"name": "b", "projectId": "p1"}, self.client).create()
+            self.project.dataset("a")
+        self.assertEqual(ex.call_count, 3)
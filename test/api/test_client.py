@@ -0,0 +1,88 @@
+import os
+import gzip
+import json
+import shutil
+import tempfile
+
+from _server import Handler, ServerTestCase
+
+from datatorch.api import Client
+from datatorch.api.client import parse_query
+
+
+class _PersistedQueryHandler(Handler):
+    """Answers `{ a }` and stores persisted queries by hash"""
+
+    stored = {}
+    bodies = []
+    encodings = []
+
+    def do_POST(self):
+        data = self.read_body()
+        self.encodings.append(self.headers.get("Content-Encoding"))
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        body = json.loads(data)
+        self.bodies.append(body)
+        persisted = body.get("extensions", {}).get("persistedQuery")
+        if persisted and "query" not in body:
+            if persisted["sha256Hash"] not in self.stored:
+                return self.reply_json(
+                    {"errors": [{"message": "PersistedQueryNotFound"}]}
+                )
+        elif persisted:
+            self.stored[persisted["sha256Hash"]] = body["query"]
+        self.reply_json({"data": {"a": 1}})
+
+
+class TestClientExecute(ServerTestCase):
+    handler = _PersistedQueryHandler
+
+    def setUp(self):
+        _PersistedQueryHandler.stored = {}
+        _PersistedQueryHandler.bodies = []
+        _PersistedQueryHandler.encodings = []
+
+    def test_parse_cache_reuses_documents(self):
+        self.assertIs(parse_query("query { a }"), parse_query("query { a }"))
+
+    def test_execute_file_reads_changes(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "query.graphql")
+            with open(path, "w") as f:
+                f.write("query { a }")
+            with Client(api_url=self.url, schema=False) as client:
+                client.execute_file(path)
+                os.utime(path, ns=(0, 0))
+                with open(path, "w") as f:
+                    f.write("query Named { a }")
+                client.execute_file(path)
+            queries = [body["query"] for body in _PersistedQueryHandler.bodies]
+            self.assertIn("Named", queries[1])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_persisted_queries_send_hash(self):
+        with Client(api_url=self.url, schema=False, persisted_queries=True) as client:
+            for _ in range(3):
+                self.assertEqual(client.execute("query { a }"), {"a": 1})
+
+        bodies = _PersistedQueryHandler.bodies
+        # Unknown hash, registration with the full query, then hashes only
+        self.assertEqual(
+            [("query" in body) for body in bodies], [False, True, False, False]
+        )
+        self.assertEqual(len(_PersistedQueryHandler.stored), 1)
+
+    def test_compresses_large_bodies(self):
+        points = [[i / 3, i / 7] for i in range(2000)]
+        client = Client(
+            api_url=self.url, schema=False, compress=True, compress_min_size=1024
+        )
+        with client:
+            client.execute("query { a }")
+            client.execute("query Points($p: [[Float]]) { a }", params={"p": points})
+
+        self.assertEqual(_PersistedQueryHandler.encodings, [None, "gzip"])
+        self.assertEqual(_PersistedQueryHandler.bodies[1]["variables"]["p"], points)
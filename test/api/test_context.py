@@ -0,0 +1,82 @@
+import threading
+import unittest
+
+from unittest import mock
+
+from datatorch.api import (
+    Annotation,
+    BoundingBox,
+    Bulk,
+    Project,
+    context,
+    default_client,
+    using_client,
+)
+from datatorch.api.entity import base
+
+
+class _Fake(object):
+    """Client recording the operations sent through it"""
+
+    def __init__(self, name):
+        self.name = name
+        self.operations = []
+
+    def execute(self, query, params={}):
+        self.operations.append(query.split("(")[0].split()[-1])
+        return {"createAnnotations": True}
+
+    def stream_query(self, query, path, params={}):
+        self.operations.append(path)
+        return iter(
+            [{"id": "f1", "name": name} for name in params["where"]["name"]["in"]]
+        )
+
+
+class TestDefaultClient(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(context, "_default", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_created_once(self):
+        with mock.patch("datatorch.api.api.ApiClient") as ApiClient:
+            self.assertIs(default_client(), default_client())
+            self.assertIs(Annotation({}).client, ApiClient.return_value)
+        ApiClient.assert_called_once_with()
+
+    def test_using_client_overrides_default(self):
+        first, second = object(), object()
+        with using_client(first):
+            self.assertIs(BoundingBox.xywh(0, 0, 1, 1).client, first)
+            with using_client(second):
+                self.assertIs(default_client(), second)
+            self.assertIs(default_client(), first)
+
+            seen = []
+            thread = threading.Thread(
+                target=lambda: seen.append(context._current.get())
+            )
+            thread.start()
+            thread.join()
+            self.assertEqual(seen, [None])
+
+    def test_children_inherit_parent_client(self):
+        client = object()
+        annotation = Annotation({"sourcesJson": [{"type": "PaperBox"}]}, client)
+        with mock.patch.object(base, "default_client") as default:
+            self.assertIs(annotation.sources[0].client, client)
+        default.assert_not_called()
+
+    def test_worker_threads_use_the_override(self):
+        default, override = _Fake("default"), _Fake("override")
+        with mock.patch.object(context, "_default", default):
+            with using_client(override):
+                with Bulk(workers=2, chunk_size=1) as bulk:
+                    for _ in range(3):
+                        bulk.add(Annotation({"fileId": "f1", "labelId": "l1"}))
+                resolved = Project({"id": "p1"}).resolve_files(["a.png"])
+
+        self.assertEqual(default.operations, [])
+        self.assertEqual(override.operations.count("CreateAnnotations"), 3)
+        self.assertIs(resolved["a.png"].client, override)
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+
+from urllib.parse import urlparse
+
+from _server import Handler, ServerTestCase
+
+from datatorch.api import Client
+
+FILES = {
+    "1": ("first.bin", os.urandom(300 * 1024)),
+    "2": ("second.bin", os.urandom(1024)),
+}
+
+
+class _FileHandler(Handler):
+    requests = []
+
+    def _send(self, body: bool):
+        file_id = urlparse(self.path).path.split("/")[4]
+        name, data = FILES[file_id]
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+        self.send_header("Content-Length", str(len(data) - start))
+        self.end_headers()
+        if body:
+            self.wfile.write(data[start:])
+
+    def do_GET(self):
+        self.requests.append(("GET", self.headers.get("Range")))
+        self._send(body=True)
+
+    def do_HEAD(self):
+        self.requests.append(("HEAD", None))
+        self._send(body=False)
+
+
+class TestDownload(ServerTestCase):
+    handler = _FileHandler
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.client = Client(api_url=cls.url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        _FileHandler.requests = []
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read(self, name):
+        with open(os.path.join(self.dir, name), "rb") as f:
+            return f.read()
+
+    def test_uses_server_filename(self):
+        path, _ = self.client.download_file("1", directory=self.dir)
+        self.assertEqual(os.path.basename(path), "first.bin")
+        self.assertEqual(self.read("first.bin"), FILES["1"][1])
+
+    def test_resumes_partial_file(self):
+        with open(os.path.join(self.dir, "first.bin.part"), "wb") as f:
+            f.write(FILES["1"][1][:1000])
+
+        self.client.download_file("1", "first.bin", self.dir)
+
+        self.assertEqual(_FileHandler.requests, [("GET", "bytes=1000-")])
+        self.assertEqual(self.read("first.bin"), FILES["1"][1])
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "first.bin.part")))
+
+    def test_skip_compares_size(self):
+        self.client.download_file("2", "second.bin", self.dir)
+        _, result = self.client.download_file("2", "second.bin", self.dir)
+        self.assertIsNone(result)
+
+        with open(os.path.join(self.dir, "second.bin"), "wb") as f:
+            f.write(b"truncated")
+        _, result = self.client.download_file("2", "second.bin", self.dir)
+        self.assertIsNotNone(result)
+        self.assertEqual(self.read("second.bin"), FILES["2"][1])
+
+    def test_download_many(self):
+        report = self.client.download_many(["1", "2"], self.dir, concurrency=2)
+        self.assertEqual(len(report.succeeded), 2)
+        self.assertEqual(self.read("first.bin"), FILES["1"][1])
+        self.assertEqual(self.read("second.bin"), FILES["2"][1])
+
+        report = self.client.download_many(
+            ["1", "2"], self.dir, names=["first.bin", "second.bin"]
+        )
+        self.assertEqual(len(report.skipped), 2)
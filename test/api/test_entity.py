@@ -0,0 +1,41 @@
+import unittest
+
+from importlib.util import find_spec
+from unittest import mock
+
+from datatorch.api import Annotation, File
+from datatorch.api.entity import base
+
+
+class TestEntityConstruction(unittest.TestCase):
+    def test_initializes_fields_and_converts_keys(self):
+        file = File({"id": "f1", "linkId": "s1", "annotations": [{"fileId": "f1"}]})
+        self.assertEqual((file.id, file.link_id, file.status), ("f1", "s1", None))
+        self.assertEqual(file.annotations[0].file_id, "f1")
+        self.assertNotIn("client", file.dict())
+
+    def test_client_is_created_on_first_use(self):
+        with mock.patch.object(base, "default_client") as default:
+            annotation = Annotation({"id": "a1"})
+            default.assert_not_called()
+            self.assertIs(annotation.client, default.return_value)
+            self.assertIs(annotation.client, default.return_value)
+        default.assert_called_once_with()
+
+    def test_given_client_is_kept(self):
+        client = object()
+        with mock.patch.object(base, "default_client") as default:
+            self.assertIs(File({}, client).client, client)
+        default.assert_not_called()
+
+    @unittest.skipUnless(
+        find_spec("shapely") and find_spec("imantics"), "needs shapely and imantics"
+    )
+    def test_local_settings_are_not_serialized(self):
+        # Imported here, polygon sources depend on the optional dependencies
+        from datatorch.api import Segmentations
+
+        source = Segmentations([[[0.25, 1.75], [2, 3], [4, 5]]], precision=0)
+        self.assertFalse([key for key in source.dict() if key.startswith("_")])
+        self.assertNotIn("precision", source.to_json())
+        self.assertEqual(source.data(), {"pathData": [[[0, 2], [2, 3], [4, 5]]]})
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+from datatorch.agent.directory import agent_directory
+from datatorch.api import ApiClient, Label, Project, ProjectMirror, Where
+from datatorch.api.mirror import mirror_path
+
+
+def _node(i, updated_at="2024-01-01T00:00:00Z", status="ANNOTATING"):
+    return {
+        "id": f"f{i}",
+        "name": f"{i:06}.jpg",
+        "path": f"images/{i:06}.jpg",
+        "status": status,
+        "updatedAt": updated_at,
+        "annotations": [
+            {
+                "id": f"a{i}",
+                "labelId": "l1",
+                "sourcesJson": [{"type": "PaperBox", "x": 1, "y": 2}],
+            }
+        ],
+    }
+
+
+class TestProjectMirror(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.client = ApiClient(api_url="http://127.0.0.1:1", schema=False)
+        self.project = Project({"id": "p1"}, self.client)
+        self.mirror = ProjectMirror(
+            self.project, path=os.path.join(self.dir, "p1.sqlite")
+        )
+        label = Label({"id": "l1", "name": "cat"}, self.client)
+        labels = mock.patch.object(Project, "labels", return_value=[label])
+        labels.start()
+        self.addCleanup(labels.stop)
+
+    def tearDown(self):
+        self.mirror.close()
+        self.client.close()
+        shutil.rmtree(self.dir)
+
+    def sync(self, nodes, **kwargs):
+        with mock.patch.object(
+            Project, "_iter_file_nodes", return_value=iter(nodes)
+        ) as fetch:
+            count = self.mirror.sync(**kwargs)
+        self.assertIn("updated_at", fetch.call_args[1]["fields"])
+        return count, fetch.call_args[0][0]
+
+    def test_agent_mirrors_in_the_agent_db_dir(self):
+        with ApiClient(api_url="http://127.0.0.1:1", agent=True, schema=False) as api:
+            path = mirror_path(Project({"id": "p1"}, api))
+        self.assertEqual(path, os.path.join(agent_directory.db_dir, "p1.sqlite"))
+        self.assertNotEqual(mirror_path(self.project), path)
+
+    def test_filters_files_locally(self):
+        self.sync([_node(i) for i in range(100)] + [_node(100, status="COMPLETED")])
+        files = self.mirror.files(Where(name="000042.jpg"))
+        self.assertEqual([f.id for f in files], ["f42"])
+        self.assertEqual(files[0].annotations[0].sources[0].x, 1)
+        self.assertEqual(self.mirror.count(Where(status__not_equals="COMPLETED")), 100)
+        self.assertEqual(self.mirror.count(Where(path__starts_with="images/00009")), 10)
+        self.assertEqual(self.mirror.count(Where(id__in=["f1", "f2", "x"])), 2)
+        self.assertEqual(self.mirror.labels()[0].id, "l1")
+
+    def test_syncs_changes_since_last_sync(self):
+        count, where = self.sync([_node(1), _node(2, "2024-01-02T00:00:00Z")])
+        self.assertEqual((count, where), (2, None))
+
+        updated = _node(1, "2024-01-03T00:00:00Z", status="COMPLETED")
+        updated["annotations"] = []
+        count, where = self.sync([updated])
+        self.assertEqual(where.input, {"updatedAt": {"gte": "2024-01-02T00:00:00Z"}})
+        self.assertEqual(self.mirror.synced_at, "2024-01-03T00:00:00Z")
+
+        (file,) = self.mirror.files(Where(id="f1"))
+        self.assertEqual((file.status, file.annotations), ("COMPLETED", []))
+        self.assertEqual(self.mirror.count(), 2)
+
+        # Files of the last synced timestamp are fetched again and replaced
+        count, where = self.sync([updated])
+        self.assertEqual(where.input, {"updatedAt": {"gte": "2024-01-03T00:00:00Z"}})
+        self.assertEqual((count, self.mirror.count()), (1, 2))
+
+        self.sync([_node(2)], full=True)
+        self.assertEqual(self.mirror.count(), 1)
+
+    def test_rejects_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            self.mirror.files(Where(dataset=Where(name="a")))
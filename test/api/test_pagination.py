@@ -0,0 +1,61 @@
+import threading
+import unittest
+
+from unittest import mock
+
+from datatorch.api import pagination
+from datatorch.api.pagination import iter_pages
+
+ITEMS = [{"index": i} for i in range(1234)]
+
+
+class _Pages(object):
+    """Page numbered stand-in recording the requested page sizes"""
+
+    def __init__(self, delay=0.0, cap=None):
+        self.sizes = []
+        self.delay = delay
+        self.cap = cap
+        self.lock = threading.Lock()
+
+    def __call__(self, page, size):
+        with self.lock:
+            self.sizes.append(size)
+        if self.delay:
+            threading.Event().wait(self.delay)
+        # Servers capping `perPage` number pages by the capped size
+        size = min(size, self.cap or size)
+        return ITEMS[(page - 1) * size : page * size]
+
+
+class TestIterPages(unittest.TestCase):
+    def flatten(self, pages):
+        return [node for page in pages for node in page]
+
+    def test_yields_every_item_in_order(self):
+        fetch = _Pages()
+        self.assertEqual(self.flatten(iter_pages(fetch, page_size=100)), ITEMS)
+
+    def test_grows_fast_pages_keeping_alignment(self):
+        fetch = _Pages()
+        self.assertEqual(self.flatten(iter_pages(fetch, page_size=50)), ITEMS)
+        self.assertEqual(fetch.sizes[:4], [50, 50, 100, 200])
+
+    def test_stops_growing_at_the_server_cap(self):
+        fetch = _Pages(cap=100)
+        self.assertEqual(self.flatten(iter_pages(fetch, page_size=50)), ITEMS)
+        self.assertEqual(fetch.sizes[:5], [50, 50, 100, 200, 100])
+        self.assertEqual(max(fetch.sizes[5:]), 100)
+
+    def test_shrinks_slow_pages(self):
+        fetch = _Pages(delay=0.02)
+        with mock.patch.object(pagination, "TARGET_PAGE_SECONDS", 0.001):
+            nodes = self.flatten(iter_pages(fetch, page_size=400))
+        self.assertEqual(nodes, ITEMS)
+        self.assertEqual(fetch.sizes[:3], [400, 200, 100])
+
+    def test_concurrent_pages_with_total(self):
+        fetch = _Pages(delay=0.01)
+        pages = iter_pages(fetch, page_size=100, total=len(ITEMS), concurrency=4)
+        self.assertEqual(self.flatten(pages), ITEMS)
+        self.assertEqual(len(fetch.sizes), 13)
@@ -0,0 +1,37 @@
+import unittest
+
+from unittest import mock
+
+from datatorch.api import ApiClient, File, Project
+
+
+class TestFileProjection(unittest.TestCase):
+    def test_default_fragment_selects_annotations(self):
+        fragment = File.fragment(data_file=True)
+        self.assertIn("annotationsCount", fragment)
+        self.assertIn("fragment AnnotationFields", fragment)
+        self.assertNotIn("updatedAt", fragment)
+
+    def test_projection_skips_annotations(self):
+        fragment = File.fragment(data_file=True, fields=File.REF_FIELDS)
+        self.assertIn("linkId", fragment)
+        self.assertNotIn("annotations", fragment)
+        self.assertNotIn("url", fragment)
+
+    def test_data_file_fields_use_inline_fragment(self):
+        fragment = File.fragment(fields=["id", "status"])
+        self.assertIn("... on DatasetFile {\n    status\n  }", fragment)
+
+    def test_rejects_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            File.fragment(fields=["id", "thumbnail"])
+
+    def test_files_queries_projected_fields(self):
+        client = ApiClient(api_url="http://127.0.0.1:1", schema=False)
+        nodes = iter([{"id": "f1", "name": "a.png", "status": "ANNOTATING"}])
+        with mock.patch.object(client, "stream_query", return_value=nodes) as query:
+            files = Project({"id": "p1"}, client).files(fields=File.REF_FIELDS)
+        client.close()
+        self.assertNotIn("AnnotationFields", query.call_args[0][0])
+        self.assertEqual(files[0].status, "ANNOTATING")
+        self.assertEqual(files[0].annotations, [])
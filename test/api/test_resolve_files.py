@@ -0,0 +1,82 @@
+import threading
+import unittest
+
+from datatorch.api import Project, Where
+from datatorch.api.scripts.import_pixmask import mask_file_keys
+from datatorch.api.scripts.utils.files import file_key, resolve_in_batches
+
+FILES = [
+    {"id": "1", "name": "a.jpg", "path": "images/a.jpg"},
+    {"id": "2", "name": "b.jpg", "path": "images/b.jpg"},
+    {"id": "3", "name": "b.jpg", "path": "other/b.jpg"},
+    {"id": "4", "name": "c.png", "path": "images/c.png"},
+]
+
+
+class _Client(object):
+    """Stand-in answering file queries filtered with `__in`"""
+
+    def __init__(self):
+        self.wheres = []
+        self.lock = threading.Lock()
+
+    def stream_query(self, query, path, params):
+        with self.lock:
+            self.wheres.append(params["where"])
+        ((field, where),) = params["where"].items()
+        matches = [f for f in FILES if f[field] in where["in"]]
+        start = (params["page"] - 1) * params["perPage"]
+        return iter(matches[start : start + params["perPage"]])
+
+
+class TestResolveFiles(unittest.TestCase):
+    def setUp(self):
+        self.client = _Client()
+        self.project = Project({"id": "p"}, self.client)
+
+    def test_found_missing_and_ambiguous(self):
+        names = ["a.jpg", "b.jpg", "missing.jpg", "a.jpg"]
+        resolved = self.project.resolve_files(names)
+        self.assertEqual(list(resolved), ["a.jpg"])
+        self.assertEqual(resolved["a.jpg"].id, "1")
+        self.assertEqual(resolved.missing, ["missing.jpg"])
+        self.assertEqual([f.id for f in resolved.matches("b.jpg")], ["2", "3"])
+        self.assertEqual(resolved.matches("missing.jpg"), [])
+        self.assertEqual(self.client.wheres, [{"name": {"in": names[:3]}}])
+
+    def test_chunks_queries_by_path(self):
+        paths = ["images/a.jpg", "images/b.jpg", "images/c.png"]
+        resolved = self.project.resolve_files(paths, by="path", chunk_size=2)
+        self.assertEqual([resolved[p].id for p in paths], ["1", "2", "4"])
+        chunks = sorted(where["path"]["in"] for where in self.client.wheres)
+        self.assertEqual(chunks, [paths[:2], paths[2:]])
+
+    def test_only_by_name_or_path(self):
+        with self.assertRaises(ValueError):
+            self.project.resolve_files(["a.jpg"], by="id")
+
+
+class TestResolveInBatches(unittest.TestCase):
+    def test_mask_search_names(self):
+        client = _Client()
+        masks = [("a_mask", "a_mask.png"), ("c_mask", "c_mask.png")]
+        items = resolve_in_batches(
+            Project({"id": "p"}, client),
+            masks,
+            lambda mask: mask_file_keys(mask[0], "_mask", "images/", "label"),
+            by="path",
+            batch_size=1,
+        )
+        found = [resolved.matches(file_key("c.png", "images")) for _, resolved in items]
+        self.assertEqual([len(files) for files in found], [0, 1])
+        self.assertEqual(len(client.wheres), 2)
+        self.assertEqual(len(client.wheres[0]["path"]["in"]), 6)
+
+
+class TestWhere(unittest.TestCase):
+    def test_operators(self):
+        where = Where(name__like="a%", annotations_count__lte=2)
+        self.assertEqual(
+            where.input,
+            {"name": {"like": "a%"}, "annotationsCount": {"lte": 2}},
+        )
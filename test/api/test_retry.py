@@ -0,0 +1,73 @@
+from unittest import mock
+
+from _server import Handler, ServerTestCase
+
+from datatorch.api import Client, CircuitBreaker, RetryPolicy
+from datatorch.api.session import PooledSession
+
+
+class _FlakyHandler(Handler):
+    """Fails the first `failures` requests with `status`"""
+
+    failures = 0
+    status = 503
+    requests = 0
+
+    def _handle(self):
+        self.read_body()
+        cls = type(self)
+        cls.requests += 1
+        if cls.failures > 0:
+            cls.failures -= 1
+            headers = {"Retry-After": "0"} if cls.status == 503 else {}
+            self.reply_json({}, cls.status, headers)
+        else:
+            self.reply_json({"data": {"a": 1}})
+
+    do_GET = do_POST = _handle
+
+
+class TestRetryPolicy(ServerTestCase):
+    handler = _FlakyHandler
+
+    def fail(self, count, status):
+        _FlakyHandler.failures = count
+        _FlakyHandler.status = status
+        _FlakyHandler.requests = 0
+
+    def policy(self, **kwargs):
+        return RetryPolicy(backoff=0.001, breaker=CircuitBreaker(cooldown=0), **kwargs)
+
+    def test_retries_rejected_requests(self):
+        self.fail(2, 503)
+        with PooledSession(retry=self.policy()) as session:
+            self.assertEqual(session.post(self.url, data=b"x").status_code, 200)
+        self.assertEqual(_FlakyHandler.requests, 3)
+
+    def test_only_retries_idempotent_on_bad_gateway(self):
+        self.fail(1, 502)
+        with PooledSession(retry=self.policy()) as session:
+            self.assertEqual(session.post(self.url, data=b"x").status_code, 502)
+            self.assertEqual(session.get(self.url).status_code, 200)
+
+    def test_graphql_mutations_are_not_retried(self):
+        with Client(api_url=self.url, schema=False, retry=self.policy()) as client:
+            self.fail(1, 502)
+            self.assertEqual(client.execute("query { a }"), {"a": 1})
+            self.assertEqual(_FlakyHandler.requests, 2)
+
+            self.fail(1, 502)
+            with self.assertRaises(Exception):
+                client.execute("mutation { a }")
+            self.assertEqual(_FlakyHandler.requests, 1)
+
+    def test_breaker_pauses_after_threshold(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=5)
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open)
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        with mock.patch("time.sleep") as sleep:
+            sleep.side_effect = lambda _: setattr(breaker, "_open_until", 0)
+            breaker.wait()
+        self.assertAlmostEqual(sleep.call_args[0][0], 5, delta=0.5)
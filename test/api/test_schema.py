@@ -0,0 +1,129 @@
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+
+from unittest import mock
+
+from _server import Handler, ServerTestCase
+
+from graphql import build_schema, get_introspection_query, graphql_sync
+
+from datatorch.api import AsyncApiClient, Client
+from datatorch.api.schema import SchemaCache
+from datatorch.core import env
+
+SCHEMA = build_schema("""
+    type Settings { apiVersion: String }
+    type Query { settings: Settings }
+""")
+
+
+def _stale_introspection() -> dict:
+    """Introspection of an older schema without `Settings.apiVersion`"""
+    stale = build_schema("""
+        type Settings { other: String }
+        type Query { settings: Settings }
+    """)
+    return graphql_sync(stale, get_introspection_query()).data
+
+
+class _GraphQLHandler(Handler):
+    operations = []
+    api_version = "1.0.0"
+
+    def do_POST(self):
+        body = json.loads(self.read_body())
+        query = body["query"]
+        self.operations.append("introspection" if "__schema" in query else "query")
+        root = {"settings": {"apiVersion": self.api_version}}
+        result = graphql_sync(SCHEMA, query, root_value=root)
+        self.reply_json({"data": result.data})
+
+
+class TestSchemaCache(ServerTestCase):
+    handler = _GraphQLHandler
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {env.CONFIG_DIR: self.dir})
+        self.env.start()
+        _GraphQLHandler.operations = []
+        _GraphQLHandler.api_version = "1.0.0"
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.dir)
+
+    def query(self, **kwargs):
+        with Client(api_url=self.url, **kwargs) as client:
+            return client.execute("query { settings { apiVersion } }")
+
+    def test_introspects_once_across_clients(self):
+        self.query()
+        self.query()
+        self.assertEqual(_GraphQLHandler.operations.count("introspection"), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.dir, "schemas"))), 1)
+
+    def test_revalidates_expired_schema_by_version(self):
+        self.query()
+        path = os.path.join(self.dir, "schemas", os.listdir(self.dir + "/schemas")[0])
+        with open(path) as f:
+            cached = json.load(f)
+        # Expire the cached schema, the unchanged version keeps it valid
+        with open(path, "w") as f:
+            json.dump(dict(cached, fetchedAt=0), f)
+
+        _GraphQLHandler.operations = []
+        self.query()
+        self.assertNotIn("introspection", _GraphQLHandler.operations)
+
+        with open(path, "w") as f:
+            json.dump(dict(cached, fetchedAt=0), f)
+        _GraphQLHandler.api_version = "2.0.0"
+        _GraphQLHandler.operations = []
+        self.query()
+        self.assertIn("introspection", _GraphQLHandler.operations)
+
+    def test_keeps_one_built_schema_per_version(self):
+        self.query()
+        path = os.path.join(self.dir, "schemas", os.listdir(self.dir + "/schemas")[0])
+        with open(path) as f:
+            cached = json.load(f)
+        for _ in range(3):
+            with open(path, "w") as f:
+                json.dump(dict(cached, fetchedAt=0), f)
+            self.query()
+        built = [key for key in SchemaCache._built if key[0] == path]
+        self.assertEqual(built, [(path, "1.0.0")])
+
+    def test_stream_refetches_stale_schema(self):
+        introspection = _stale_introspection()
+        with Client(api_url=self.url) as client:
+            client._schema_cache._write("1.0.0", introspection)
+            items = client.stream_query("query { settings { apiVersion } }", "x")
+            self.assertEqual(list(items), [])
+        # The API version, then the schema and the streamed query itself
+        self.assertEqual(
+            _GraphQLHandler.operations, ["query", "introspection", "query"]
+        )
+
+    def test_async_refetches_stale_schema(self):
+        introspection = _stale_introspection()
+
+        async def run():
+            async with AsyncApiClient(api_url=self.url) as api:
+                api.sync._schema_cache._write("1.0.0", introspection)
+                return await api.execute("query { settings { apiVersion } }")
+
+        self.assertEqual(asyncio.run(run()), {"settings": {"apiVersion": "1.0.0"}})
+        self.assertEqual(
+            _GraphQLHandler.operations, ["query", "introspection", "query"]
+        )
+
+    def test_no_schema_skips_introspection(self):
+        self.query(schema=False)
+        with mock.patch.dict(os.environ, {env.NO_SCHEMA: "1"}):
+            self.query()
+        self.assertEqual(_GraphQLHandler.operations, ["query", "query"])
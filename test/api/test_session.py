@@ -0,0 +1,91 @@
+import unittest
+
+from importlib.util import find_spec
+
+from requests.adapters import HTTPAdapter
+
+from _server import Handler, ServerTestCase
+
+from datatorch.api import Client
+from datatorch.api.session import (
+    BACKENDS,
+    PoolConfig,
+    PooledSession,
+    register_backend,
+)
+
+
+class _OkHandler(Handler):
+    def do_GET(self):
+        self.reply(200, b"ok")
+
+    def do_POST(self):
+        self.read_body()
+        self.reply_json({"data": {"a": 1}})
+
+
+class _RecordingAdapter(HTTPAdapter):
+    methods = []
+
+    def __init__(self, config, stats):
+        super().__init__()
+        self.stats = stats
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        self.methods.append(request.method)
+        return super().send(request, **kwargs)
+
+
+class TestPooledSession(ServerTestCase):
+    handler = _OkHandler
+
+    def test_reuses_connections(self):
+        with PooledSession() as session:
+            for _ in range(5):
+                session.get(self.url).content
+            self.assertDictEqual(
+                session.stats.dict(), {"requests": 5, "hits": 4, "misses": 1}
+            )
+
+    def test_keep_alive_disabled(self):
+        with PooledSession(PoolConfig(keep_alive=False)) as session:
+            for _ in range(3):
+                session.get(self.url).content
+            self.assertEqual(session.stats.misses, 3)
+            self.assertEqual(session.stats.hits, 0)
+
+    def test_pluggable_backend(self):
+        register_backend("recording", _RecordingAdapter)
+        try:
+            pool = PoolConfig(backend="recording")
+            with Client(api_url=self.url, schema=False, pool=pool) as client:
+                self.assertEqual(client.execute("query { a }"), {"a": 1})
+                client.session.get(self.url).content
+                self.assertEqual(client.pool_stats.requests, 2)
+            self.assertEqual(_RecordingAdapter.methods, ["POST", "GET"])
+        finally:
+            BACKENDS.pop("recording")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            PooledSession(PoolConfig(backend="carrier-pigeon"))
+
+    @unittest.skipUnless(find_spec("httpx") and find_spec("h2"), "needs httpx[http2]")
+    def test_httpx_backend(self):
+        pool = PoolConfig(backend="httpx")
+        with Client(api_url=self.url, schema=False, pool=pool) as client:
+            for _ in range(3):
+                self.assertEqual(client.execute("query { a }"), {"a": 1})
+            self.assertEqual(client.session.get(self.url).content, b"ok")
+            self.assertEqual(client.pool_stats.dict()["misses"], 1)
+
+    @unittest.skipUnless(find_spec("httpx") and find_spec("h2"), "needs httpx[http2]")
+    def test_httpx_backend_applies_session_settings(self):
+        with PooledSession(PoolConfig(backend="httpx")) as session:
+            adapter = session.get_adapter(self.url)
+            self.assertEqual(session.get(self.url, verify=False).content, b"ok")
+            self.assertIs(adapter.client(False), adapter.client(False))
+            self.assertIsNot(adapter.client(False), adapter.client())
+            proxied = adapter.client(proxy="http://127.0.0.1:1")
+            self.assertIsNot(proxied, adapter.client())
@@ -0,0 +1,145 @@
+import json
+import unittest
+
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from datatorch.api import ApiClient, Project, Tracer, trace
+from datatorch.api.stream import iter_json_array
+from datatorch.api.tracing import current_span
+
+from _server import Handler, ServerTestCase
+
+NODES = [
+    {
+        "id": str(i),
+        "name": f"ünïcode-{i}.png",
+        "annotations": [
+            {
+                "id": f"a{i}",
+                "sourcesJson": [{"type": "PaperBox", "x": 1.5, "y": [1] * 50}],
+            }
+        ],
+    }
+    for i in range(200)
+]
+
+PATH = ["data", "project", "files", "nodes"]
+
+
+def _chunks(data: bytes, size: int):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def test_decodes_across_chunk_boundaries(self):
+        body = json.dumps(
+            {"data": {"project": {"other": [1, "}"], "files": {"nodes": NODES}}}}
+        ).encode()
+        for size in (1, 7, 4096, len(body)):
+            self.assertEqual(list(iter_json_array(_chunks(body, size), PATH)), NODES)
+
+    def test_raises_errors_after_items(self):
+        body = json.dumps(
+            {
+                "data": {"project": {"files": {"nodes": [1]}}},
+                "errors": [{"message": "x"}],
+            }
+        ).encode()
+        items = []
+        with self.assertRaises(TransportQueryError):
+            for item in iter_json_array([body], PATH):
+                items.append(item)
+        self.assertEqual(items, [1])
+
+    def test_null_path_yields_nothing(self):
+        body = b'{"data": {"project": null}}'
+        self.assertEqual(list(iter_json_array([body], PATH)), [])
+
+
+class _FilesHandler(Handler):
+    """Streams `NODES`, persisting queries by hash, or fails with `status`"""
+
+    bodies = []
+    stored = set()
+    status = 200
+
+    def do_POST(self):
+        request = json.loads(self.read_body())
+        self.bodies.append(request)
+        if self.status == 401:
+            return self.reply(401, b"Unauthorized")
+        if self.status == 400:
+            return self.reply_json({"errors": [{"message": "Bad query"}]}, 400)
+        persisted = request.get("extensions", {}).get("persistedQuery")
+        if persisted and "query" not in request:
+            if persisted["sha256Hash"] not in self.stored:
+                return self.reply_json(
+                    {"errors": [{"message": "PersistedQueryNotFound"}]}
+                )
+        elif persisted:
+            self.stored.add(persisted["sha256Hash"])
+        body = json.dumps({"data": {"project": {"files": {"nodes": NODES}}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in _chunks(body, 1000):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class TestStreamFiles(ServerTestCase):
+    handler = _FilesHandler
+
+    def setUp(self):
+        _FilesHandler.bodies = []
+        _FilesHandler.stored = set()
+        _FilesHandler.status = 200
+
+    def files(self, **kwargs):
+        with ApiClient(api_url=self.url, schema=False, **kwargs) as client:
+            return Project({"id": "p1"}, client).files()
+
+    def test_creates_files_from_stream(self):
+        files = self.files()
+        self.assertEqual([f.name for f in files], [n["name"] for n in NODES])
+        self.assertEqual(files[3].annotations[0].id, "a3")
+
+    def test_persisted_queries(self):
+        with ApiClient(api_url=self.url, schema=False, persisted_queries=True) as api:
+            project = Project({"id": "p1"}, api)
+            for _ in range(2):
+                self.assertEqual(len(project.files()), len(NODES))
+            # Evicted by the server, the full query is sent again
+            _FilesHandler.stored = set()
+            self.assertEqual(len(project.files()), len(NODES))
+
+        sent_query = [("query" in body) for body in _FilesHandler.bodies]
+        self.assertEqual(sent_query, [True, False, False, True])
+        hashes = [b["extensions"]["persistedQuery"] for b in _FilesHandler.bodies]
+        self.assertEqual(len(set(h["sha256Hash"] for h in hashes)), 1)
+
+    def test_span_is_current_only_while_reading(self):
+        ended = []
+        tracer = Tracer()
+        tracer.end = ended.append
+        query = '{ project(id: "p1") { files { nodes { id } } } }'
+        with ApiClient(api_url=self.url, schema=False) as api, trace(tracer):
+            between = [
+                current_span() for _ in api.stream_query(query, "project.files.nodes")
+            ]
+        self.assertEqual(between, [None] * len(NODES))
+        (traced,) = ended
+        self.assertIsNone(traced.error)
+        self.assertGreater(traced.response_bytes, 0)
+
+    def test_raises_client_errors(self):
+        _FilesHandler.status = 400
+        with self.assertRaises(TransportQueryError) as raised:
+            self.files()
+        self.assertEqual(raised.exception.errors, [{"message": "Bad query"}])
+
+        _FilesHandler.status = 401
+        with self.assertRaises(TransportServerError) as raised:
+            self.files()
+        self.assertEqual(raised.exception.code, 401)
@@ -0,0 +1,144 @@
+import io
+import json
+import unittest
+
+from _server import Handler, ServerTestCase
+
+from datatorch.api import (
+    CircuitBreaker,
+    Client,
+    JsonlTracer,
+    RetryPolicy,
+    TraceAggregator,
+    Tracer,
+    trace,
+)
+from datatorch.api.tracing import Span, current_span, span
+
+RESPONSE = json.dumps({"data": {"project": {"id": "p1"}}}).encode()
+
+
+class _Handler(Handler):
+    failures = 0
+
+    def do_POST(self):
+        self.read_body()
+        cls = type(self)
+        if cls.failures > 0:
+            cls.failures -= 1
+            self.reply(503, b"{}", {"Retry-After": "0"})
+        else:
+            self.reply(200, RESPONSE, {"Content-Type": "application/json"})
+
+
+class _Recorder(Tracer):
+    def __init__(self):
+        self.started, self.ended = [], []
+
+    def start(self, span):
+        self.started.append(span)
+
+    def end(self, span):
+        self.ended.append(span)
+
+
+class TestClientTracing(ServerTestCase):
+    handler = _Handler
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        retry = RetryPolicy(backoff=0.001, breaker=CircuitBreaker(cooldown=0))
+        cls.client = Client(api_url=cls.url, schema=False, retry=retry)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        super().tearDownClass()
+
+    def test_records_graphql_calls(self):
+        recorder = _Recorder()
+        with trace(recorder):
+            self.client.execute(
+                "query GetProject($id: ID!) { project(id: $id) { id } }",
+                params={"id": "p1"},
+            )
+        (traced,) = recorder.ended
+        self.assertEqual(recorder.started, [traced])
+        self.assertEqual((traced.kind, traced.name), ("graphql", "GetProject"))
+        self.assertEqual(traced.variables_bytes, len('{"id": "p1"}'))
+        self.assertGreater(traced.request_bytes, traced.variables_bytes)
+        self.assertEqual(traced.response_bytes, len(RESPONSE))
+        self.assertEqual((traced.status, traced.retries, traced.error), (200, 0, None))
+        self.assertGreater(traced.elapsed, 0)
+
+    def test_counts_retries(self):
+        recorder = _Recorder()
+        _Handler.failures = 2
+        with trace(recorder):
+            self.client.execute("{ project { id } }")
+        (traced,) = recorder.ended
+        self.assertEqual((traced.name, traced.retries), ("project", 2))
+
+    def test_untraced_without_tracers(self):
+        recorder = _Recorder()
+        with trace(recorder):
+            pass
+        self.client.execute("{ project { id } }")
+        self.assertEqual(recorder.ended, [])
+
+
+class TestSpan(unittest.TestCase):
+    def test_records_errors_and_restores_parent(self):
+        recorder = _Recorder()
+        with trace(recorder):
+            with span("outer", "graphql") as outer:
+                with self.assertRaises(KeyError):
+                    with span("inner", "graphql"):
+                        raise KeyError("x")
+                self.assertIs(current_span(), outer)
+        self.assertIsNone(current_span())
+        inner = recorder.ended[0]
+        self.assertEqual(inner.error, "KeyError: 'x'")
+        self.assertIsNone(recorder.ended[1].error)
+
+    def test_yields_none_when_untraced(self):
+        with span("outer", "graphql") as traced:
+            self.assertIsNone(traced)
+
+
+class TestTraceAggregator(unittest.TestCase):
+    def test_percentiles_and_bytes(self):
+        aggregator = TraceAggregator()
+        for ms in range(1, 101):
+            traced = Span("GetFiles", "graphql")
+            traced.elapsed = ms / 1000
+            traced.request_bytes, traced.response_bytes = 10, 100
+            aggregator.end(traced)
+        failed = Span("upload", "upload")
+        failed.error = "HTTPError: 500"
+        aggregator.end(failed)
+
+        stats = {row["name"]: row for row in aggregator.stats()}
+        files = stats["GetFiles"]
+        self.assertEqual(files["calls"], 100)
+        self.assertEqual(
+            (files["p50"], files["p95"], files["p99"]), (0.05, 0.095, 0.099)
+        )
+        self.assertEqual((files["sent"], files["received"]), (1000, 10000))
+        self.assertEqual(stats["upload"]["errors"], 1)
+        self.assertIn("GetFiles", aggregator.summary())
+
+
+class TestJsonlTracer(unittest.TestCase):
+    def test_writes_a_line_per_span(self):
+        out = io.StringIO()
+        tracer = JsonlTracer(out)
+        with trace(tracer):
+            with span("download", "download") as traced:
+                traced.add_response_bytes(42)
+        tracer.close()
+        (line,) = out.getvalue().splitlines()
+        record = json.loads(line)
+        self.assertEqual(record["name"], "download")
+        self.assertEqual(record["response_bytes"], 42)
@@ -0,0 +1,430 @@
+import io
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+from urllib.parse import urlparse
+
+import requests
+
+from click.testing import CliRunner
+
+from _server import Handler, serve
+
+from datatorch.api import ApiClient, CircuitBreaker, RetryPolicy
+from datatorch.api.session import PooledSession
+from datatorch.cli.upload.folder import folder
+from datatorch.api.upload import (
+    ChunkedUploader,
+    FolderManifest,
+    SniffedFile,
+    glob_root,
+    multipart_encoder,
+)
+
+
+class TestSniffedFile(unittest.TestCase):
+    def test_replays_sniffed_bytes(self):
+        data = bytes(range(256)) * 40
+        sniffed = SniffedFile(io.BytesIO(data), sniff_size=100)
+        self.assertEqual(sniffed.len, len(data))
+
+        chunks = []
+        while True:
+            chunk = sniffed.read(64)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual(sniffed.len, 0)
+
+    def test_starts_at_current_position(self):
+        file = io.BytesIO(b"skipped-payload")
+        file.seek(8)
+        self.assertEqual(SniffedFile(file).read(), b"payload")
+
+
+class TestMultipartEncoder(unittest.TestCase):
+    def test_streams_whole_file(self):
+        data = b"0123456789" * 1000
+        encoder = multipart_encoder(io.BytesIO(data))
+
+        body = b""
+        while True:
+            chunk = encoder.read(1000)
+            if not chunk:
+                break
+            body += chunk
+
+        self.assertEqual(len(body), encoder.len)
+        self.assertIn(data, body)
+
+
+class _SessionServer(object):
+    """Stand-in for the chunked upload endpoints, with injectable failures.
+
+    `failures` maps part numbers, or "sessions" for session creation, to the
+    number of requests answered with `status` before succeeding.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.completed = {}
+        self.puts = []
+        self.posts = 0
+        self.failures = {}
+        self.status = 500
+        server = self
+
+        def failing(key):
+            if server.failures.get(key, 0) > 0:
+                server.failures[key] -= 1
+                return True
+            return False
+
+        class SessionHandler(Handler):
+            def _reply(self, code, body=None):
+                self.reply_json(body or {}, code)
+
+            def do_POST(self):
+                body = self.read_body()
+                path = urlparse(self.path).path.split("/")
+                if path[-1] == "sessions":
+                    server.posts += 1
+                    if failing("sessions"):
+                        return self._reply(server.status)
+                    session_id = str(len(server.sessions) + 1)
+                    server.sessions[session_id] = {
+                        "info": json.loads(body),
+                        "parts": {},
+                    }
+                    return self._reply(200, {"id": session_id})
+                if path[-1] == "complete":
+                    session = server.sessions.pop(path[-2])
+                    parts = session["parts"]
+                    server.completed[session["info"]["name"]] = b"".join(
+                        parts[n] for n in sorted(parts)
+                    )
+                    return self._reply(200)
+                self._reply(404)
+
+            def do_GET(self):
+                session = server.sessions.get(urlparse(self.path).path.split("/")[-1])
+                if session is None:
+                    return self._reply(404)
+                self._reply(200, {"parts": sorted(session["parts"])})
+
+            def do_PUT(self):
+                body = self.read_body()
+                path = urlparse(self.path).path.split("/")
+                part = int(path[-1])
+                server.puts.append(part)
+                if failing(part):
+                    return self._reply(server.status)
+                server.sessions[path[-3]]["parts"][part] = body
+                self._reply(200)
+
+        self._serving = serve(SessionHandler)
+        url = self._serving.__enter__().url
+        self.endpoint = f"{url}/api/file/v1/upload/storage"
+
+    def close(self):
+        self._serving.__exit__(None, None, None)
+
+
+class TestChunkedUploader(unittest.TestCase):
+    def setUp(self):
+        self.server = _SessionServer()
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "video.bin")
+        self.data = os.urandom(10 * 1024 + 17)
+        with open(self.path, "wb") as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.dir)
+
+    def uploader(self, retries=0):
+        retry = RetryPolicy(
+            attempts=retries, backoff=0.001, breaker=CircuitBreaker(cooldown=0)
+        )
+        return ChunkedUploader(
+            requests.Session(),
+            self.server.endpoint,
+            part_size=1024,
+            retry=retry,
+            manifest_dir=os.path.join(self.dir, "manifests"),
+        )
+
+    def test_uploads_in_parts(self):
+        with open(self.path, "rb") as file:
+            self.uploader().upload(file, params={"path": "videos"})
+        self.assertEqual(self.server.completed["video.bin"], self.data)
+        self.assertEqual(self.server.puts, list(range(11)))
+
+    def test_retries_failed_part(self):
+        self.server.failures = {3: 1}
+        with open(self.path, "rb") as file:
+            self.uploader(retries=1).upload(file)
+        self.assertEqual(self.server.completed["video.bin"], self.data)
+        self.assertEqual(self.server.puts.count(3), 2)
+
+    def test_uses_the_session_policy(self):
+        self.server.failures = {3: 5}
+        retry = RetryPolicy(attempts=2, backoff=0.001)
+        with PooledSession(retry=retry) as session, open(self.path, "rb") as file:
+            uploader = ChunkedUploader(
+                session,
+                self.server.endpoint,
+                part_size=1024,
+                manifest_dir=os.path.join(self.dir, "manifests"),
+            )
+            with self.assertRaises(requests.HTTPError):
+                uploader.upload(file)
+        self.assertIs(uploader.retry, retry)
+        self.assertEqual(self.server.puts.count(3), 3)
+
+    def test_fails_fast_on_client_errors(self):
+        self.server.failures, self.server.status = {0: 1}, 401
+        with open(self.path, "rb") as file:
+            with self.assertRaises(requests.HTTPError):
+                self.uploader(retries=3).upload(file)
+        self.assertEqual(self.server.puts, [0])
+
+    def test_does_not_repeat_session_creation(self):
+        self.server.failures = {"sessions": 1}
+        with open(self.path, "rb") as file:
+            with self.assertRaises(requests.HTTPError):
+                self.uploader(retries=3).upload(file)
+        self.assertEqual(self.server.posts, 1)
+
+        # Rejected without being processed, so it is safe to send again
+        self.server.failures, self.server.status = {"sessions": 1}, 503
+        with open(self.path, "rb") as file:
+            self.uploader(retries=3).upload(file)
+        self.assertEqual(self.server.posts, 3)
+        self.assertEqual(self.server.completed["video.bin"], self.data)
+
+    def test_resumes_from_last_acknowledged_part(self):
+        self.server.failures = {7: 1}
+        with open(self.path, "rb") as file:
+            with self.assertRaises(requests.HTTPError):
+                self.uploader().upload(file)
+        self.assertEqual(self.server.puts, list(range(8)))
+
+        self.server.puts = []
+        with open(self.path, "rb") as file:
+            self.uploader().upload(file)
+        self.assertEqual(self.server.puts, [7, 8, 9, 10])
+        self.assertEqual(self.server.completed["video.bin"], self.data)
+        self.assertEqual(os.listdir(os.path.join(self.dir, "manifests")), [])
+
+
+class TestFolderManifest(unittest.TestCase):
+    def test_records_across_instances(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "a.png")
+            with open(path, "wb") as f:
+                f.write(b"png")
+            manifest_path = os.path.join(directory, "manifest.log")
+
+            manifest = FolderManifest(manifest_path, directory)
+            manifest.add(manifest.key(path))
+            self.assertIn(manifest.key(path), FolderManifest(manifest_path, directory))
+
+            with open(path, "ab") as f:
+                f.write(b"changed")
+            self.assertNotIn(manifest.key(path), FolderManifest(manifest_path))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_glob_root(self):
+        self.assertEqual(glob_root(os.path.join("data", "img*", "*.png")), "data")
+        self.assertEqual(glob_root("*.png"), os.curdir)
+
+
+class TestUploadMany(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name in ("a.png", "b.png", "bad.png", "c.png", "d.png"):
+            self.write(name)
+        self.write(os.path.join("sub", "e.png"))
+
+        self.uploaded = []
+        self.api = ApiClient(api_url="http://127.0.0.1:9", schema=False)
+        patch = mock.patch.object(
+            self.api, "upload_to_filesource", side_effect=self.upload_to_filesource
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.api.close()
+        shutil.rmtree(self.dir)
+
+    def write(self, name):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(name.encode())
+
+    def upload_to_filesource(self, project, file, storageFolderName, **kwargs):
+        name = os.path.relpath(file.name, self.dir)
+        if name == "bad.png":
+            raise OSError("disk error")
+        self.uploaded.append((name, storageFolderName))
+
+    def paths(self, *names):
+        return [os.path.join(self.dir, name) for name in names]
+
+    def glob_upload(self, **kwargs):
+        return self.api.glob_upload_folder(
+            mock.Mock(),
+            os.path.join(self.dir, "**"),
+            "batch",
+            storageId="storage",
+            **kwargs,
+        )
+
+    def test_shards_folders(self):
+        paths = self.paths("a.png", "b.png", "c.png", "d.png", "sub/e.png")
+        report = self.api.upload_many(
+            mock.Mock(),
+            paths,
+            storageId="storage",
+            storageFolderName="batch",
+            folderSplit=2,
+            concurrency=3,
+        )
+        self.assertEqual(len(report.succeeded), 5)
+        self.assertEqual(
+            sorted(self.uploaded),
+            [
+                ("a.png", "batch_0"),
+                ("b.png", "batch_0"),
+                ("c.png", "batch_1"),
+                ("d.png", "batch_1"),
+                ("sub/e.png", "batch_2"),
+            ],
+        )
+
+    def test_reports_each_file(self):
+        results = []
+        paths = self.paths("a.png", "bad.png", "c.png")
+        report = self.api.upload_many(
+            mock.Mock(), paths, storageId="storage", callback=results.append
+        )
+        self.assertEqual(sorted(r.path for r in results), sorted(paths))
+        (failed,) = report.failed
+        self.assertEqual(failed.path, paths[1])
+        self.assertIsInstance(failed.error, OSError)
+        self.assertEqual(len(report.succeeded), 2)
+        self.assertEqual(report.size, len(b"a.png") + len(b"c.png"))
+
+    def test_default_filesource_raises_failed_uploads(self):
+        response = requests.Response()
+        response.status_code = 500
+        project = mock.Mock()
+        with mock.patch.object(self.api, "_post_file", return_value=response):
+            with self.assertRaises(requests.HTTPError):
+                self.api.upload_to_default_filesource(project, io.BytesIO(b"png"))
+
+    def test_globs_subfolders_when_recursive(self):
+        self.glob_upload(resume=False)
+        self.assertNotIn("sub/e.png", [name for name, _ in self.uploaded])
+
+        self.uploaded = []
+        report = self.glob_upload(resume=False, recursive=True)
+        self.assertIn(("sub/e.png", "batch"), self.uploaded)
+        self.assertEqual(len(report.results), 6)
+
+    def manifests(self):
+        manifests = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, manifests)
+        patch = mock.patch("datatorch.api.upload.uploads_dir", return_value=manifests)
+        patch.start()
+        self.addCleanup(patch.stop)
+        return manifests
+
+    def test_resume_skips_uploaded_files(self):
+        self.manifests()
+        first = self.glob_upload(resume=True)
+        self.uploaded = []
+        second = self.glob_upload(resume=True)
+
+        self.assertEqual(len(first.succeeded), 4)
+        self.assertEqual(len(second.skipped), 4)
+        # Failed files are not recorded, so they are tried again
+        self.assertEqual(self.uploaded, [])
+        self.assertEqual([r.path for r in second.failed], self.paths("bad.png"))
+
+    def test_resume_ignores_shifted_shards(self):
+        self.manifests()
+        self.glob_upload(resume=True, folderSplit=2)
+        # Sorted first, moving every other file into the next folder
+        self.write("0.png")
+        self.uploaded = []
+        second = self.glob_upload(resume=True, folderSplit=2)
+
+        self.assertEqual(self.uploaded, [("0.png", "batch_0")])
+        self.assertEqual(len(second.skipped), 4)
+
+    def test_resume_is_opt_in(self):
+        manifests = self.manifests()
+        self.glob_upload()
+        self.assertEqual(os.listdir(manifests), [])
+
+
+class TestUploadFolderCommand(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name in ("a.png", os.path.join("sub", "b.png")):
+            path = os.path.join(self.dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"png")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def invoke(self, *options):
+        """Runs the command, returning the arguments of `upload_many`"""
+        client = mock.Mock()
+        client.project.return_value.datasets.return_value = []
+        storage = mock.Mock(id="storage")
+        storage.name = "Storage"
+        client.project.return_value.storage_links.return_value = [storage]
+        client.upload_many.return_value.failed = []
+        client.upload_many.return_value.summary.return_value = "done"
+
+        module = "datatorch.cli.upload.folder"
+        settings = mock.Mock(api_url="http://127.0.0.1:9", api_key="key")
+        with mock.patch(f"{module}.ApiClient", return_value=client), mock.patch(
+            f"{module}.UserSettings", return_value=settings
+        ), mock.patch("datatorch.api.upload.uploads_dir", return_value=self.dir):
+            result = CliRunner().invoke(
+                folder, [self.dir, "project", *options], input="y\n1\n"
+            )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        return client.upload_many.call_args
+
+    def test_passes_options_to_upload_many(self):
+        args, kwargs = self.invoke("--concurrency", "3", "--recursive")
+        self.assertEqual(kwargs["concurrency"], 3)
+        self.assertIsNone(kwargs["manifest"])
+        self.assertEqual(
+            sorted(os.path.relpath(path, self.dir) for path in args[1]),
+            ["a.png", os.path.join("sub", "b.png")],
+        )
+
+    def test_resume_records_a_manifest(self):
+        _, kwargs = self.invoke("--resume")
+        self.assertIsInstance(kwargs["manifest"], FolderManifest)
+        self.assertEqual(kwargs["manifest"].root, os.path.abspath(self.dir))
@@ -0,0 +1,99 @@
+"""Measures the bytes on the wire of a large annotation mutation.
+
+Run with ``python test/benchmarks/bench_compression.py [annotations]``.
+Sends the same `createAnnotations` mutation of segmentation polygons to a
+local server with and without request compression, and prints the body
+size received by the server and the client time of each.
+"""
+
+import gzip
+import json
+import math
+import random
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from datatorch.api import Annotation, Client
+from datatorch.api.entity.annotation import create_annotations
+from datatorch.api.entity.sources.image import Segmentations
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = 0
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).received += len(data)
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        json.loads(data)
+        body = b'{"data": {"createAnnotations": true}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def polygon(points: int = 400) -> list:
+    """Noisy outline of a blob with coordinates as precise as COCO files"""
+    cx, cy, r = random.uniform(200, 800), random.uniform(200, 800), 150
+    return [
+        [
+            round(cx + r * math.cos(a) + random.uniform(-3, 3), 2),
+            round(cy + r * math.sin(a) + random.uniform(-3, 3), 2),
+        ]
+        for a in (2 * math.pi * i / points for i in range(points))
+    ]
+
+
+def annotations(count: int) -> list:
+    annos = []
+    for _ in range(count):
+        anno = Annotation(file_id="file", label_id="label")
+        anno.sources = [Segmentations(path_data=[polygon()])]
+        annos.append(anno)
+    return annos
+
+
+def send(url: str, annos: list, compress: bool) -> tuple:
+    _Handler.received = 0
+    for anno in annos:
+        anno.id = None
+        for source in anno.sources:
+            source.id = None
+    with Client(api_url=url, schema=False, compress=compress) as client:
+        start = time.perf_counter()
+        create_annotations(annos, client)
+        elapsed = time.perf_counter() - start
+    return _Handler.received, elapsed
+
+
+def main(count: int = 200):
+    random.seed(0)
+    annos = annotations(count)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        plain, plain_time = send(url, annos, compress=False)
+        gzipped, gzip_time = send(url, annos, compress=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"{count} annotations of 400 points")
+    print(f"uncompressed  {plain / 1e6:8.2f} MB  {plain_time * 1000:8.1f} ms")
+    print(f"gzip          {gzipped / 1e6:8.2f} MB  {gzip_time * 1000:8.1f} ms")
+    print(f"ratio         {plain / gzipped:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,69 @@
+"""Measures how fast entities are built from API responses.
+
+Run with ``python test/benchmarks/bench_entities.py [count]``. Prints the
+number of files (each with two annotations and their sources) built per
+second, and the memory retained per entity.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from datatorch.api import ApiClient, File
+
+
+def file_node(i: int) -> dict:
+    return {
+        "id": f"file-{i}",
+        "linkId": "link",
+        "name": f"{i:06}.jpg",
+        "path": f"images/{i:06}.jpg",
+        "mimetype": "image/jpeg",
+        "encoding": "7bit",
+        "kilobytes": 120,
+        "url": f"https://example.com/{i}",
+        "status": "ANNOTATING",
+        "datasetId": "dataset",
+        "annotationsCount": 2,
+        "updatedAt": "2024-01-01T00:00:00Z",
+        "annotations": [
+            {
+                "id": f"anno-{i}-{j}",
+                "name": None,
+                "color": "#ff0000",
+                "fileId": f"file-{i}",
+                "labelId": "label",
+                "sourcesJson": [
+                    {"id": f"src-{i}-{j}", "type": "PaperBox", "x": 1, "y": 2}
+                ],
+            }
+            for j in range(2)
+        ],
+    }
+
+
+def main(count: int = 20000) -> None:
+    client = ApiClient(api_url="http://127.0.0.1:1", schema=False)
+    nodes = [file_node(i) for i in range(count)]
+    # Files, annotations and sources
+    entities = count * 5
+
+    start = time.perf_counter()
+    [File(node, client) for node in nodes]
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    files = [File(node, client) for node in nodes]
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"{count} files, {entities} entities")
+    print(f"{entities / elapsed:,.0f} entities/s")
+    print(f"{retained / entities:,.0f} bytes/entity")
+    del files
+    client.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
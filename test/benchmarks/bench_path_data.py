@@ -0,0 +1,56 @@
+"""Measures the size and JSON cost of segmentation path data.
+
+Run with ``python test/benchmarks/bench_path_data.py [annotations]``. Encodes
+the same polygons at several precisions and encodings, and prints the JSON
+size, the time to round and encode them, and the time to decode them.
+"""
+
+import json
+import math
+import random
+import sys
+import time
+
+from datatorch.utils.converters import FLAT, POINTS, encode_path_data
+
+CASES = [
+    ("full precision", None, POINTS),
+    ("2 decimals", 2, POINTS),
+    ("2 decimals, flat", 2, FLAT),
+    ("integers", 0, POINTS),
+    ("integers, flat", 0, FLAT),
+]
+
+
+def polygon(points: int = 400) -> list:
+    """Noisy outline of a blob, as simplified from a mask or a model"""
+    cx, cy, r = random.uniform(200, 800), random.uniform(200, 800), 150
+    return [
+        [
+            cx + r * math.cos(a) + random.uniform(-3, 3),
+            cy + r * math.sin(a) + random.uniform(-3, 3),
+        ]
+        for a in (2 * math.pi * i / points for i in range(points))
+    ]
+
+
+def main(count: int = 200):
+    random.seed(0)
+    path_data = [[polygon()] for _ in range(count)]
+    print(f"{count} annotations of 400 points")
+    print(f"{'':<20}{'MB':>8}{'encode ms':>12}{'decode ms':>12}")
+    for name, precision, encoding in CASES:
+        start = time.perf_counter()
+        body = json.dumps([encode_path_data(p, precision, encoding) for p in path_data])
+        encoded = time.perf_counter() - start
+        start = time.perf_counter()
+        json.loads(body)
+        decoded = time.perf_counter() - start
+        print(
+            f"{name:<20}{len(body) / 1e6:8.2f}"
+            f"{encoded * 1000:12.1f}{decoded * 1000:12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,42 @@
+"""Measures how long the package and the CLI take to start.
+
+Run with ``python test/benchmarks/bench_startup.py [runs]``. Prints the best
+wall time of each command, each run in a fresh interpreter, next to an empty
+interpreter as reference.
+"""
+
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "python": "pass",
+    "import datatorch": "import datatorch",
+    "import datatorch.api": "import datatorch.api",
+    "datatorch --help": (
+        "from datatorch.cli.groups import main\n"
+        "try:\n    main(['--help'])\nexcept SystemExit:\n    pass"
+    ),
+    "datatorch version": (
+        "from datatorch.cli.groups import main\n"
+        "try:\n    main(['version'])\nexcept SystemExit:\n    pass"
+    ),
+}
+
+
+def best(code: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(runs: int = 5):
+    for name, code in COMMANDS.items():
+        print(f"{name:<24}{best(code, runs) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("numpy", "shapely", "imantics", "websockets", "magic", "aiohttp")
+
+# Cumulative microseconds `import datatorch` may take, far above the few
+# milliseconds it needs without dependencies so slow machines do not fail it
+IMPORT_BUDGET_US = 100_000
+
+
+def _loaded(code: str) -> set:
+    """Modules imported by running `code` in a fresh interpreter"""
+    script = f"{code}\nimport sys, json\nprint(json.dumps(list(sys.modules)))"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return set(json.loads(out.splitlines()[-1]))
+
+
+def _import_time(module: str) -> int:
+    """Cumulative microseconds importing `module` takes in a fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    # Lines read "import time: <self us> | <cumulative us> | <module>"
+    for line in err.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative)
+    raise AssertionError(f"{module} was not imported")
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_package_imports_no_dependencies(self):
+        modules = _loaded("import datatorch")
+        for name in HEAVY + ("gql", "requests", "datatorch.api"):
+            self.assertNotIn(name, modules)
+
+    def test_package_import_within_budget(self):
+        self.assertLess(_import_time("datatorch"), IMPORT_BUDGET_US)
+
+    def test_runtime_helpers_import_nothing_else(self):
+        modules = _loaded("from datatorch import get_inputs, get_input, set_output")
+        self.assertNotIn("datatorch.api", modules)
+        self.assertNotIn("datatorch.core", modules)
+
+    def test_api_client_skips_optional_dependencies(self):
+        modules = _loaded("from datatorch.api import ApiClient, File, Where")
+        for name in HEAVY:
+            self.assertNotIn(name, modules)
+
+    def test_cli_help_loads_no_subcommands(self):
+        modules = _loaded(
+            "from datatorch.cli.groups import main\n"
+            "try:\n    main(['--help'])\nexcept SystemExit:\n    pass"
+        )
+        for name in HEAVY + ("gql", "datatorch.api", "datatorch.agent", "jinja2"):
+            self.assertNotIn(name, modules)
+        # Groups are loaded for their help text, not their subcommands
+        self.assertNotIn("datatorch.cli.agent.start", modules)
@@ -0,0 +1,56 @@
+import json
+import unittest
+
+from datatorch.api import Segmentations
+from datatorch.utils import (
+    encode_path_data,
+    points_to_segmentation,
+    segmentation_to_points,
+    simplify_segmentation,
+)
+
+POLYGON = [[10.123456, 20.5], [30.0, 40.987654], [50.25, 60.0]]
+
+
+class TestPrecision(unittest.TestCase):
+    def test_keeps_coordinates_without_precision(self):
+        output = segmentation_to_points([[1, 2, 3, 4, 5, 6]])
+        self.assertEqual(json.dumps(output), "[[[1, 2], [3, 4], [5, 6]]]")
+
+    def test_rounds_to_decimals(self):
+        output = points_to_segmentation([POLYGON], precision=2)
+        self.assertEqual(output, [[10.12, 20.5, 30.0, 40.99, 50.25, 60.0]])
+
+    def test_zero_precision_gives_integers(self):
+        output = segmentation_to_points([[1.4, 2.6, 3, 4, 5, 6]], precision=0)
+        self.assertEqual(json.dumps(output), "[[[1, 3], [3, 4], [5, 6]]]")
+
+    def test_rounds_without_simplifying(self):
+        output = simplify_segmentation([[0.04, 0, 1, 0, 1, 1]], 0, precision=1)
+        self.assertEqual(output, [[0.0, 0.0, 1.0, 0.0, 1.0, 1.0]])
+
+
+class TestEncodePathData(unittest.TestCase):
+    def test_points(self):
+        data = encode_path_data([POLYGON], precision=1)
+        self.assertEqual(
+            data, {"pathData": [[[10.1, 20.5], [30.0, 41.0], [50.2, 60.0]]]}
+        )
+
+    def test_flat(self):
+        data = encode_path_data([POLYGON], precision=0, encoding="flat")
+        self.assertEqual(
+            data, {"pathData": [[10, 20, 30, 41, 50, 60]], "encoding": "flat"}
+        )
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            encode_path_data([POLYGON], encoding="delta")
+
+    def test_segmentations_source(self):
+        source = Segmentations([POLYGON], precision=0, encoding="flat")
+        self.assertEqual(
+            source._input()["data"],
+            {"pathData": [[10, 20, 30, 41, 50, 60]], "encoding": "flat"},
+        )
+        self.assertEqual(Segmentations([POLYGON]).data(), {"pathData": [POLYGON]})